@@ -0,0 +1,30 @@
+"""Report indexes
+
+Revision ID: 171e29a62170
+Revises: d6d6d51849e7
+Create Date: 2026-10-18 06:47:54.973058
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '171e29a62170'
+down_revision = 'd6d6d51849e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_assessments_student_id', 'assessments', ['student_id'], unique=False)
+    op.create_index('ix_assessments_subject_id_date_of', 'assessments', ['subject_id', 'date_of'], unique=False, postgresql_include=['value_'])
+    op.create_index('ix_students_group_id_id', 'students', ['group_id', 'id'], unique=False, postgresql_include=['name'])
+    op.create_index('ix_subjects_teacher_id', 'subjects', ['teacher_id'], unique=False, postgresql_include=['subject'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_subjects_teacher_id', table_name='subjects')
+    op.drop_index('ix_students_group_id_id', table_name='students')
+    op.drop_index('ix_assessments_subject_id_date_of', table_name='assessments')
+    op.drop_index('ix_assessments_student_id', table_name='assessments')
+
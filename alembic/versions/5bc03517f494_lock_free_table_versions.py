@@ -0,0 +1,57 @@
+"""Lock-free table versions
+
+Revision ID: 5bc03517f494
+Revises: 171e29a62170
+Create Date: 2026-10-18 14:02:31.604417
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5bc03517f494'
+down_revision = '171e29a62170'
+branch_labels = None
+depends_on = None
+
+TABLES = ('groups_', 'students', 'teachers', 'subjects', 'assessments')
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return None  # the row triggers of SQLite stay
+
+    # the UPDATE of a table_versions row locked it: concurrent writers of a table waited for each other's commit;
+    # the versions are read from pg_stat_user_tables now, only TRUNCATE (not counted there) needs a trigger
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_version ON {table}')
+
+    op.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+    op.execute('CREATE SEQUENCE IF NOT EXISTS table_truncations')
+    op.execute('''CREATE OR REPLACE FUNCTION count_truncation() RETURNS trigger AS $$
+        BEGIN
+            PERFORM nextval('table_truncations');
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql''')
+    for table in TABLES:
+        op.execute(f'CREATE TRIGGER {table}_truncation AFTER TRUNCATE ON {table} '
+                   f'FOR EACH STATEMENT EXECUTE FUNCTION count_truncation()')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return None
+
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_truncation ON {table}')
+
+    op.execute('DROP FUNCTION IF EXISTS count_truncation()')
+    op.execute('DROP SEQUENCE IF EXISTS table_truncations')
+    op.execute('''CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql''')
+    for table in TABLES:
+        op.execute(f'CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+                   f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()')
@@ -0,0 +1,57 @@
+"""Notify table versions
+
+Revision ID: 9d84d3fda010
+Revises: 5bc03517f494
+Create Date: 2026-10-18 16:40:12.281937
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9d84d3fda010'
+down_revision = '5bc03517f494'
+branch_labels = None
+depends_on = None
+
+TABLES = ('groups_', 'students', 'teachers', 'subjects', 'assessments')
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return None  # the row triggers of SQLite stay
+
+    # the statistics of pg_stat_user_tables lag behind the commits (or are off, or reset): a statement trigger
+    # NOTIFYs instead - delivered right after the commit, without a row lock
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_truncation ON {table}')
+
+    op.execute('DROP FUNCTION IF EXISTS count_truncation()')
+    op.execute('DROP SEQUENCE IF EXISTS table_truncations')
+    op.execute('''CREATE OR REPLACE FUNCTION notify_table_version() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('table_versions', TG_TABLE_NAME);
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql''')
+    for table in TABLES:
+        op.execute(f'CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+                   f'FOR EACH STATEMENT EXECUTE FUNCTION notify_table_version()')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return None
+
+    for table in TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_version ON {table}')
+
+    op.execute('DROP FUNCTION IF EXISTS notify_table_version()')
+    op.execute('CREATE SEQUENCE IF NOT EXISTS table_truncations')
+    op.execute('''CREATE OR REPLACE FUNCTION count_truncation() RETURNS trigger AS $$
+        BEGIN
+            PERFORM nextval('table_truncations');
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql''')
+    for table in TABLES:
+        op.execute(f'CREATE TRIGGER {table}_truncation AFTER TRUNCATE ON {table} '
+                   f'FOR EACH STATEMENT EXECUTE FUNCTION count_truncation()')
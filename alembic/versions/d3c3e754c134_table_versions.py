@@ -0,0 +1,49 @@
+"""Table versions
+
+Revision ID: d3c3e754c134
+Revises: 541eba179edd
+Create Date: 2026-10-18 10:12:40.318245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3c3e754c134'
+down_revision = '541eba179edd'
+branch_labels = None
+depends_on = None
+
+TABLES = ('groups_', 'students', 'teachers', 'subjects', 'assessments')
+
+
+def upgrade() -> None:
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.VARCHAR(length=30), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [{'table_name': table, 'version': 0} for table in TABLES])
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return None  # reports.cache.install_version_triggers() creates the row triggers of SQLite
+
+    op.execute('''CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql''')
+    for table in TABLES:
+        op.execute(f'CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+                   f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in TABLES:
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_version ON {table}')
+
+        op.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+
+    op.drop_table('table_versions')
@@ -0,0 +1,83 @@
+"""Materialized views
+
+Revision ID: d6d6d51849e7
+Revises: fcc955b8b7f3
+Create Date: 2026-10-18 12:41:05.226817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6d6d51849e7'
+down_revision = 'fcc955b8b7f3'
+branch_labels = None
+depends_on = None
+
+AVERAGE = ('SUM(a.value_) AS total, COUNT(a.value_) AS count_, '
+           'SUM(a.value_) / CAST(COUNT(a.value_) AS NUMERIC) AS average')
+# view -> (query, unique index columns (REFRESH ... CONCURRENTLY needs one), other indexes)
+VIEWS = {
+    'mv_student_scores': (
+        f'''SELECT s.id AS student_id, {AVERAGE}
+        FROM assessments a JOIN students s ON s.id = a.student_id
+        WHERE a.value_ IS NOT NULL GROUP BY s.id''',
+        'student_id',
+        ['average'],
+        ),
+    'mv_student_subject_scores': (
+        f'''SELECT s.id AS student_id, j.id AS subject_id, {AVERAGE}
+        FROM assessments a JOIN students s ON s.id = a.student_id JOIN subjects j ON j.id = a.subject_id
+        WHERE a.value_ IS NOT NULL GROUP BY s.id, j.id''',
+        'student_id, subject_id',
+        ['subject_id, average'],
+        ),
+    'mv_group_subject_scores': (
+        f'''SELECT g.id AS group_id, j.id AS subject_id, {AVERAGE}
+        FROM assessments a JOIN students s ON s.id = a.student_id JOIN groups_ g ON g.id = s.group_id
+        JOIN subjects j ON j.id = a.subject_id
+        WHERE a.value_ IS NOT NULL GROUP BY g.id, j.id''',
+        'group_id, subject_id',
+        ['subject_id'],
+        ),
+    'mv_teacher_scores': (
+        f'''SELECT t.id AS teacher_id, {AVERAGE}
+        FROM assessments a JOIN subjects j ON j.id = a.subject_id JOIN teachers t ON t.id = j.teacher_id
+        WHERE a.value_ IS NOT NULL GROUP BY t.id''',
+        'teacher_id',
+        [],
+        ),
+    'mv_overall_score': (
+        f'SELECT 1 AS id, {AVERAGE} FROM assessments a WHERE a.value_ IS NOT NULL',
+        'id',
+        [],
+        ),
+    }
+
+
+def upgrade() -> None:
+    op.create_table('view_refreshes',
+    sa.Column('view_name', sa.VARCHAR(length=40), nullable=False),
+    sa.Column('refreshed_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('write_volume', sa.BigInteger(), nullable=False),
+    sa.Column('duration', sa.NUMERIC(), nullable=False),
+    sa.PrimaryKeyConstraint('view_name')
+    )
+
+    if op.get_bind().dialect.name != 'postgresql':
+        return None  # reports.views.install_views() creates the tables that emulate the views
+
+    for view, (query, unique, indexes) in VIEWS.items():
+        op.execute(f'CREATE MATERIALIZED VIEW {view} AS {query}')
+        op.execute(f'CREATE UNIQUE INDEX ux_{view} ON {view} ({unique})')
+        for columns in indexes:
+            op.execute(f'CREATE INDEX ix_{view}_{columns.replace(", ", "_")} ON {view} ({columns})')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for view in VIEWS:
+            op.execute(f'DROP MATERIALIZED VIEW IF EXISTS {view}')
+
+    op.drop_table('view_refreshes')
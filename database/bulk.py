@@ -0,0 +1,196 @@
+from datetime import date
+import io
+from itertools import islice
+import logging
+from typing import (
+    Iterable,
+    Iterator,
+    )
+
+from sqlalchemy import (
+    Connection,
+    CursorResult,
+    Executable,
+    func,
+    insert,
+    Insert,
+    select,
+    Table,
+    )
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+
+BATCH_SIZE = 10_000  # rows per executemany (insertmanyvalues page)
+COPY_CHUNK_SIZE = 50_000  # rows per COPY ... FROM STDIN buffer flush
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def batched(rows: Iterable, batch_size: int = BATCH_SIZE) -> Iterator[list]:
+    """Split any iterable of rows into lists of at most batch_size rows (lazily)."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def written_rows(result: CursorResult, default: int) -> int:
+    """Rows really written (conflicting rows skipped) if the driver reports it."""
+    return result.rowcount if result.rowcount >= 0 else default
+
+
+def insert_statement(connection: Connection, table: Table, ignore_conflicts: bool = False) -> Insert:
+    """INSERT for table; with ignore_conflicts rows that break a unique constraint are skipped one by one."""
+    if not ignore_conflicts:
+        return insert(table)
+
+    if connection.dialect.name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+
+    if connection.dialect.name == 'sqlite':
+        return insert(table).prefix_with('OR IGNORE')
+
+    logging.warning(f'\t\t{connection.dialect.name}: no "ignore conflicts" INSERT, savepoints only.')
+    return insert(table)
+
+
+def execute_in_savepoint(connection: Connection, statement: Executable, batch: list[dict]) -> int:
+    """Execute one batch in a SAVEPOINT; if it still fails - retry it row by row and skip the rows that fail."""
+    try:
+        with connection.begin_nested():
+            return written_rows(connection.execute(statement, batch), len(batch))
+
+    except IntegrityError as error:
+        logging.warning(f'\t\tBatch of {len(batch)} row(s) failed, retry row by row, error:\n{error.orig}')
+
+    written = 0
+    for row in batch:
+        try:
+            with connection.begin_nested():
+                written += written_rows(connection.execute(statement, row), 1)
+
+        except IntegrityError:
+            logging.debug(f'\t\tSkipped row: {row}')
+
+    return written
+
+
+def insert_batches(
+        connection: Connection,
+        table: Table,
+        rows: Iterable[dict],
+        batch_size: int = BATCH_SIZE,
+        ignore_conflicts: bool = False,
+        ) -> int:
+    """Write rows (dicts keyed by column name) to table with Core INSERT, one executemany per batch."""
+    # insertmanyvalues: one multi-row "INSERT ... VALUES (...), (...)" per page instead of a round trip per row
+    statement = insert_statement(connection, table, ignore_conflicts)
+    statement = statement.execution_options(insertmanyvalues_page_size=batch_size)
+    total = 0
+    # pysqlite defers BEGIN: a SAVEPOINT would open the transaction itself and its RELEASE would commit the batch,
+    # and INSERT OR IGNORE skips the conflicting rows of SQLite anyway
+    in_savepoint = ignore_conflicts and connection.dialect.name != 'sqlite'
+    for batch in batched(rows, batch_size):
+        if in_savepoint:
+            total += execute_in_savepoint(connection, statement, batch)
+
+        elif ignore_conflicts:
+            total += written_rows(connection.execute(statement, batch), len(batch))
+
+        else:
+            connection.execute(statement, batch)
+            total += len(batch)
+
+        logging.debug(f'\t\t{table.name}: {total} row(s) written.')
+
+    return total
+
+
+def copy_value(value) -> str:
+    """Render one value in PostgreSQL COPY text format."""
+    if value is None:
+        return r'\N'
+
+    if isinstance(value, date):  # date and datetime
+        return value.isoformat()
+
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_rows(
+        connection: Connection,
+        table: Table,
+        rows: Iterable[dict],
+        chunk_size: int = COPY_CHUNK_SIZE,
+        ignore_conflicts: bool = False,
+        ) -> int:
+    """Stream rows into table through COPY ... FROM STDIN (psycopg2 raw cursor), one in-memory buffer per chunk.
+
+    COPY itself cannot skip rows, so with ignore_conflicts every chunk is copied into a temporary
+    staging table and moved by INSERT ... SELECT ... ON CONFLICT DO NOTHING inside a SAVEPOINT."""
+    preparer = connection.dialect.identifier_preparer
+    target = preparer.format_table(table)
+    stage = preparer.quote(f'{table.name}_stage')
+    cursor = connection.connection.cursor()  # DBAPI cursor inside the same transaction
+    total = 0
+    try:
+        for number, chunk in enumerate(batched(rows, chunk_size)):
+            names = list(chunk[0])
+            columns = ', '.join(preparer.quote(name) for name in names)
+            buffer = io.StringIO()
+            buffer.writelines('\t'.join(copy_value(row[name]) for name in names) + '\n' for row in chunk)
+            buffer.seek(0)
+            if not ignore_conflicts:
+                cursor.copy_expert(f'COPY {target} ({columns}) FROM STDIN', buffer)
+                total += len(chunk)
+
+            else:
+                if not number:  # only column types, without NOT NULL id and its sequence default
+                    connection.exec_driver_sql(f'DROP TABLE IF EXISTS {stage}')
+                    connection.exec_driver_sql(
+                        f'CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {columns} FROM {target} WITH NO DATA'
+                        )
+
+                with connection.begin_nested():
+                    connection.exec_driver_sql(f'TRUNCATE {stage}')
+                    cursor.copy_expert(f'COPY {stage} ({columns}) FROM STDIN', buffer)
+                    result = connection.exec_driver_sql(
+                        f'INSERT INTO {target} ({columns}) SELECT {columns} FROM {stage} ON CONFLICT DO NOTHING'
+                        )
+                    total += written_rows(result, len(chunk))
+
+            logging.debug(f'\t\t{table.name}: {total} row(s) copied.')
+
+    finally:
+        cursor.close()
+
+    return total
+
+
+def supports_copy(connection: Connection) -> bool:
+    """COPY FROM STDIN is used only with the psycopg2 driver of PostgreSQL."""
+    return connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+
+def load_rows(
+        connection: Connection,
+        table: Table,
+        rows: Iterable[dict],
+        batch_size: int = BATCH_SIZE,
+        ignore_conflicts: bool = False,
+        ) -> int:
+    """Bulk load rows: COPY on PostgreSQL, batched INSERTs on SQLite or other dialects. Returns rows written."""
+    if supports_copy(connection):
+        return copy_rows(connection, table, rows, batch_size, ignore_conflicts)
+
+    return insert_batches(connection, table, rows, batch_size, ignore_conflicts)
+
+
+def sync_sequence(connection: Connection, table: Table) -> None:
+    """Move the PostgreSQL serial sequence of table past MAX(id) after rows were loaded with explicit ids."""
+    if connection.dialect.name != 'postgresql':
+        return None  # SQLite picks MAX(rowid) + 1 by itself
+
+    max_id = func.max(table.c.id)
+    sequence = func.pg_get_serial_sequence(table.name, 'id')
+    connection.execute(select(func.setval(sequence, func.coalesce(max_id, 1), max_id.isnot(None))))
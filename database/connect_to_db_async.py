@@ -0,0 +1,45 @@
+import logging
+from typing import Union
+
+from sqlalchemy.engine import (
+    make_url,
+    URL,
+    )
+from sqlalchemy.ext.asyncio import (
+    async_sessionmaker,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+    )
+
+from database.connect_to_db_postgresql import url_to_db
+
+
+ASYNC_DRIVERS = {'postgresql': 'asyncpg', 'sqlite': 'aiosqlite'}
+# Hundreds of queries in flight share these connections: the ones over the limit wait for a free one
+POOL_SIZE = 20
+MAX_OVERFLOW = 30
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def async_url(url: Union[str, URL]) -> URL:
+    """The same database through the asyncio driver of its backend (postgresql+psycopg2 -> postgresql+asyncpg)."""
+    url = make_url(url)
+
+    return url.set(drivername=f'{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_backend_name()]}')
+
+
+def create_async_connection(url: Union[str, URL] = url_to_db) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
+    """Create an asyncio engine and a factory of AsyncSession-s (one per task: a session is not shared by tasks)."""
+    url = async_url(url)
+    pool = {'pool_size': POOL_SIZE, 'max_overflow': MAX_OVERFLOW} if url.get_backend_name() == 'postgresql' else {}
+    engine_ = create_async_engine(url, **pool)
+    # expire_on_commit=False: the attributes of committed objects are read without another (awaited) query
+    session_factory = async_sessionmaker(engine_, expire_on_commit=False)
+    logging.debug(f'=== Async engine is Ok: \n{engine_}')
+
+    return engine_, session_factory
+
+
+async_engine, async_session = create_async_connection()
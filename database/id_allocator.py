@@ -0,0 +1,70 @@
+from functools import lru_cache
+import logging
+import threading
+
+import numpy as np
+from sqlalchemy import (
+    Engine,
+    func,
+    select,
+    Table,
+    )
+
+
+BLOCK_SIZE = 1_000  # ids reserved per round trip when fewer are asked for
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+class IdAllocator:
+    """Primary keys of one table handed out from blocks reserved in advance (hi/lo): ids are known before INSERT.
+
+    PostgreSQL: a block is drawn from the serial sequence of the table, so it never collides with the ids
+    of ordinary INSERTs of other sessions (and the ids of a block need not be contiguous then).
+    Other dialects: a local counter from MAX(id) + 1 - valid only while this process is the only writer."""
+
+    def __init__(self, engine_: Engine, table: Table, block_size: int = BLOCK_SIZE):
+        self.engine = engine_
+        self.table = table
+        self.block_size = block_size
+        self.lock = threading.Lock()
+        self.free = np.empty(0, dtype=np.int64)  # reserved, not handed out yet
+        self.sequence = None
+        self.next_id = None  # local counter (not PostgreSQL)
+
+    def reserve(self, size: int) -> np.ndarray:
+        """One round trip: size new ids (ascending)."""
+        with self.engine.begin() as connection:
+            if connection.dialect.name == 'postgresql':
+                if self.sequence is None:
+                    self.sequence = connection.scalar(select(func.pg_get_serial_sequence(self.table.name, 'id')))
+
+                ids = connection.scalars(
+                    select(func.nextval(self.sequence)).select_from(func.generate_series(1, size))
+                    )
+                return np.sort(np.fromiter(ids, dtype=np.int64, count=size))
+
+            if self.next_id is None:
+                self.next_id = (connection.scalar(select(func.max(self.table.c.id))) or 0) + 1
+
+        ids = np.arange(self.next_id, self.next_id + size, dtype=np.int64)
+        self.next_id += size
+        logging.debug(f'\t\t{self.table.name}: ids {ids[0]}..{ids[-1]} reserved locally.')
+
+        return ids
+
+    def allocate(self, size: int) -> np.ndarray:
+        """size ids for new rows of the table (ascending), reserving a new block only when the current runs out."""
+        with self.lock:
+            if size > len(self.free):
+                self.free = np.concatenate((self.free, self.reserve(max(self.block_size, size - len(self.free)))))
+
+            ids, self.free = self.free[:size], self.free[size:]
+
+        return ids
+
+
+@lru_cache(maxsize=None)
+def id_allocator(engine_: Engine, table: Table) -> IdAllocator:
+    """One allocator per database and table in the process (the local counters must not overlap)."""
+    return IdAllocator(engine_, table)
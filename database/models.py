@@ -1,8 +1,10 @@
 from sqlalchemy import (
+    BigInteger,
     CHAR,
     Column,
     DATE,
     ForeignKey,
+    Index,
     Integer, 
     NUMERIC,
     TIMESTAMP, 
@@ -40,6 +42,8 @@ class Student(Base):
     created_at = Column(TIMESTAMP(timezone=False), server_default=func.current_timestamp())
     # for SQLAlchemy, for usable query joins:
     group = relationship(Group)
+    # indexes proposed by reports/index_advisor.py (migration 171e29a62170):
+    __table_args__ = (Index('ix_students_group_id_id', 'group_id', 'id', postgresql_include=['name']),)
 
 
 class Teacher(Base):
@@ -59,6 +63,7 @@ class Subject(Base):
     created_at = Column(TIMESTAMP(timezone=False), server_default=func.current_timestamp())
     # for SQLAlchemy, for usable query joins:
     teacher = relationship(Teacher)
+    __table_args__ = (Index('ix_subjects_teacher_id', 'teacher_id', postgresql_include=['subject']),)
 
 # records = relationship("Record", cascade="all, delete", backref="note")
 # tags = relationship("Tag", secondary=note_m2m_tag, backref="notes", passive_deletes=True)
@@ -76,3 +81,61 @@ class Assessment(Base):
     created_at = Column(TIMESTAMP(timezone=False), server_default=func.current_timestamp())
     subject = relationship(Subject)  # передати можна просто клас можна назву класу (без різниці), for SQLAlchemy
     student = relationship(Student)  # for SQLAlchemy
+    __table_args__ = (
+        Index('ix_assessments_student_id', 'student_id'),
+        Index('ix_assessments_subject_id_date_of', 'subject_id', 'date_of', postgresql_include=['value_']),
+        )
+
+
+# Лічильник змін кожної таблиці SQLite (тригери збільшують його при INSERT/UPDATE/DELETE з будь-якого процесу;
+# PostgreSQL рахує зміни в pg_stat_user_tables), for database.versions:
+class TableVersion(Base):
+    __tablename__ = 'table_versions'
+    table_name = Column(VARCHAR(30), primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default='0')
+
+
+# Зведені таблиці оцінок (sum/count), database.summaries оновлює їх разом з assessments.
+# Без ForeignKey: не заважають видаляти основні таблиці (drop_tables.py).
+class StudentScore(Base):
+    __tablename__ = 'student_scores'
+    student_id = Column(Integer, primary_key=True, autoincrement=False)
+    total = Column(NUMERIC, nullable=False)
+    count_ = Column(Integer, nullable=False)
+    average = Column(NUMERIC, index=True)  # top-N by an index scan
+
+
+class StudentSubjectScore(Base):
+    __tablename__ = 'student_subject_scores'
+    student_id = Column(Integer, primary_key=True, autoincrement=False)
+    subject_id = Column(Integer, primary_key=True, autoincrement=False)
+    total = Column(NUMERIC, nullable=False)
+    count_ = Column(Integer, nullable=False)
+    average = Column(NUMERIC)
+    __table_args__ = (Index('ix_student_subject_scores_subject_id_average', 'subject_id', 'average'),)
+
+
+class GroupSubjectScore(Base):
+    __tablename__ = 'group_subject_scores'
+    group_id = Column(Integer, primary_key=True, autoincrement=False)
+    subject_id = Column(Integer, primary_key=True, autoincrement=False, index=True)
+    total = Column(NUMERIC, nullable=False)
+    count_ = Column(Integer, nullable=False)
+    average = Column(NUMERIC)
+
+
+class TeacherScore(Base):
+    __tablename__ = 'teacher_scores'
+    teacher_id = Column(Integer, primary_key=True, autoincrement=False)
+    total = Column(NUMERIC, nullable=False)
+    count_ = Column(Integer, nullable=False)
+    average = Column(NUMERIC)
+
+
+# Коли reports.views востаннє оновив кожне матеріалізоване представлення (і скільки записів тоді вже було):
+class ViewRefresh(Base):
+    __tablename__ = 'view_refreshes'
+    view_name = Column(VARCHAR(40), primary_key=True)
+    refreshed_at = Column(TIMESTAMP(timezone=False), nullable=False)
+    write_volume = Column(BigInteger, nullable=False)  # rows written to the raw tables up to that refresh
+    duration = Column(NUMERIC, nullable=False)  # seconds
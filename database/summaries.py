@@ -0,0 +1,280 @@
+from collections import defaultdict
+from itertools import chain
+import logging
+from typing import Iterable
+
+from sqlalchemy import (
+    Connection,
+    delete,
+    event,
+    func,
+    insert,
+    select,
+    Select,
+    tuple_,
+    update,
+    )
+from sqlalchemy.dialects import (
+    postgresql,
+    sqlite,
+    )
+from sqlalchemy.orm import (
+    object_session,
+    ORMExecuteState,
+    Session,
+    )
+from sqlalchemy.sql.util import find_tables
+
+from database.models import (
+    Assessment,
+    Group,
+    GroupSubjectScore,
+    Student,
+    StudentScore,
+    StudentSubjectScore,
+    Subject,
+    Teacher,
+    TeacherScore,
+    )
+
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def aggregate(*keys) -> Select:
+    total = func.sum(Assessment.value_)
+    count = func.count(Assessment.value_)
+
+    return select(*keys, total.label('total'), count.label('count_'), (total / count).label('average'))
+
+
+# summary model -> the aggregation over the raw tables it keeps (the same joins as the reports had):
+SOURCES = {
+    StudentScore: aggregate(Student.id.label('student_id'))
+    .select_from(Assessment).join(Student)
+    .where(Assessment.value_.isnot(None))
+    .group_by(Student.id),
+    StudentSubjectScore: aggregate(Student.id.label('student_id'), Subject.id.label('subject_id'))
+    .select_from(Assessment).join(Student).join(Subject)
+    .where(Assessment.value_.isnot(None))
+    .group_by(Student.id, Subject.id),
+    GroupSubjectScore: aggregate(Group.id.label('group_id'), Subject.id.label('subject_id'))
+    .select_from(Assessment).join(Student).join(Group).join(Subject)
+    .where(Assessment.value_.isnot(None))
+    .group_by(Group.id, Subject.id),
+    TeacherScore: aggregate(Teacher.id.label('teacher_id'))
+    .select_from(Assessment).join(Subject).join(Teacher)
+    .where(Assessment.value_.isnot(None))
+    .group_by(Teacher.id),
+    }
+# summary table name -> raw tables it is computed from (for reports.cache)
+SOURCE_TABLES = {
+    model.__tablename__: tuple(sorted({table.name for table in find_tables(statement, include_joins=False)}))
+    for model, statement in SOURCES.items()
+    }
+# raw table -> summary models computed from it (what a bulk write to the table makes stale)
+SUMMARIES_OF = {
+    table: tuple(model for model in SOURCES if table in SOURCE_TABLES[model.__tablename__])
+    for table in sorted(set(chain.from_iterable(SOURCE_TABLES.values())))
+    }
+# raw table -> {summary model: (raw id column, summary column)}: what to recompute when its rows change
+REFRESH_BY = {
+    Student.__tablename__: {
+        StudentScore: (Student.id, StudentScore.student_id),
+        StudentSubjectScore: (Student.id, StudentSubjectScore.student_id),
+        },
+    Subject.__tablename__: {
+        StudentSubjectScore: (Subject.id, StudentSubjectScore.subject_id),
+        GroupSubjectScore: (Subject.id, GroupSubjectScore.subject_id),
+        },
+    Group.__tablename__: {GroupSubjectScore: (Group.id, GroupSubjectScore.group_id)},
+    Teacher.__tablename__: {TeacherScore: (Teacher.id, TeacherScore.teacher_id)},
+    }
+
+
+def columns_of(model) -> list[str]:
+    return [column.name for column in model.__table__.columns]
+
+
+def rebuild_summaries(connection: Connection, models: Iterable = tuple(SOURCES)) -> None:
+    """Recompute the summary tables of models (all by default) from the raw rows (after bulk loads that bypass
+    the ORM)."""
+    models = [model for model in SOURCES if model in set(models)]
+    for model in models:
+        connection.execute(delete(model))
+        connection.execute(insert(model).from_select(columns_of(model), SOURCES[model]))
+
+    logging.info(f'\t\t\tSummary tables rebuilt: {", ".join(model.__tablename__ for model in models)}.')
+
+
+def refresh_summaries(connection: Connection, table_name: str, ids: Iterable[int]) -> None:
+    """Recompute the summary rows that depend on the given rows of a raw table."""
+    ids = [id_ for id_ in ids if id_ is not None]
+    if not ids:
+        return None
+
+    for model, (raw_column, summary_column) in REFRESH_BY[table_name].items():
+        connection.execute(delete(model).where(summary_column.in_(ids)))
+        connection.execute(insert(model).from_select(columns_of(model), SOURCES[model].where(raw_column.in_(ids))))
+
+
+def upsert_deltas(connection: Connection, model, deltas: dict[tuple, list]) -> None:
+    """Add (total, count) deltas to the rows of a summary table, then recompute their averages."""
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    keys = [column for column in model.__table__.primary_key.columns]
+    statement = dialect.insert(model)
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={'total': model.total + statement.excluded.total, 'count_': model.count_ + statement.excluded.count_},
+        )
+    connection.execute(statement, [
+        {**{column.name: value for column, value in zip(keys, key)}, 'total': total, 'count_': count}
+        for key, (total, count) in deltas.items()
+        ])
+
+    touched = tuple_(*keys).in_(list(deltas))
+    connection.execute(delete(model).where(touched, model.count_ <= 0))
+    connection.execute(update(model).where(touched).values(average=model.total / model.count_))
+
+
+def apply_deltas(connection: Connection, changes: list[tuple]) -> None:
+    """changes: (sign, value_, student_id, subject_id) of inserted (+1) and deleted (-1) assessments."""
+    student_ids = {student_id for _, _, student_id, _ in changes if student_id is not None}
+    subject_ids = {subject_id for _, _, _, subject_id in changes if subject_id is not None}
+    groups = dict(connection.execute(select(Student.id, Student.group_id).where(Student.id.in_(student_ids))).all())
+    teachers = dict(
+        connection.execute(select(Subject.id, Subject.teacher_id).where(Subject.id.in_(subject_ids))).all()
+        )
+
+    deltas = defaultdict(lambda: defaultdict(lambda: [0, 0]))  # model -> key -> [total, count]
+    for sign, value, student_id, subject_id in changes:
+        if value is None:
+            continue
+
+        targets = []
+        if student_id in groups:  # only students (and subjects) that exist: the reports join them
+            targets.append((StudentScore, (student_id,)))
+            if subject_id in teachers:
+                targets.append((StudentSubjectScore, (student_id, subject_id)))
+                if groups[student_id] is not None:
+                    targets.append((GroupSubjectScore, (groups[student_id], subject_id)))
+
+        if subject_id in teachers and teachers[subject_id] is not None:
+            targets.append((TeacherScore, (teachers[subject_id],)))
+
+        for model, key in targets:
+            deltas[model][key][0] += sign * value
+            deltas[model][key][1] += sign
+
+    for model, model_deltas in deltas.items():
+        upsert_deltas(connection, model, model_deltas)
+
+
+def pending(session_: Session, name: str, factory):
+    return session_.info.setdefault(name, factory())
+
+
+def stored(connection: Connection, target, *keys: str) -> tuple:
+    """Values of the row of target as they are in the database before the flush writes it
+    (the attribute history has no old values for attributes that were expired when they were set)."""
+    model = type(target)
+    row = connection.execute(select(*(getattr(model, key) for key in keys)).where(model.id == target.id)).one()
+
+    return tuple(row)
+
+
+@event.listens_for(Assessment, 'after_insert')
+def assessment_inserted(mapper, connection: Connection, target: Assessment) -> None:
+    pending(object_session(target), 'score_changes', list).append(
+        (1, target.value_, target.student_id, target.subject_id)
+        )
+
+
+@event.listens_for(Assessment, 'before_delete')
+def assessment_deleted(mapper, connection: Connection, target: Assessment) -> None:
+    pending(object_session(target), 'score_changes', list).append(
+        (-1, target.value_, target.student_id, target.subject_id)
+        )
+
+
+@event.listens_for(Assessment, 'before_update')
+def assessment_updated(mapper, connection: Connection, target: Assessment) -> None:
+    old = stored(connection, target, 'value_', 'student_id', 'subject_id')
+    new = (target.value_, target.student_id, target.subject_id)
+    if old != new:
+        pending(object_session(target), 'score_changes', list).extend(((-1, *old), (1, *new)))
+
+
+def refresh_later(target, *table_ids: tuple[str, Iterable]) -> None:
+    refresh = pending(object_session(target), 'summary_refresh', lambda: defaultdict(set))
+    for table_name, ids in table_ids:
+        refresh[table_name].update(ids)
+
+
+@event.listens_for(Student, 'before_update')
+def student_updated(mapper, connection: Connection, target: Student) -> None:
+    old_group, = stored(connection, target, 'group_id')
+    if old_group != target.group_id:
+        refresh_later(target, (Group.__tablename__, (old_group, target.group_id)))
+
+
+@event.listens_for(Student, 'before_delete')
+def student_deleted(mapper, connection: Connection, target: Student) -> None:
+    refresh_later(target, (Student.__tablename__, (target.id,)), (Group.__tablename__, (target.group_id,)))
+
+
+@event.listens_for(Subject, 'before_update')
+def subject_updated(mapper, connection: Connection, target: Subject) -> None:
+    old_teacher, = stored(connection, target, 'teacher_id')
+    if old_teacher != target.teacher_id:
+        refresh_later(target, (Teacher.__tablename__, (old_teacher, target.teacher_id)))
+
+
+@event.listens_for(Subject, 'before_delete')
+def subject_deleted(mapper, connection: Connection, target: Subject) -> None:
+    refresh_later(target, (Subject.__tablename__, (target.id,)), (Teacher.__tablename__, (target.teacher_id,)))
+
+
+@event.listens_for(Group, 'before_delete')
+def group_deleted(mapper, connection: Connection, target: Group) -> None:
+    refresh_later(target, (Group.__tablename__, (target.id,)))
+
+
+@event.listens_for(Teacher, 'before_delete')
+def teacher_deleted(mapper, connection: Connection, target: Teacher) -> None:
+    refresh_later(target, (Teacher.__tablename__, (target.id,)))
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def update_summaries(session_: Session, flush_context) -> None:
+    """Apply the changes of the flush to the summary tables, in the same transaction."""
+    changes = session_.info.pop('score_changes', None)
+    refresh = session_.info.pop('summary_refresh', None)
+    if changes:
+        apply_deltas(session_.connection(), changes)
+
+    for table_name, ids in (refresh or {}).items():  # recomputed from the raw rows: after the deltas
+        refresh_summaries(session_.connection(), table_name, ids)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def remember_bulk_writes(state: ORMExecuteState) -> None:
+    """query(...).update()/delete() and insert()/update()/delete() statements skip the mapper events:
+    the summaries computed from the written table are rebuilt at commit."""
+    if state.is_insert or state.is_update or state.is_delete:
+        models = SUMMARIES_OF.get(state.statement.table.name, ())
+        if models:
+            pending(state.session, 'rebuild_summaries', set).update(models)
+
+
+@event.listens_for(Session, 'before_commit')
+def rebuild_after_bulk_writes(session_: Session) -> None:
+    models = session_.info.pop('rebuild_summaries', None)
+    if models:
+        rebuild_summaries(session_.connection(), models)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def forget_changes(session_: Session, previous_transaction) -> None:
+    for name in ('score_changes', 'summary_refresh', 'rebuild_summaries'):
+        session_.info.pop(name, None)
@@ -0,0 +1,138 @@
+from itertools import chain
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy import (
+    Connection,
+    Engine,
+    select,
+    text,
+    )
+from sqlalchemy.exc import DBAPIError
+
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    Teacher,
+    TableVersion,
+    )
+
+
+VERSIONED_TABLES = tuple(model.__tablename__ for model in (Group, Student, Teacher, Subject, Assessment))
+CHANNEL = 'table_versions'  # NOTIFY channel of the PostgreSQL triggers, the payload is the table name
+
+# Every commit that wrote a table (in any process, COPY and psql too) changes its version:
+# PostgreSQL - a statement trigger NOTIFYs: the notification is delivered only after the commit (none after
+# a rollback) and the writers lock no row for it, concurrent writers of a table never wait for each other;
+# SQLite - row triggers on table_versions (one writer at a time anyway).
+VERSION_TRIGGERS = {
+    'postgresql': [
+        '''CREATE OR REPLACE FUNCTION notify_table_version() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('table_versions', TG_TABLE_NAME);
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql''',
+        *chain.from_iterable((
+            f'DROP TRIGGER IF EXISTS {table}_version ON {table}',
+            f'DROP TRIGGER IF EXISTS {table}_truncation ON {table}',
+            f'CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION notify_table_version()',
+            ) for table in VERSIONED_TABLES),
+        'DROP FUNCTION IF EXISTS bump_table_version()',
+        'DROP FUNCTION IF EXISTS count_truncation()',
+        'DROP SEQUENCE IF EXISTS table_truncations',
+        ],
+    'sqlite': [  # no statement-level triggers in SQLite: one per row and operation
+        f'''CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_version AFTER {operation} ON {table}
+        BEGIN UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}'; END'''
+        for table in VERSIONED_TABLES for operation in ('INSERT', 'UPDATE', 'DELETE')
+        ],
+    }
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def install_versions(engine_: Engine) -> None:
+    """Create table_versions with a row per table and the triggers (the Alembic migrations do the same)."""
+    TableVersion.__table__.create(engine_, checkfirst=True)
+    with engine_.begin() as connection:
+        known = set(connection.scalars(select(TableVersion.table_name)))
+        for table in VERSIONED_TABLES:
+            if table not in known:
+                connection.execute(TableVersion.__table__.insert().values(table_name=table, version=0))
+
+        for statement in VERSION_TRIGGERS.get(connection.dialect.name, []):
+            connection.exec_driver_sql(statement)
+
+
+class TableVersions:
+    """{table: version} of VERSIONED_TABLES; a version only grows, every committed write changes it.
+
+    SQLite: table_versions, read on every call.
+    PostgreSQL: the notifications of the triggers counted on an own LISTEN connection (psycopg2). Every call
+    makes a round trip on it: the server sends the notifications of all commits finished before the reply.
+    A new connection misses the notifications sent meanwhile, so every version changes when it connects."""
+
+    def __init__(self, engine_: Engine):
+        self.engine = engine_
+        self.connection: Optional[Connection] = None
+        self.versions = dict.fromkeys(VERSIONED_TABLES, 0)
+        self.lock = threading.Lock()  # one LISTEN connection for all threads
+
+    def listen(self) -> Connection:
+        connection = self.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        try:
+            if connection.scalar(text("SELECT to_regproc('notify_table_version')")) is None:
+                raise LookupError('No notify_table_version() trigger function: run the migrations.')
+
+            connection.exec_driver_sql(f'LISTEN {CHANNEL}')
+
+        except BaseException:
+            connection.close()
+            raise
+
+        for table in self.versions:
+            self.versions[table] += 1
+
+        return connection
+
+    def notifications(self) -> list:
+        """Notifications of the commits before this call (reconnects once after a dropped connection)."""
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = self.listen()
+
+            try:
+                self.connection.exec_driver_sql('SELECT 1')
+                break
+
+            except DBAPIError as error:
+                self.close()
+                if not error.connection_invalidated or attempt == 2:
+                    raise
+
+        dbapi_connection = self.connection.connection.dbapi_connection
+        notifications = list(dbapi_connection.notifies)
+        dbapi_connection.notifies.clear()
+
+        return notifications
+
+    def read(self) -> dict[str, int]:
+        if self.engine.dialect.name != 'postgresql':
+            with self.engine.connect() as connection:
+                return dict(connection.execute(select(TableVersion.table_name, TableVersion.version)).all())
+
+        with self.lock:
+            for notification in self.notifications():
+                if notification.payload in self.versions:
+                    self.versions[notification.payload] += 1
+
+            return dict(self.versions)
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -1,6 +1,9 @@
 from functools import wraps
 import logging
-from typing import Callable
+from typing import (
+    Any,
+    Callable,
+    )
 
 from database.connect_to_db_postgresql import session
 
@@ -31,3 +34,28 @@ def exeption_catcher(*param):
         return wrapped
     
     return wrapper
+
+
+def async_exeption_catcher(*param):
+    """exeption_catcher for coroutines that take their AsyncSession as the first argument."""
+
+    def wrapper(func: Callable) -> Callable:
+
+        @wraps(func)
+        async def wrapped(session_, *args, **kwargs) -> Any:
+
+            try:
+                function_result = await func(session_, *args, **kwargs)
+
+            except Exception as error:
+                logging.error(f'\t\t\tWrong execute {func.__name__}, error:\n{error}')
+                await session_.rollback()
+                return False
+
+            logging.info(f'\t\t\t=== STEP-{param}: {func.__name__} done.')
+
+            return function_result
+
+        return wrapped
+
+    return wrapper
@@ -1,10 +1,16 @@
 import argparse
+from contextlib import nullcontext
 from datetime import datetime
-from pprint import pprint
+import sys
 
 from database.connect_to_db_postgresql import session
 from database.models import Student, Teacher, Group, Subject, Assessment
+import database.summaries  # noqa: F401 - keeps the summary tables current on every ORM write
 from exception_catcher import exeption_catcher
+from reports.streaming import (
+    render_rows,
+    STREAM_CHUNK,
+    )
 
 
 MODELS = {
@@ -42,6 +48,7 @@ parser.add_argument('-aid', '--assessment_id', type=int,
 parser.add_argument('-ast', '--assessment_value_', type=int, help=': Choice of assessment_value_.')
 parser.add_argument('-ad', '--assessment_date_of', type=str,
                     help=': Choice of assessment_date_of (YYYY-MM-DD). Example: 2023-02-25.')
+parser.add_argument('-o', '--output', type=str, help=': File for the rows of "list" (default: stdout).')
 
 # ArgumentParser аналізує аргументи за допомогою методу parse_args()
 arguments = parser.parse_args()  # автоматично визначатиме аргументи командного рядка з sys.argv
@@ -131,12 +138,13 @@ def handler_insert():
 
 @exeption_catcher(7)
 def handler_select():
-    if not arguments.id:
-        query = session.query('*').select_from(MODELS[arguments.model]).all()
-    else:
-        query = session.query('*').select_from(MODELS[arguments.model])\
-            .filter(MODELS[arguments.model].id == arguments.id).all()
-    pprint(query)
+    query = session.query('*').select_from(MODELS[arguments.model])
+    if arguments.id:
+        query = query.filter(MODELS[arguments.model].id == arguments.id)
+
+    # rows are fetched (server-side cursor) and written STREAM_CHUNK at a time, not loaded all at once:
+    with open(arguments.output, 'w', encoding='utf-8') if arguments.output else nullcontext(sys.stdout) as output:
+        render_rows(query.yield_per(STREAM_CHUNK), output)
 
 
 @exeption_catcher(8)
@@ -197,6 +205,7 @@ python main.py -a create -m Teacher --name 'Boris Jonson'
 python main.py -a create -m Student -n 'Ned Larips' -gid 2
 python main.py -a create -m Subject -n 'Development' -tid 1
 python main.py -a create -m Assessment -ast 5 -subid 1 -sid 1 -ad 2022-12-12
+python main.py -a list -m Assessment -o assessments.txt
 python main.py -a list -aid 5
 python main.py -a list -m Group
 python main.py -a list -m Group -id 3
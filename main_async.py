@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime
+from pprint import pprint
+from typing import Optional
+
+from sqlalchemy import (
+    delete,
+    select,
+    )
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.connect_to_db_async import async_session
+from database.models import Student, Teacher, Group, Subject, Assessment
+import database.summaries  # noqa: F401 - keeps the summary tables current on every ORM write
+from exception_catcher import async_exeption_catcher
+from my_select_async import gather_reports
+
+
+MODELS = {
+    'Student': Student,
+    'Teacher': Teacher,
+    'Group': Group,
+    'Subject': Subject,
+    'Assessment': Assessment,
+    }
+
+
+# The handlers of main.py for an AsyncSession (the values are arguments here, not the parsed command line):
+@async_exeption_catcher(6)
+async def handler_insert(session_: AsyncSession, model: str, **values):
+    new_insert = MODELS[model](**values)
+    session_.add(new_insert)
+    await session_.commit()
+
+    return new_insert
+
+
+@async_exeption_catcher(7)
+async def handler_select(session_: AsyncSession, model: str, id_: Optional[int] = None) -> list[Row]:
+    query = select(*MODELS[model].__table__.columns)  # as session.query('*')
+    if id_:
+        query = query.where(MODELS[model].id == id_)
+
+    return (await session_.execute(query)).all()
+
+
+@async_exeption_catcher(8)
+async def handler_update(session_: AsyncSession, model: str, id_: int, **values):
+    object_to_update = await session_.get(MODELS[model], id_)
+    for attribute_, new_value in values.items():
+        if hasattr(object_to_update, attribute_) and new_value:
+            setattr(object_to_update, attribute_, new_value)
+
+    await session_.commit()
+
+    return object_to_update
+
+
+@async_exeption_catcher(9)
+async def handler_delete(session_: AsyncSession, model: str, id_: Optional[int] = None) -> bool:
+    if not id_:
+        await session_.execute(delete(MODELS[model]))
+
+    else:
+        object_to_delete = await session_.get(MODELS[model], id_)
+        await session_.delete(object_to_delete)
+
+    await session_.commit()
+
+    return True
+
+
+ACTIONS = {
+    'create': handler_insert,
+    'list': handler_select,
+    'update': handler_update,
+    'remove': handler_delete,
+    }
+
+
+async def main():
+    """CRUD of an assessment and all reports at once, without CLI."""
+    async with async_session() as session_:
+        assessment = await ACTIONS['create'](
+            session_, 'Assessment', value_=5, subject_id=1, student_id=1, date_of=datetime(2023, 2, 25)
+            )
+        if assessment:
+            await ACTIONS['update'](session_, 'Assessment', assessment.id, value_=4)
+            pprint(await ACTIONS['list'](session_, 'Assessment', assessment.id))
+            await ACTIONS['remove'](session_, 'Assessment', assessment.id)
+
+    for name, rows in (await gather_reports()).items():
+        print(f'\n{name}:')
+        pprint(rows)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
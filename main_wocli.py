@@ -5,31 +5,19 @@ import logging
 
 from my_select import selections
 import seed
-from seed import (
-    NUMBER_OF_GROUPS,
-    NUMBER_OF_STUDENTS,
-    NUMBER_OF_TEACHERS,
-    NUMBER_OF_SUBJECTS,
-    NUMBER_OF_ASSESSMENTS,
-    )
 
 
 logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
 
 
-def main():
-    """Create and write data to tables."""
+def main(workers: int = 1):
+    """Create and write data to tables: independent tables at the same time, following the foreign keys
+    (students and assessments in `workers` processes if more than 1)."""
     try:
-        seed.create_groups()
-        logging.info(f'\t\t\tRecorded {NUMBER_OF_GROUPS} group(s).')
-        seed.create_students()
-        logging.info(f'\t\t\tRecorded {NUMBER_OF_STUDENTS} student(s).')
-        seed.create_teachers()
-        logging.info(f'\t\t\tRecorded {NUMBER_OF_TEACHERS} teacher(s).')
-        seed.create_subjects()
-        logging.info(f'\t\t\tRecorded {NUMBER_OF_SUBJECTS} subject(s).')
-        seed.create_assessments()
-        logging.info(f'\t\t\tRecorded overall {NUMBER_OF_ASSESSMENTS} assessment(s).')
+        if workers > 1:
+            return seed.run(seed.PROFILE, 'parallel', workers)
+
+        return seed.run(seed.PROFILE, 'scheduled')
 
     except Exception as error:  # except Error as error:
         logging.error(f'Wrong insert groups, error:\n{error}')
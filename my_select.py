@@ -1,134 +1,258 @@
+from dataclasses import (
+    dataclass,
+    field,
+    )
+from functools import cached_property
 from pprint import pprint
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Optional,
+    )
 
-from sqlalchemy import func, desc
+from sqlalchemy import (
+    and_,
+    bindparam,
+    desc,
+    func,
+    Integer,
+    select,
+    Select,
+    )
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
 
 from database.connect_to_db_postgresql import session
 from database.models import (
     Group,
+    GroupSubjectScore,
     Student,
+    StudentScore,
+    StudentSubjectScore,
     Subject,
     Teacher,
+    TeacherScore,
     Assessment,
     )
+import database.summaries  # noqa: F401 - keeps the summary tables current on every ORM write
+
+
+# Bind parameters shared by the statements (one object per name - the same key everywhere):
+GROUP_ID = bindparam('group_id', type_=Integer)
+STUDENT_ID = bindparam('student_id', type_=Integer)
+SUBJECT_ID = bindparam('subject_id', type_=Integer)
+TEACHER_ID = bindparam('teacher_id', type_=Integer)
+LAST_LESSON_DATE = bindparam('last_lesson_date')
+
+
+@dataclass(frozen=True)
+class Report:
+    """A statement built once: every run only binds new parameter values (the compiled SQL is reused)."""
+    name: str
+    description: str
+    statement: Select
+    defaults: dict[str, Any] = field(default_factory=dict)  # the ids the select_N functions always used
+    # (session, params) -> more params, for a report that needs a value from the database first:
+    prepare: Optional[Callable[[Session, dict], dict]] = None
+
+
+# Date of the last lesson of a group in a subject (of the study year, not of every student):
+LAST_LESSON = (
+    select(Assessment.date_of)
+    .join(Student)
+    .join(Group)
+    .where(Group.id == GROUP_ID, Assessment.subject_id == SUBJECT_ID)
+    .order_by(desc(Assessment.date_of))
+    .limit(1)
+    )
 
 
-def select_1():
-    """Знайти 5 студентів із найбільшим середнім балом з усіх предметів."""
-    result = (
-        session.query(
-            Student.id,
+def last_lesson_assessments(date_of) -> Select:
+    return (
+        select(
+            Assessment.value_,
             Student.name,
-            func.round(func.avg(Assessment.value_), 1).label('Success_rate')
-            )
-        .select_from(Assessment).join(Student)
-        .group_by(Student.id)
-        .order_by(desc('Success_rate'))
-        .limit(5)
-        .all()  # виконання всього запиту
-        )
-
-    return result
-
-
-def select_2():
-    """Знайти студента із найвищим середнім балом з певного предмета."""
-    result = (
-        session.query(
-            Student.id.label('ID'), 
-            Student.name, 
-            func.round(func.avg(Assessment.value_), 1).label('Success_rate'),
-            Subject.subject
-            )
-        .select_from(Assessment)
-        .join(Student)
-        .join(Subject)
-        .filter(Subject.id == 2)
-        .group_by(Student.id, Subject.subject, Assessment.subject_id)
-        # .group_by(Subject.subject)
-        # .group_by(Assessment.subject_id)
-        .order_by(desc('Success_rate'), Assessment.subject_id)
-        # .order_by(Assessment.subject_id)
-        .limit(1)
-        .all()
-        )
-
-    return result
-
-
-def select_3():
-    """Знайти середній бал у групах з певного предмета."""
-    result = (
-        session.query(
-            Group.id,
             Group.group_name,
-            Subject.subject, 
-            func.avg(Assessment.value_).label('Average_success_rate')
+            Subject.subject,
+            Assessment.date_of
             )
         .select_from(Assessment)
         .join(Subject)
         .join(Student)
         .join(Group)
-        .filter(Subject.id == 2)
-        .group_by(Group.id, Subject.subject)
-        .all()
+        .where(Group.id == GROUP_ID, Subject.id == SUBJECT_ID, Assessment.date_of == date_of)
+        .group_by(Student.id, Group.id, Subject.id, Assessment.date_of, Assessment.id)
+        .order_by(Student.id, desc(Assessment.date_of))
         )
 
-    return result
 
-
-def select_4():
-    """Знайти середній бал на потоці (по всій таблиці оцінок)."""
-    result = (
-        session.query(
-            func.round(func.avg(Assessment.value_), 3).label('Whole_success_rate')
+def latest_lesson_assessments(*criteria) -> Select:
+    """Grades of the last lesson of every (group, subject) pair that matches criteria, in one pass:
+    MAX(date_of) OVER the pair marks its last lesson, no second query or scan for the date.
+    The window sorts only the narrow assessment rows, the names are joined to the few rows left."""
+    lessons = (
+        select(
+            Assessment.id,
+            Assessment.value_,
+            Assessment.date_of,
+            Assessment.student_id,
+            Assessment.subject_id,
+            Student.group_id,
+            func.max(Assessment.date_of).over(partition_by=(Student.group_id, Assessment.subject_id))
+            .label('last_lesson')
             )
         .select_from(Assessment)
-        .all()
+        .join(Student)
+        .where(*criteria)
+        .subquery('lessons')
         )
 
-    return result
+    return (
+        select(
+            lessons.c.value_,
+            Student.name,
+            Group.group_name,
+            Subject.subject,
+            lessons.c.date_of
+            )
+        .select_from(lessons)
+        .join(Student, Student.id == lessons.c.student_id)
+        .join(Group, Group.id == lessons.c.group_id)
+        .join(Subject, Subject.id == lessons.c.subject_id)
+        .where(lessons.c.date_of == lessons.c.last_lesson)
+        .order_by(lessons.c.group_id, lessons.c.subject_id, lessons.c.student_id, lessons.c.id)
+        )
 
 
-def select_5():
-    """Знайти які курси читає певний викладач."""
-    result = (
-        session.query(
+def summary_statements(
+        student_scores=StudentScore,
+        student_subject_scores=StudentSubjectScore,
+        group_subject_scores=GroupSubjectScore,
+        teacher_scores=TeacherScore,
+        ) -> dict[str, Select]:
+    """Statements of the reports that read the summary tables (or entities mapped onto the same columns)."""
+    return {
+        'select_1': (
+            select(
+                Student.id,
+                Student.name,
+                func.round(student_scores.average, 1).label('Success_rate')
+                )
+            .select_from(student_scores).join(Student, Student.id == student_scores.student_id)
+            .order_by(desc(student_scores.average), student_scores.student_id)  # equal averages: the lowest id
+            .limit(5)
+            ),
+        'select_2': (
+            select(
+                Student.id.label('ID'),
+                Student.name,
+                func.round(student_subject_scores.average, 1).label('Success_rate'),
+                Subject.subject
+                )
+            .select_from(student_subject_scores)
+            .join(Student, Student.id == student_subject_scores.student_id)
+            .join(Subject, Subject.id == student_subject_scores.subject_id)
+            .where(student_subject_scores.subject_id == SUBJECT_ID)
+            .order_by(desc(student_subject_scores.average), student_subject_scores.student_id)  # as best_students
+            .limit(1)
+            ),
+        'select_3': (
+            select(
+                Group.id,
+                Group.group_name,
+                Subject.subject,
+                group_subject_scores.average.label('Average_success_rate')
+                )
+            .select_from(group_subject_scores)
+            .join(Group, Group.id == group_subject_scores.group_id)
+            .join(Subject, Subject.id == group_subject_scores.subject_id)
+            .where(group_subject_scores.subject_id == SUBJECT_ID)
+            ),
+        'select_8': (
+            select(
+                func.round(teacher_scores.average, 1).label('Success_rate'),
+                Teacher.name
+                )
+            .select_from(teacher_scores)
+            .join(Teacher, Teacher.id == teacher_scores.teacher_id)
+            .where(teacher_scores.teacher_id == TEACHER_ID)
+            ),
+        'select_11': (
+            select(
+                func.round(func.sum(student_subject_scores.total) / func.sum(student_subject_scores.count_), 1)
+                .label('Success_rate'),
+                Student.name,
+                Teacher.name
+                )
+            .select_from(student_subject_scores)
+            .join(Subject, Subject.id == student_subject_scores.subject_id)
+            .join(Student, Student.id == student_subject_scores.student_id)
+            .join(Teacher)
+            .where(student_subject_scores.student_id == STUDENT_ID, Teacher.id == TEACHER_ID)
+            .group_by(Student.id, Teacher.id)
+            ),
+        }
+
+
+SUMMARY_STATEMENTS = summary_statements()
+
+
+REPORTS = {report.name: report for report in (
+    Report(
+        'select_1',
+        'Знайти 5 студентів із найбільшим середнім балом з усіх предметів.',
+        SUMMARY_STATEMENTS['select_1'],
+        ),
+    Report(
+        'select_2',
+        'Знайти студента із найвищим середнім балом з певного предмета.',
+        SUMMARY_STATEMENTS['select_2'],
+        {'subject_id': 2},
+        ),
+    Report(
+        'select_3',
+        'Знайти середній бал у групах з певного предмета.',
+        SUMMARY_STATEMENTS['select_3'],
+        {'subject_id': 2},
+        ),
+    Report(
+        'select_4',
+        'Знайти середній бал на потоці (по всій таблиці оцінок).',
+        select(func.round(func.avg(Assessment.value_), 3).label('Whole_success_rate')).select_from(Assessment),
+        ),
+    Report(
+        'select_5',
+        'Знайти які курси читає певний викладач.',
+        select(
             Teacher.id,
             Teacher.name,
             Subject.subject
             )
         .select_from(Subject)
         .join(Teacher)
-        .filter(Teacher.id == 5)
-        .all()
-        )
-
-    return result
-
-
-def select_6():
-    """Знайти список студентів у певній групі."""
-    result = (
-        session.query(
+        .where(Teacher.id == TEACHER_ID),
+        {'teacher_id': 5},
+        ),
+    Report(
+        'select_6',
+        'Знайти список студентів у певній групі.',
+        select(
             Student.id,
-            Student.name, 
+            Student.name,
             Group.group_name
             )
         .select_from(Student)
         .join(Group)
-        .filter(Group.id == 2)
-        .all()
-        )
-
-    return result
-
-
-def select_7():
-    """Знайти оцінки студентів у окремій групі з певного предмета."""
-    result = (
-        session.query(
+        .where(Group.id == GROUP_ID),
+        {'group_id': 2},
+        ),
+    Report(
+        'select_7',
+        'Знайти оцінки студентів у окремій групі з певного предмета.',
+        select(
             Assessment.value_,
-            Student.name, 
+            Student.name,
             Group.group_name,
             Subject.subject
             )
@@ -136,165 +260,351 @@ def select_7():
         .join(Student)
         .join(Group)
         .join(Subject)
-        .filter(Subject.id == 4, Group.id == 3)
-        .order_by(Student.id)  # not important / doesn't matter
-        .all()
-        )
-
-    return result
-
-
-def select_8():
-    """Знайти середній бал, який ставить певний викладач зі своїх предметів."""
-    result = (
-        session.query(
-            func.round(func.avg(Assessment.value_), 1).label('Success_rate'),
-            Teacher.name
-            )
-        .select_from(Assessment)
-        .join(Subject)
-        .join(Teacher)
-        .filter(Teacher.id == 3)
-        .group_by(Teacher.id)
-        .all()
-        )
-
-    return result
-
-
-def select_9():
-    """Знайти список курсів, які відвідує певний студент."""
-    result = (
-        session.query(
+        .where(Subject.id == SUBJECT_ID, Group.id == GROUP_ID)
+        .order_by(Student.id),
+        {'subject_id': 4, 'group_id': 3},
+        ),
+    Report(
+        'select_8',
+        'Знайти середній бал, який ставить певний викладач зі своїх предметів.',
+        SUMMARY_STATEMENTS['select_8'],
+        {'teacher_id': 3},
+        ),
+    Report(
+        'select_9',
+        'Знайти список курсів, які відвідує певний студент.',
+        select(
             Student.id,
-            Student.name, 
+            Student.name,
             Subject.subject
             )
         .select_from(Assessment)
         .join(Subject)
         .join(Student)
-        .filter(Student.id == 9)
-        .group_by(Subject.subject, Student.id)
-        .all()
-        )
-
-    return result
-
-
-def select_10():
-    """Список курсів, які певному студенту читає певний викладач."""
-    result = (
-        session.query(
+        .where(Student.id == STUDENT_ID)
+        .group_by(Subject.subject, Student.id),
+        {'student_id': 9},
+        ),
+    Report(
+        'select_10',
+        'Список курсів, які певному студенту читає певний викладач.',
+        select(
             Subject.id,
             Subject.subject,
-            Student.name, 
+            Student.name,
             Teacher.name
             )
         .select_from(Assessment)
         .join(Subject)
         .join(Student)
         .join(Teacher)
-        .filter(Student.id == 8, Teacher.id == 2)
-        .group_by(Subject.id, Student.id, Teacher.id)
-        .all()
+        .where(Student.id == STUDENT_ID, Teacher.id == TEACHER_ID)
+        .group_by(Subject.id, Student.id, Teacher.id),
+        {'student_id': 8, 'teacher_id': 2},
+        ),
+    Report(
+        'select_11',
+        'Середній бал, який певний викладач ставить певному студентові.',
+        SUMMARY_STATEMENTS['select_11'],
+        {'student_id': 9, 'teacher_id': 3},
+        ),
+    Report(
+        'select_12',
+        'Оцінки студентів у певній групі з певного предмета з останнього заняття.',
+        last_lesson_assessments(LAST_LESSON_DATE),
+        {'group_id': 3, 'subject_id': 2},
+        lambda session_, params: {'last_lesson_date': session_.scalar(LAST_LESSON, params)},
+        ),
+    Report(
+        'select_13',
+        'Оцінки студентів у певній групі з певного предмета з останнього заняття [alternative].',
+        last_lesson_assessments(LAST_LESSON.scalar_subquery()),
+        {'group_id': 3, 'subject_id': 2},
+        ),
+    Report(
+        'select_14',
+        'Оцінки студентів у певній групі з певного предмета з останнього заняття [window function].',
+        latest_lesson_assessments(Student.group_id == GROUP_ID, Assessment.subject_id == SUBJECT_ID),
+        {'group_id': 3, 'subject_id': 2},
+        ),
+    Report(
+        'select_15',
+        'Оцінки студентів з останнього заняття кожної групи з кожного предмета [window function].',
+        latest_lesson_assessments(),
+        ),
+    )}
+
+
+def report_params(report: Report, params: dict) -> dict:
+    """params of report completed with its defaults (TypeError for a parameter it does not have)."""
+    unknown = params.keys() - report.defaults.keys()
+    if unknown:
+        raise TypeError(f'Report {report.name} has no parameter(s): {", ".join(sorted(unknown))}.')
+
+    return {**report.defaults, **params}
+
+
+def bind_report(report: Report, session_: Session, params: dict) -> dict:
+    """report_params and the values that report.prepare reads from the database."""
+    params = report_params(report, params)
+    if report.prepare is not None:
+        params.update(report.prepare(session_, params))
+
+    return params
+
+
+def execute_report(report: Report, session_: Session = session, **params) -> list[Row]:
+    """Execute the prebuilt statement of report with params (missing ones - the report's defaults)."""
+    return session_.execute(report.statement, bind_report(report, session_, params)).all()
+
+
+def run_report(name: str, session_: Session = session, **params) -> list[Row]:
+    """Execute the prebuilt statement of report `name` with params (missing ones - the report's defaults)."""
+    return execute_report(REPORTS[name], session_, **params)
+
+
+# Set-based variants of the per-id reports: one query for all keys (or a list of ids) instead of one per id.
+KEY_IDS = bindparam('ids', expanding=True)
+
+
+@dataclass(frozen=True)
+class BulkReport:
+    """Rows of per-id report `name` for many ids: a row starts with its key (a column per parameter),
+    the columns of the per-id report follow (or are the row itself when they start with the key)."""
+    name: str
+    build: Callable[..., Select]  # (*criteria) -> the grouped or windowed statement
+    key: Any  # the id column that the ids filter
+    parameters: tuple[str, ...]  # the parameters of the per-id report that the key columns answer
+    many: bool = False  # several rows per key (a list) or one (a Row)
+
+    @cached_property
+    def statement(self) -> Select:
+        return self.build()
+
+    @cached_property
+    def statement_by_ids(self) -> Select:
+        return self.build(self.key.in_(KEY_IDS))
+
+
+def best_students(*criteria) -> Select:
+    """select_2 for every subject: the best average of a subject (grouped on the subject_id, average index),
+    then its student (the lowest id among equal ones)."""
+    best = (
+        select(StudentSubjectScore.subject_id, func.max(StudentSubjectScore.average).label('average'))
+        .where(*criteria)
+        .group_by(StudentSubjectScore.subject_id)
+        .subquery('best')
+        )
+    winners = (
+        select(best.c.subject_id, func.min(StudentSubjectScore.student_id).label('student_id'), best.c.average)
+        .join(StudentSubjectScore, and_(
+            StudentSubjectScore.subject_id == best.c.subject_id,
+            StudentSubjectScore.average == best.c.average,
+            ))
+        .group_by(best.c.subject_id, best.c.average)
+        .subquery('winners')
         )
 
-    return result
+    return (
+        select(
+            winners.c.subject_id,
+            Student.id.label('ID'),
+            Student.name,
+            func.round(winners.c.average, 1).label('Success_rate'),
+            Subject.subject
+            )
+        .select_from(winners)
+        .join(Student, Student.id == winners.c.student_id)
+        .join(Subject, Subject.id == winners.c.subject_id)
+        .order_by(winners.c.subject_id)
+        )
 
 
-def select_11():
-    """Середній бал, який певний викладач ставить певному студентові.
-        Якщо не викладає някий предмет групі студента то []."""
-    result = (
-        session.query(
-            func.round(func.avg(Assessment.value_), 1).label('Success_rate'),
-            Student.name, 
-            Teacher.name
+def teachers_courses(*criteria) -> Select:
+    """select_5 for every teacher: its rows start with the key (Teacher.id) already."""
+    return (
+        select(
+            Teacher.id,
+            Teacher.name,
+            Subject.subject
             )
-        .select_from(Assessment)
-        .join(Subject)
-        .join(Student)
+        .select_from(Subject)
         .join(Teacher)
-        .filter(Student.id == 9, Teacher.id == 3)
-        .group_by(Student.id, Teacher.id)
-        .all()
+        .where(*criteria)
+        .order_by(Teacher.id, Subject.id)
         )
 
-    return result
-
 
-def select_12():
-    """Оцінки студентів у певній групі з певного предмета 
-    з останнього заняття (учбового року, а не для кожного студента)."""
-    sub_query = (
-        session.query(
-            Assessment.date_of
+def teachers_averages(*criteria) -> Select:
+    """select_8 for every teacher."""
+    return (
+        select(
+            TeacherScore.teacher_id,
+            func.round(TeacherScore.average, 1).label('Success_rate'),
+            Teacher.name
             )
-        .select_from(Assessment)
-        .join(Student)
-        .join(Group)
-        .filter(Group.id == 3, Assessment.subject_id == 2)
-        .order_by(desc(Assessment.date_of))
-        .limit(1)
-        .all()  # виконання всього запиту
+        .select_from(TeacherScore)
+        .join(Teacher, Teacher.id == TeacherScore.teacher_id)
+        .where(*criteria)
+        .order_by(TeacherScore.teacher_id)
         )
-    print(f'\n\n\t\t{sub_query}\n\n')
-    result = (
-        session.query(
-            Assessment.value_,
-            Student.name, 
-            Group.group_name,
-            Subject.subject,
-            Assessment.date_of
+
+
+def teachers_students_averages(*criteria) -> Select:
+    """select_11 for every (teacher, student) pair."""
+    return (
+        select(
+            Teacher.id.label('teacher_id'),
+            Student.id.label('student_id'),
+            func.round(func.sum(StudentSubjectScore.total) / func.sum(StudentSubjectScore.count_), 1)
+            .label('Success_rate'),
+            Student.name,
+            Teacher.name
             )
-        .select_from(Assessment)
-        .join(Subject)
-        .join(Student)
-        .join(Group)
-        .filter(Group.id == 3, Subject.id == 2, Assessment.date_of == sub_query[0][0])
-        .group_by(Student.id, Group.id, Subject.id, Assessment.date_of, Assessment.id)
-        .order_by(Student.id, desc(Assessment.date_of))
-        .all()  # виконання всього запиту
+        .select_from(StudentSubjectScore)
+        .join(Subject, Subject.id == StudentSubjectScore.subject_id)
+        .join(Student, Student.id == StudentSubjectScore.student_id)
+        .join(Teacher)
+        .where(*criteria)
+        .group_by(Teacher.id, Student.id)
+        .order_by(Teacher.id, Student.id)
         )
 
-    return result
+
+BULK_REPORTS = {bulk.name: bulk for bulk in (
+    BulkReport('select_2', best_students, StudentSubjectScore.subject_id, ('subject_id',)),
+    BulkReport('select_5', teachers_courses, Teacher.id, ('teacher_id',), many=True),
+    BulkReport('select_8', teachers_averages, TeacherScore.teacher_id, ('teacher_id',)),
+    BulkReport('select_11', teachers_students_averages, Teacher.id, ('teacher_id', 'student_id')),  # ids: teachers
+    )}
+
+
+def run_bulk_report(name: str, ids: Optional[Iterable[int]] = None, session_: Session = session) -> dict:
+    """Per-id report `name` for all keys (or for ids) in one query: key -> Row (a list of rows if many).
+    A requested id without rows maps to None ([] if many), as the per-id report would return nothing."""
+    bulk = BULK_REPORTS[name]
+    if ids is None:
+        rows = session_.execute(bulk.statement).all()
+
+    else:
+        ids = list(ids)
+        rows = session_.execute(bulk.statement_by_ids, {'ids': ids}).all()
+
+    results = {}
+    for row in rows:
+        key = row[0] if len(bulk.parameters) == 1 else tuple(row[:len(bulk.parameters)])
+        if bulk.many:
+            results.setdefault(key, []).append(row)
+
+        else:
+            results[key] = row
+
+    if ids is not None and len(bulk.parameters) == 1:
+        for id_ in ids:
+            results.setdefault(id_, [] if bulk.many else None)
+
+    return results
+
+
+def select_1(**params):
+    """Знайти 5 студентів із найбільшим середнім балом з усіх предметів."""
+    return run_report('select_1', **params)
+
+
+def select_2(**params):
+    """Знайти студента із найвищим середнім балом з певного предмета."""
+    return run_report('select_2', **params)
+
+
+def select_3(**params):
+    """Знайти середній бал у групах з певного предмета."""
+    return run_report('select_3', **params)
+
+
+def select_4(**params):
+    """Знайти середній бал на потоці (по всій таблиці оцінок)."""
+    return run_report('select_4', **params)
 
 
-def select_13():
+def select_5(**params):
+    """Знайти які курси читає певний викладач."""
+    return run_report('select_5', **params)
+
+
+def select_6(**params):
+    """Знайти список студентів у певній групі."""
+    return run_report('select_6', **params)
+
+
+def select_7(**params):
+    """Знайти оцінки студентів у окремій групі з певного предмета."""
+    return run_report('select_7', **params)
+
+
+def select_8(**params):
+    """Знайти середній бал, який ставить певний викладач зі своїх предметів."""
+    return run_report('select_8', **params)
+
+
+def select_9(**params):
+    """Знайти список курсів, які відвідує певний студент."""
+    return run_report('select_9', **params)
+
+
+def select_10(**params):
+    """Список курсів, які певному студенту читає певний викладач."""
+    return run_report('select_10', **params)
+
+
+def select_11(**params):
+    """Середній бал, який певний викладач ставить певному студентові.
+        Якщо не викладає някий предмет групі студента то []."""
+    return run_report('select_11', **params)
+
+
+def select_12(**params):
+    """Оцінки студентів у певній групі з певного предмета 
+    з останнього заняття (учбового року, а не для кожного студента)."""
+    return run_report('select_12', **params)
+
+
+def select_13(**params):
     """Оцінки студентів у певній групі з певного предмета 
     з останнього заняття (учбового року, а не для кожного студента).[alternative]."""
-    sub_query = (
-        session.query(
-            Assessment.date_of
-            )
-        .select_from(Assessment)
-        .join(Student)
-        .join(Group)
-        .filter(Group.id == 3, Assessment.subject_id == 2)
-        .order_by(desc(Assessment.date_of))
-        .limit(1)
-        # .all()  # виконання всього запиту
-        )
-    print(f'\n\n\t\t{sub_query}\n\n')
-    result = (
-        session.query(
-            Assessment.value_,
-            Student.name, 
-            Group.group_name,
-            Subject.subject,
-            Assessment.date_of
-            )
-        .select_from(Assessment)
-        .join(Subject)
-        .join(Student)
-        .join(Group)
-        .filter(Group.id == 3, Subject.id == 2, Assessment.date_of == sub_query)
-        .group_by(Student.id, Group.id, Subject.id, Assessment.date_of, Assessment.id)
-        .order_by(Student.id, desc(Assessment.date_of))
-        .all()  # виконання всього запиту
-        )
+    return run_report('select_13', **params)
 
-    return result
+
+def select_14(**params):
+    """Оцінки студентів у певній групі з певного предмета
+    з останнього заняття, за один прохід (віконна функція)."""
+    return run_report('select_14', **params)
+
+
+def select_15(**params):
+    """Оцінки студентів з останнього заняття кожної групи з кожного предмета,
+    за один прохід (віконна функція)."""
+    return run_report('select_15', **params)
+
+
+def select_2_bulk(ids=None):
+    """Студент із найвищим середнім балом з кожного предмета (або з предметів ids): {subject_id: row}."""
+    return run_bulk_report('select_2', ids)
+
+
+def select_5_bulk(ids=None):
+    """Курси кожного викладача (або викладачів ids): {teacher_id: [rows]}."""
+    return run_bulk_report('select_5', ids)
+
+
+def select_8_bulk(ids=None):
+    """Середній бал кожного викладача (або викладачів ids): {teacher_id: row}."""
+    return run_bulk_report('select_8', ids)
+
+
+def select_11_bulk(ids=None):
+    """Середній бал, який кожен викладач (або викладачі ids) ставить кожному студентові:
+    {(teacher_id, student_id): row}."""
+    return run_bulk_report('select_11', ids)
 
 
 '''
@@ -328,7 +638,7 @@ def selections():
     """Execute many SELECT-ions from all select_№ functions
         and print results."""
     [pprint(globals()[f'select_{i}']()) 
-        for i in range(1, 14) if not print(f'''\n\n{globals()[f'select_{i}'].__doc__[:-1]}:\n''')]
+        for i in range(1, 16) if not print(f'''\n\n{globals()[f'select_{i}'].__doc__[:-1]}:\n''')]
 
 
 if __name__ == '__main__':
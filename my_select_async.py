@@ -0,0 +1,79 @@
+import asyncio
+from pprint import pprint
+from typing import (
+    Iterable,
+    Optional,
+    )
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import (
+    async_sessionmaker,
+    AsyncSession,
+    )
+
+from database.connect_to_db_async import async_session
+from my_select import (
+    REPORTS,
+    report_params,
+    )
+
+
+CONCURRENCY = 100  # reports in flight at most (the others wait for a slot - a coroutine, not a thread)
+
+
+async def run_report(name: str, session_: AsyncSession, **params) -> list[Row]:
+    """my_select.run_report for an AsyncSession: the same prebuilt statement, awaited."""
+    report = REPORTS[name]
+    params = report_params(report, params)
+    if report.prepare is not None:
+        params.update(await session_.run_sync(report.prepare, params))
+
+    return (await session_.execute(report.statement, params)).all()
+
+
+async def session_report(
+        name: str,
+        params: dict,
+        session_factory: async_sessionmaker[AsyncSession],
+        limit: asyncio.Semaphore,
+        ) -> list[Row]:
+    async with limit, session_factory() as session_:  # an AsyncSession is not shared by concurrent tasks
+        return await run_report(name, session_, **params)
+
+
+async def gather_queries(
+        calls: Iterable[tuple[str, dict]],
+        session_factory: async_sessionmaker[AsyncSession] = async_session,
+        concurrency: int = CONCURRENCY,
+        ) -> list[list[Row]]:
+    """Fan out (report name, params) calls, e.g. select_2 for every subject; the results in the order of calls."""
+    limit = asyncio.Semaphore(concurrency)
+
+    return list(await asyncio.gather(
+        *(session_report(name, params, session_factory, limit) for name, params in calls)
+        ))
+
+
+async def gather_reports(
+        names: Optional[Iterable[str]] = None,
+        params: Optional[dict[str, dict]] = None,
+        session_factory: async_sessionmaker[AsyncSession] = async_session,
+        concurrency: int = CONCURRENCY,
+        ) -> dict[str, list[Row]]:
+    """Run the reports (all by default) concurrently; params: report name -> its parameters."""
+    names = list(REPORTS if names is None else names)
+    params = params or {}
+    results = await gather_queries([(name, params.get(name, {})) for name in names], session_factory, concurrency)
+
+    return dict(zip(names, results))
+
+
+async def selections():
+    """Execute all reports at once and print results."""
+    for name, rows in (await gather_reports()).items():
+        print(f'\n\n{REPORTS[name].description}:\n')
+        pprint(rows)
+
+
+if __name__ == '__main__':
+    asyncio.run(selections())
@@ -0,0 +1,128 @@
+import argparse
+from contextlib import contextmanager
+import statistics
+import time
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    )
+
+from sqlalchemy import (
+    Engine,
+    event,
+    select,
+    )
+from sqlalchemy.orm import Session
+
+from database.connect_to_db_postgresql import (
+    engine,
+    session,
+    )
+from database.models import (
+    Assessment,
+    Student,
+    )
+from my_select import (
+    BULK_REPORTS,
+    run_bulk_report,
+    run_report,
+    )
+
+
+ROUNDS = 20
+
+
+@contextmanager
+def counted_statements(engine_: Engine) -> Iterator[list]:
+    """The statements sent to the database while the block runs (one round trip each)."""
+    statements = []
+
+    def count(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine_, 'before_cursor_execute', count)
+    try:
+        yield statements
+
+    finally:
+        event.remove(engine_, 'before_cursor_execute', count)
+
+
+def benchmark(
+        calls: dict[str, Callable[[Session], Any]],
+        rounds: int = ROUNDS,
+        session_: Session = session,
+        engine_: Engine = engine,
+        ) -> dict[str, dict[str, float]]:
+    """Median seconds and round trips of every call (after a warm-up call that compiles the statements)."""
+    results = {}
+    for label, call in calls.items():
+        call(session_)
+        with counted_statements(engine_) as statements:
+            call(session_)
+
+        durations = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            call(session_)
+            durations.append(time.perf_counter() - started)
+
+        session_.rollback()
+        results[label] = {'seconds': statistics.median(durations), 'round_trips': len(statements)}
+
+    return results
+
+
+def group_subject_pairs(session_: Session = session) -> list[tuple[int, int]]:
+    return session_.execute(
+        select(Student.group_id, Assessment.subject_id).join(Student).distinct()
+        .where(Student.group_id.isnot(None), Assessment.subject_id.isnot(None))
+        .order_by(Student.group_id, Assessment.subject_id)
+        ).all()
+
+
+def last_lesson_calls(session_: Session = session) -> dict[str, Callable[[Session], Any]]:
+    """The last-lesson reports: for one (group, subject) pair and for every pair."""
+    pairs = group_subject_pairs(session_)
+
+    def every_pair(name: str) -> Callable[[Session], Any]:
+        return lambda session__: [
+            run_report(name, session__, group_id=group_id, subject_id=subject_id) for group_id, subject_id in pairs
+            ]
+
+    return {
+        'select_12 - the date, then the grades': lambda session__: run_report('select_12', session__),
+        'select_13 - the date as a subquery': lambda session__: run_report('select_13', session__),
+        'select_14 - window function': lambda session__: run_report('select_14', session__),
+        f'select_12 x {len(pairs)} pairs': every_pair('select_12'),
+        f'select_13 x {len(pairs)} pairs': every_pair('select_13'),
+        'select_15 - window function, every pair': lambda session__: run_report('select_15', session__),
+        }
+
+
+def bulk_calls(session_: Session = session) -> dict[str, Callable[[Session], Any]]:
+    """Every bulk report against its per-id report called once per key (the N+1 of a dashboard)."""
+    calls = {}
+    for name, bulk in BULK_REPORTS.items():
+        keys = [key if isinstance(key, tuple) else (key,) for key in run_bulk_report(name, session_=session_)]
+
+        def loop(session__: Session, name=name, keys=keys, parameters=bulk.parameters):
+            return {key: run_report(name, session__, **dict(zip(parameters, key))) for key in keys}
+
+        calls[f'{name} x {len(keys)} keys'] = loop
+        calls[f'{name} bulk'] = lambda session__, name=name: run_bulk_report(name, session_=session__)
+
+    return calls
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark the last-lesson reports (select_12 - select_15) or the bulk variants of the reports.'
+        )
+    parser.add_argument('-r', '--rounds', type=int, default=ROUNDS, help=f'runs of each report (default {ROUNDS})')
+    parser.add_argument('--bulk', action='store_true', help='the per-id reports in a loop against their bulk variants')
+    args = parser.parse_args()
+
+    for call_label, measured in benchmark((bulk_calls if args.bulk else last_lesson_calls)(), args.rounds).items():
+        print(f'{call_label:<45} {measured["seconds"] * 1000:>10.3f} ms {measured["round_trips"]:>6} round trip(s)')
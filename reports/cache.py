@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import chain
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import (
+    Engine,
+    event,
+    )
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import (
+    ORMExecuteState,
+    Session,
+    )
+from sqlalchemy.sql.util import find_tables
+
+from database.connect_to_db_postgresql import (
+    engine,
+    session,
+    )
+from database.summaries import SOURCE_TABLES
+from database.versions import (  # noqa: F401 - reports.cache.VERSIONED_TABLES of reports.views
+    install_versions,
+    TableVersions,
+    VERSIONED_TABLES,
+    )
+from my_select import (
+    REPORTS,
+    run_report,
+    )
+
+
+MAX_ENTRIES = 1_024  # results kept, the least recently used ones are dropped first
+TTL = 300.0  # seconds a result may be served at most, even without any change signal
+POLL_INTERVAL = 0.0  # seconds between reads of the table versions (0 - on every lookup: exact across processes)
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+# Versions of the tables changed by commits of this process (ORM sessions), without a round trip:
+local_versions = dict.fromkeys(VERSIONED_TABLES, 0)
+local_versions_lock = threading.Lock()
+
+
+def install_version_triggers(engine_: Engine = engine) -> None:
+    """Install what database.versions reads the versions of the tables from."""
+    install_versions(engine_)
+
+
+def changed_tables(session_: Session) -> set:
+    return session_.info.setdefault('changed_tables', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def remember_flushed_tables(session_: Session, flush_context) -> None:
+    """Tables of the objects the flush wrote (they are still in new/dirty/deleted at this point)."""
+    changed_tables(session_).update(
+        instance.__table__.name for instance in chain(session_.new, session_.dirty, session_.deleted)
+        )
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def remember_executed_tables(state: ORMExecuteState) -> None:
+    """Tables of bulk INSERT/UPDATE/DELETE statements executed through a session (no flush for them)."""
+    if state.is_insert or state.is_update or state.is_delete:
+        changed_tables(state.session).add(state.statement.table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def bump_committed_tables(session_: Session) -> None:
+    with local_versions_lock:
+        for table in changed_tables(session_).intersection(local_versions):
+            local_versions[table] += 1
+
+    changed_tables(session_).clear()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def forget_rolled_back_tables(session_: Session, previous_transaction) -> None:
+    changed_tables(session_).clear()
+
+
+@lru_cache(maxsize=None)
+def report_tables(name: str) -> tuple[str, ...]:
+    """Raw tables read by report `name`, directly or through summary tables (stale as soon as one changes)."""
+    tables = {table.name for table in find_tables(REPORTS[name].statement, include_joins=False)}
+
+    return tuple(sorted(set(chain.from_iterable(SOURCE_TABLES.get(table, (table,)) for table in tables))))
+
+
+class ReportCache:
+    """LRU/TTL cache of my_select report results, keyed by report name and parameters.
+
+    An entry remembers the versions of the tables its report reads; it is dropped when a commit of
+    this process changes one of them or when database.versions shows a commit of another process
+    (a lookup after that commit finished sees it)."""
+
+    def __init__(
+            self,
+            max_entries: int = MAX_ENTRIES,
+            ttl: float = TTL,
+            poll_interval: float = POLL_INTERVAL,
+            engine_: Engine = engine,
+            ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.engine = engine_
+        self.entries = OrderedDict()  # key -> (expires at, table versions, rows)
+        self.lock = threading.Lock()
+        self.table_versions = TableVersions(engine_)
+        self.database_versions = {}
+        self.polled_at = None
+        self.polling = True  # False when the table versions are not installed
+        self.hits = self.misses = 0
+
+    def poll_database_versions(self) -> dict[str, int]:
+        if not self.polling:
+            return {}
+
+        now = time.monotonic()
+        if self.polled_at is None or now - self.polled_at >= self.poll_interval:
+            try:
+                self.database_versions = self.table_versions.read()
+
+            except (SQLAlchemyError, LookupError) as error:
+                logging.warning(f'\t\t\tNo table versions, only commits of this process invalidate, error:\n{error}')
+                self.polling = False
+                self.database_versions = {}
+
+            self.polled_at = now
+
+        return self.database_versions
+
+    def versions(self, tables: tuple[str, ...]) -> tuple:
+        database_versions = self.poll_database_versions()
+        with local_versions_lock:
+            return tuple((local_versions.get(table), database_versions.get(table)) for table in tables)
+
+    def run(self, name: str, session_: Session = session, **params) -> list[Row]:
+        """Cached result of my_select.run_report(name, session_, **params)."""
+        key = (name, tuple(sorted({**REPORTS[name].defaults, **params}.items())))
+        versions = self.versions(report_tables(name))  # read before the query: a write during it stays visible
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now and entry[1] == versions:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+            self.misses += 1
+
+        rows = run_report(name, session_, **params)
+        with self.lock:
+            self.entries[key] = (now + self.ttl, versions, rows)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return rows
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+report_cache = ReportCache()
+
+
+def cached_report(name: str, session_: Session = session, **params) -> list[Row]:
+    """my_select report through the shared cache of this process."""
+    return report_cache.run(name, session_, **params)
@@ -0,0 +1,428 @@
+import argparse
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import (
+    Callable,
+    Optional,
+    )
+
+import numpy as np
+from sqlalchemy import (
+    Connection,
+    Engine,
+    func,
+    select,
+    )
+
+from database.connect_to_db_postgresql import engine
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    Teacher,
+    )
+from my_select import (
+    REPORTS,
+    report_params,
+    )
+
+
+LOAD_CHUNK = 50_000  # rows fetched (server-side cursor) and converted to arrays at a time
+# rows created this long before the watermark are read again: late commits, second-precision timestamps (SQLite)
+WATERMARK_OVERLAP = np.timedelta64(1, 's')
+NO_VALUE = -1  # value of an assessment without a grade (value_ IS NULL) in the int8 column
+MISSING = 0  # id of a NULL foreign key or of a row that does not exist (the ids of the tables start at 1)
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def by_id(rows: list[tuple], dtype, fill) -> np.ndarray:
+    """Array of the values of rows (id, value) at the index of their id, fill for the ids without a row."""
+    size = max((row[0] for row in rows), default=MISSING) + 1
+    array = np.full(size, fill, dtype=dtype)
+    if rows:
+        ids, values = zip(*rows)
+        array[np.array(ids)] = np.array(values, dtype=dtype) if dtype is not object else values
+
+    return array
+
+
+def at(array: np.ndarray, ids: np.ndarray, fill):
+    """array[ids] for ids that may be beyond it (rows created after it was loaded)."""
+    inside = ids < len(array)
+    return np.where(inside, array[np.where(inside, ids, MISSING)], fill)
+
+
+def round_half_up(values, digits: int):
+    """ROUND of SQL (halves away from zero, grades are positive); Python and NumPy round halves to even."""
+    scale = 10 ** digits
+    return np.floor(np.asarray(values, dtype=float) * scale + 0.5) / scale
+
+
+@dataclass(frozen=True)
+class Columns:
+    """One immutable copy: a reload builds a new one and swaps it, a report keeps reading the one it started with."""
+    # assessments, in the order of (created_at, id)
+    id: np.ndarray  # int32
+    value: np.ndarray  # int8, NO_VALUE without a grade
+    date: np.ndarray  # datetime64[D]
+    student: np.ndarray  # int32, MISSING for NULL
+    subject: np.ndarray  # int32, MISSING for NULL
+    created_at: np.ndarray  # datetime64[us]
+    # the small tables, indexed by id
+    student_name: np.ndarray  # object, None - no such student
+    student_group: np.ndarray  # int32
+    group_name: np.ndarray  # object
+    subject_name: np.ndarray  # object
+    subject_teacher: np.ndarray  # int32
+    teacher_name: np.ndarray  # object
+    # the joins of every assessment: assessments -> students -> groups_, assessments -> subjects -> teachers
+    group: np.ndarray  # int32
+    teacher: np.ndarray  # int32
+    student_ok: np.ndarray  # bool: the inner joins find the row
+    group_ok: np.ndarray
+    subject_ok: np.ndarray
+    teacher_ok: np.ndarray
+    graded: np.ndarray  # bool: value_ IS NOT NULL
+
+    @classmethod
+    def build(cls, assessments: dict[str, np.ndarray], tables: dict[str, np.ndarray]) -> 'Columns':
+        return cls(**assessments, **tables, **joins(assessments, tables))
+
+    def watermark(self) -> Optional[np.datetime64]:
+        return self.created_at.max() if len(self.created_at) else None
+
+    def assessments(self) -> dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in ASSESSMENT_COLUMNS}
+
+
+ASSESSMENT_COLUMNS = ('id', 'value', 'date', 'student', 'subject', 'created_at')
+JOIN_COLUMNS = ('group', 'teacher', 'student_ok', 'group_ok', 'subject_ok', 'teacher_ok', 'graded')
+JOIN_TABLES = ('student_group', 'subject_teacher')  # with the existence of the rows: what the JOIN_COLUMNS depend on
+
+
+def joins(assessments: dict[str, np.ndarray], tables: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """The JOIN_COLUMNS of the assessments: the inner joins resolved against the small tables."""
+    student, subject = assessments['student'], assessments['subject']
+    group = at(tables['student_group'], student, MISSING)
+    teacher = at(tables['subject_teacher'], subject, MISSING)
+
+    return {
+        'group': group,
+        'teacher': teacher,
+        'student_ok': at(tables['student_name'], student, None) != None,  # noqa: E711 - elementwise
+        'group_ok': at(tables['group_name'], group, None) != None,  # noqa: E711
+        'subject_ok': at(tables['subject_name'], subject, None) != None,  # noqa: E711
+        'teacher_ok': at(tables['teacher_name'], teacher, None) != None,  # noqa: E711
+        'graded': assessments['value'] != NO_VALUE,
+        }
+
+
+def fetch_assessments(connection: Connection, since: Optional[np.datetime64] = None) -> dict[str, np.ndarray]:
+    """The assessments (created at since or later) as arrays, converted LOAD_CHUNK rows at a time."""
+    query = select(
+        Assessment.id,
+        Assessment.value_,
+        Assessment.date_of,
+        Assessment.student_id,
+        Assessment.subject_id,
+        Assessment.created_at,
+        ).order_by(Assessment.created_at, Assessment.id)
+    if since is not None:
+        query = query.where(Assessment.created_at >= since.astype('datetime64[us]').item())
+
+    parts = []
+    for partition in connection.execution_options(yield_per=LOAD_CHUNK).execute(query).partitions():
+        ids, values, dates, students, subjects, created = zip(*partition)
+        parts.append({
+            'id': np.array(ids, dtype=np.int32),
+            'value': np.array([NO_VALUE if value is None else int(value) for value in values], dtype=np.int8),
+            'date': np.array(dates, dtype='datetime64[D]'),
+            'student': np.array([id_ or MISSING for id_ in students], dtype=np.int32),
+            'subject': np.array([id_ or MISSING for id_ in subjects], dtype=np.int32),
+            'created_at': np.array(created, dtype='datetime64[us]'),
+            })
+
+    return concatenate(parts)
+
+
+EMPTY = {  # the ASSESSMENT_COLUMNS
+    'id': np.empty(0, dtype=np.int32),
+    'value': np.empty(0, dtype=np.int8),
+    'date': np.empty(0, dtype='datetime64[D]'),
+    'student': np.empty(0, dtype=np.int32),
+    'subject': np.empty(0, dtype=np.int32),
+    'created_at': np.empty(0, dtype='datetime64[us]'),
+    }
+
+
+def concatenate(parts: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+    return {name: np.concatenate([empty] + [part[name] for part in parts]) for name, empty in EMPTY.items()}
+
+
+def select_rows(columns: dict[str, np.ndarray], mask: np.ndarray) -> dict[str, np.ndarray]:
+    return {name: array[mask] for name, array in columns.items()}
+
+
+def fetch_new(
+        connection: Connection,
+        ids: np.ndarray,
+        created_at: np.ndarray,
+        watermark: Optional[np.datetime64],
+        ) -> Optional[dict[str, np.ndarray]]:
+    """The assessments that a copy (ids and created_at of its rows, the newest created_at) does not have yet.
+    None when the count of the table shows rows that the watermark cannot find (deleted ones, or created more than
+    WATERMARK_OVERLAP before it): the copy needs a full load."""
+    if watermark is None:
+        return None
+
+    since = watermark - WATERMARK_OVERLAP
+    new = fetch_assessments(connection, since)
+    new = select_rows(new, ~np.isin(new['id'], ids[created_at >= since]))  # read by the previous load already
+    total = connection.scalar(select(func.count()).select_from(Assessment))
+    if len(ids) + len(new['id']) != total:
+        logging.info(f'\t\t\tColumnar copy: {len(ids) + len(new["id"])} rows, the table: {total}, full load.')
+        return None
+
+    return new
+
+
+def fetch_tables(connection: Connection) -> dict[str, np.ndarray]:
+    """students, groups_, subjects and teachers (small: read whole on every load, the joins stay current)."""
+    students = connection.execute(select(Student.id, Student.name, Student.group_id)).all()
+    subjects = connection.execute(select(Subject.id, Subject.subject, Subject.teacher_id)).all()
+
+    return {
+        'student_name': by_id([(id_, name) for id_, name, _ in students], object, None),
+        'student_group': by_id([(id_, group_id or MISSING) for id_, _, group_id in students], np.int32, MISSING),
+        'group_name': by_id(connection.execute(select(Group.id, Group.group_name)).all(), object, None),
+        'subject_name': by_id([(id_, subject) for id_, subject, _ in subjects], object, None),
+        'subject_teacher': by_id([(id_, teacher_id or MISSING) for id_, _, teacher_id in subjects], np.int32, MISSING),
+        'teacher_name': by_id(connection.execute(select(Teacher.id, Teacher.name)).all(), object, None),
+        }
+
+
+def sums_counts(keys: np.ndarray, values: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.bincount(keys, weights=values, minlength=size), np.bincount(keys, minlength=size)
+
+
+def averages(keys: np.ndarray, values: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Keys that have values and their averages."""
+    sums, counts = sums_counts(keys, values, size)
+    present = np.flatnonzero(counts)
+
+    return present, sums[present] / counts[present]
+
+
+def grade(value) -> Optional[int]:
+    return None if value == NO_VALUE else int(value)
+
+
+# The reports of my_select over the arrays (the same rows; numbers as int/float instead of Decimal):
+def select_1(c: Columns) -> list[tuple]:
+    rows = c.graded & c.student_ok
+    students, average = averages(c.student[rows], c.value[rows], len(c.student_name))
+    best = np.argsort(-average, kind='stable')[:5]
+
+    return [(int(students[i]), c.student_name[students[i]], float(round_half_up(average[i], 1))) for i in best]
+
+
+def select_2(c: Columns, subject_id: int) -> list[tuple]:
+    rows = c.graded & c.student_ok & c.subject_ok & (c.subject == subject_id)
+    students, average = averages(c.student[rows], c.value[rows], len(c.student_name))
+    if not len(students):
+        return []
+
+    best = np.argmax(average)
+
+    return [(int(students[best]), c.student_name[students[best]], float(round_half_up(average[best], 1)),
+             c.subject_name[subject_id])]
+
+
+def select_3(c: Columns, subject_id: int) -> list[tuple]:
+    rows = c.graded & c.student_ok & c.group_ok & c.subject_ok & (c.subject == subject_id)
+    groups, average = averages(c.group[rows], c.value[rows], len(c.group_name))
+
+    return [(int(group), c.group_name[group], c.subject_name[subject_id], float(value))
+            for group, value in zip(groups, average)]
+
+
+def select_4(c: Columns) -> list[tuple]:
+    values = c.value[c.graded]
+
+    return [(float(round_half_up(values.mean(), 3)) if len(values) else None,)]
+
+
+def select_5(c: Columns, teacher_id: int) -> list[tuple]:
+    if teacher_id >= len(c.teacher_name) or c.teacher_name[teacher_id] is None:
+        return []
+
+    subjects = np.flatnonzero(c.subject_teacher == teacher_id)
+
+    return [(teacher_id, c.teacher_name[teacher_id], c.subject_name[subject]) for subject in subjects]
+
+
+def select_6(c: Columns, group_id: int) -> list[tuple]:
+    if group_id >= len(c.group_name) or c.group_name[group_id] is None:
+        return []
+
+    students = np.flatnonzero((c.student_group == group_id) & (c.student_name != None))  # noqa: E711
+
+    return [(int(student), c.student_name[student], c.group_name[group_id]) for student in students]
+
+
+def ordered(c: Columns, rows: np.ndarray, *keys: np.ndarray) -> np.ndarray:
+    """Indexes of the assessments of mask rows, sorted by keys (the first - the main one) and then by id."""
+    indexes = np.flatnonzero(rows)
+
+    return indexes[np.lexsort((c.id[indexes], *(key[indexes] for key in reversed(keys))))]
+
+
+def select_7(c: Columns, subject_id: int, group_id: int) -> list[tuple]:
+    rows = c.student_ok & c.group_ok & c.subject_ok & (c.subject == subject_id) & (c.group == group_id)
+
+    return [(grade(c.value[i]), c.student_name[c.student[i]], c.group_name[c.group[i]], c.subject_name[c.subject[i]])
+            for i in ordered(c, rows, c.student)]
+
+
+def select_8(c: Columns, teacher_id: int) -> list[tuple]:
+    rows = c.graded & c.subject_ok & c.teacher_ok & (c.teacher == teacher_id)
+    if not rows.any():
+        return []
+
+    return [(float(round_half_up(c.value[rows].mean(), 1)), c.teacher_name[teacher_id])]
+
+
+def select_9(c: Columns, student_id: int) -> list[tuple]:
+    rows = c.student_ok & c.subject_ok & (c.student == student_id)
+    subjects = sorted({c.subject_name[subject] for subject in np.unique(c.subject[rows])})  # GROUP BY the name
+
+    return [(student_id, c.student_name[student_id], subject) for subject in subjects]
+
+
+def select_10(c: Columns, student_id: int, teacher_id: int) -> list[tuple]:
+    rows = c.student_ok & c.subject_ok & c.teacher_ok & (c.student == student_id) & (c.teacher == teacher_id)
+
+    return [(int(subject), c.subject_name[subject], c.student_name[student_id], c.teacher_name[teacher_id])
+            for subject in np.unique(c.subject[rows])]
+
+
+def select_11(c: Columns, student_id: int, teacher_id: int) -> list[tuple]:
+    rows = c.graded & c.student_ok & c.subject_ok & c.teacher_ok & (c.student == student_id) \
+        & (c.teacher == teacher_id)
+    if not rows.any():
+        return []
+
+    return [(float(round_half_up(c.value[rows].mean(), 1)), c.student_name[student_id], c.teacher_name[teacher_id])]
+
+
+def lesson_rows(c: Columns, indexes: np.ndarray) -> list[tuple]:
+    return [(grade(c.value[i]), c.student_name[c.student[i]], c.group_name[c.group[i]], c.subject_name[c.subject[i]],
+             c.date[i].item()) for i in indexes]
+
+
+def select_12(c: Columns, group_id: int, subject_id: int) -> list[tuple]:
+    pair = c.student_ok & c.group_ok & (c.group == group_id) & (c.subject == subject_id)
+    if not pair.any():
+        return []
+
+    rows = pair & c.subject_ok & (c.date == c.date[pair].max())
+
+    return lesson_rows(c, ordered(c, rows, c.student))
+
+
+def select_15(c: Columns) -> list[tuple]:
+    """The last lesson of every (group, subject) pair: the assessments sorted by pair and date, the last date of
+    each pair broadcast back to its rows."""
+    rows = np.flatnonzero(c.student_ok & c.group_ok & c.subject_ok)
+    pairs = c.group[rows].astype(np.int64) * len(c.subject_name) + c.subject[rows]
+    by_pair = np.lexsort((c.date[rows], pairs))
+    pair_sorted = pairs[by_pair]
+    last_of_pair = np.r_[pair_sorted[1:] != pair_sorted[:-1], True]  # the last row of a pair has its last date
+    pair_ids, starts = np.unique(pair_sorted, return_index=True)
+    counts = np.diff(np.r_[starts, len(pair_sorted)])
+    last_dates = np.repeat(c.date[rows][by_pair][last_of_pair], counts)
+    latest = np.zeros(len(c.id), dtype=bool)
+    latest[rows[by_pair][c.date[rows][by_pair] == last_dates]] = True
+
+    return lesson_rows(c, ordered(c, latest, c.group, c.subject, c.student))
+
+
+COLUMNAR_REPORTS: dict[str, Callable[..., list[tuple]]] = {
+    'select_1': select_1,
+    'select_2': select_2,
+    'select_3': select_3,
+    'select_4': select_4,
+    'select_5': select_5,
+    'select_6': select_6,
+    'select_7': select_7,
+    'select_8': select_8,
+    'select_9': select_9,
+    'select_10': select_10,
+    'select_11': select_11,
+    'select_12': select_12,
+    'select_13': select_12,  # the same rows: the SQL of 12 - 14 differs only in how it finds the date
+    'select_14': select_12,
+    'select_15': select_15,
+    }
+
+
+class ColumnarEngine:
+    """In-process columnar copy of the assessments (and the tables they join) that answers the my_select reports
+    without SQL. reload() appends the rows created after the watermark (created_at of the newest row loaded)."""
+
+    def __init__(self, engine_: Engine = engine):
+        self.engine = engine_
+        self.columns: Optional[Columns] = None
+        self.lock = threading.Lock()  # one reload at a time; reports read without it
+
+    def reload(self, full: bool = False) -> int:
+        """Read the new assessments (all of them if full or if fetch_new finds the copy incomplete) and the small
+        tables again. Returns the new rows. Updated grades need full=True."""
+        started = time.monotonic()
+        with self.lock, self.engine.connect() as connection:
+            old = self.columns
+            new = None if full or old is None else fetch_new(connection, old.id, old.created_at, old.watermark())
+            if new is None:
+                assessments, added = fetch_assessments(connection), None
+
+            else:
+                assessments, added = concatenate([old.assessments(), new]), len(new['id'])
+
+            columns = Columns.build(assessments, fetch_tables(connection))
+
+        self.columns = columns
+        logging.info(f'\t\t\tColumnar copy: {len(columns.id)} assessments '
+                     f'({"full load" if added is None else f"{added} new"}) in {time.monotonic() - started:.3f} s.')
+
+        return len(columns.id) if added is None else added
+
+    def run(self, name: str, **params) -> list[tuple]:
+        """Rows of report `name` (the parameters and defaults of my_select) from the copy, loaded on first use."""
+        if self.columns is None:
+            self.reload()
+
+        return COLUMNAR_REPORTS[name](self.columns, **report_params(REPORTS[name], params))
+
+
+columnar_engine = ColumnarEngine()
+
+
+def columnar_report(name: str, **params) -> list[tuple]:
+    """my_select report from the shared columnar copy of this process."""
+    return columnar_engine.run(name, **params)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Answer the my_select reports from an in-memory columnar copy.')
+    parser.add_argument('-r', '--reports', nargs='+', choices=list(COLUMNAR_REPORTS), help='only these reports')
+    args = parser.parse_args()
+
+    columnar_engine.reload()
+    for report_name in args.reports or COLUMNAR_REPORTS:
+        report_started = time.perf_counter()
+        report_rows = columnar_report(report_name)
+        print(f'{report_name} ({(time.perf_counter() - report_started) * 1000:.3f} ms): {report_rows}')
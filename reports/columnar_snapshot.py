@@ -0,0 +1,272 @@
+import argparse
+import json
+import logging
+import os
+import pathlib
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import Engine
+
+from database.connect_to_db_postgresql import engine
+from reports.columnar import (
+    ASSESSMENT_COLUMNS,
+    ColumnarEngine,
+    Columns,
+    COLUMNAR_REPORTS,
+    EMPTY,
+    fetch_assessments,
+    fetch_new,
+    fetch_tables,
+    JOIN_COLUMNS,
+    JOIN_TABLES,
+    joins,
+    MISSING,
+    )
+
+
+SNAPSHOT_DIR = pathlib.Path(__file__).parent.joinpath('columnar')
+MANIFEST = 'manifest.json'
+SNAPSHOT_VERSION = 2  # change when the columns change - a snapshot of another version is written anew
+DTYPES = {
+    **{name: array.dtype.str for name, array in EMPTY.items()},
+    'group': np.dtype(np.int32).str,
+    'teacher': np.dtype(np.int32).str,
+    **{name: np.dtype(bool).str for name in JOIN_COLUMNS if name not in ('group', 'teacher')},
+    }
+NAME_TABLES = ('student_name', 'group_name', 'subject_name', 'teacher_name')  # None - no row with this id
+KEY_TABLES = {name: np.dtype(np.int32).str for name in JOIN_TABLES}
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def read_manifest(directory: pathlib.Path) -> Optional[dict]:
+    """Manifest of the snapshot in directory; None if there is none (or of another version)."""
+    path = directory.joinpath(MANIFEST)
+    if not path.exists():
+        return None
+
+    manifest = json.loads(path.read_text(encoding='utf-8'))
+
+    return manifest if manifest['version'] == SNAPSHOT_VERSION else None
+
+
+def map_column(directory: pathlib.Path, column: dict, rows: int) -> np.ndarray:
+    """The first rows of a column file, memory-mapped read-only: nothing is read before a report touches it, the
+    pages are shared by every process that maps the file. The bytes past rows are an append in progress."""
+    if not rows:  # an empty file cannot be mapped
+        return np.empty(0, dtype=column['dtype'])
+
+    return np.memmap(directory.joinpath(column['file']), dtype=column['dtype'], mode='r', shape=(rows,))
+
+
+def read_names(directory: pathlib.Path, table: dict) -> np.ndarray:
+    """Names of a name table: UTF-8 bytes of all names one after another, the offsets of every name in them and
+    whether there is a row with the id at all."""
+    data = directory.joinpath(table['file']).read_bytes()
+    offsets = np.fromfile(directory.joinpath(table['offsets']), dtype=np.int64).tolist()
+    present = np.flatnonzero(np.fromfile(directory.joinpath(table['present']), dtype=bool))
+    names = np.full(table['rows'], None, dtype=object)
+    names[present] = [data[offsets[id_]:offsets[id_ + 1]].decode('utf-8') for id_ in present]
+
+    return names
+
+
+def read_tables(directory: pathlib.Path, manifest: dict) -> dict[str, np.ndarray]:
+    return {name: read_names(directory, table) if name in NAME_TABLES else map_column(directory, table, table['rows'])
+            for name, table in manifest['tables'].items()}
+
+
+def open_snapshot(directory: pathlib.Path = SNAPSHOT_DIR, manifest: Optional[dict] = None) -> Columns:
+    """The snapshot in directory as Columns (the assessments and the keys memory-mapped, the names decoded)."""
+    manifest = manifest or read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f'No columnar snapshot in {directory}, save_snapshot() writes one.')
+
+    return Columns(
+        **{name: map_column(directory, column, manifest['rows']) for name, column in manifest['columns'].items()},
+        **read_tables(directory, manifest),
+        )
+
+
+def same_joins(old: Columns, tables: dict[str, np.ndarray]) -> bool:
+    """Do the JOIN_COLUMNS of the rows already written stay as they are? Not when a student moved to another
+    group, a subject to another teacher or a row of the small tables was deleted (ids past an array are missing)."""
+    for name in (*JOIN_TABLES, *NAME_TABLES):
+        before, after = getattr(old, name), tables[name]
+        if name in NAME_TABLES:
+            before, after = before != None, after != None  # noqa: E711 - elementwise
+            fill = False
+
+        else:
+            fill = MISSING
+
+        size = max(len(before), len(after))
+        if not np.array_equal(np.pad(before, (0, size - len(before)), constant_values=fill),
+                              np.pad(after, (0, size - len(after)), constant_values=fill)):
+            return False
+
+    return True
+
+
+def write_column(path: pathlib.Path, array: np.ndarray, keep: Optional[int] = None) -> None:
+    """Write array to a new file or append it after the first keep bytes of one (the bytes past them are left by
+    an append that crashed before the manifest was written)."""
+    if keep is None:
+        mode = 'wb'
+
+    else:
+        os.truncate(path, keep)
+        mode = 'ab'
+
+    with open(path, mode) as file:
+        array.tofile(file)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def write_table(directory: pathlib.Path, name: str, array: np.ndarray, generation: int) -> dict:
+    """Write a table (array by id) into files of generation, returns its entry of the manifest."""
+    if name not in NAME_TABLES:
+        table = {'file': f'{name}.{generation}.bin', 'dtype': KEY_TABLES[name], 'rows': len(array)}
+        write_column(directory.joinpath(table['file']), array.astype(table['dtype']))
+        return table
+
+    encoded = [b'' if value is None else value.encode('utf-8') for value in array]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    table = {
+        'file': f'{name}.{generation}.bin',
+        'offsets': f'{name}_offsets.{generation}.bin',
+        'present': f'{name}_present.{generation}.bin',
+        'rows': len(array),
+        }
+    write_column(directory.joinpath(table['file']), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    write_column(directory.joinpath(table['offsets']), offsets)
+    write_column(directory.joinpath(table['present']), array != None)  # noqa: E711 - elementwise
+
+    return table
+
+
+def snapshot_files(manifest: Optional[dict]) -> set[str]:
+    """All files of the snapshot of manifest."""
+    if manifest is None:
+        return set()
+
+    entries = (*manifest['columns'].values(), *manifest['tables'].values())
+
+    return {entry[key] for entry in entries for key in ('file', 'offsets', 'present') if key in entry}
+
+
+def write_manifest(directory: pathlib.Path, manifest: dict) -> None:
+    """Replace the manifest at once: a reader sees the old snapshot or the new one, never a half-written one."""
+    partial = directory.joinpath(f'{MANIFEST}.partial')
+    partial.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(partial, directory.joinpath(MANIFEST))
+
+
+def save_snapshot(directory: pathlib.Path = SNAPSHOT_DIR, engine_: Engine = engine, full: bool = False) -> int:
+    """Write the snapshot of the assessments into directory or bring it up to date. Returns the new rows.
+
+    The new rows (fetch_new: created_at/id watermark) are appended to the column files; the files are written
+    anew for a full snapshot, a snapshot that fetch_new finds incomplete and - only the JOIN_COLUMNS - when the
+    joins of the old rows changed (same_joins). The small tables are written only when they changed.
+    One writer at a time; readers open the snapshot meanwhile."""
+    started = time.monotonic()
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = None if full else read_manifest(directory)
+    old = None if manifest is None else open_snapshot(directory, manifest)
+    with engine_.connect() as connection:
+        watermark = None if manifest is None or manifest['watermark'] is None else np.datetime64(manifest['watermark'])
+        new = None if old is None else fetch_new(connection, old.id, old.created_at, watermark)
+        assessments = fetch_assessments(connection) if new is None else new
+        tables = fetch_tables(connection)
+
+    columns = {**assessments, **joins(assessments, tables)}
+    generation = 0 if manifest is None else manifest['generation'] + 1  # the names of the files written anew
+    if new is None:
+        rows, appended = 0, ()
+
+    else:
+        rows, appended = manifest['rows'], ASSESSMENT_COLUMNS
+        if same_joins(old, tables):
+            appended = tuple(DTYPES)
+
+        else:
+            old_joins = joins(old.assessments(), tables)
+            columns.update({name: np.concatenate([old_joins[name], columns[name]]) for name in JOIN_COLUMNS})
+
+    files = {}
+    for name, dtype in DTYPES.items():
+        if name in appended:
+            files[name] = manifest['columns'][name]['file']
+            write_column(directory.joinpath(files[name]), columns[name], rows * np.dtype(dtype).itemsize)
+
+        else:
+            files[name] = f'{name}.{generation}.bin'
+            write_column(directory.joinpath(files[name]), columns[name])
+
+    saved_tables = {}
+    for name, array in tables.items():
+        if old is not None and np.array_equal(getattr(old, name), array):
+            saved_tables[name] = manifest['tables'][name]
+
+        else:
+            saved_tables[name] = write_table(directory, name, array, generation)
+
+    added = len(assessments['id'])
+    watermarks = [np.datetime64(manifest['watermark'])] if appended and manifest['watermark'] else []
+    if added:
+        watermarks.append(assessments['created_at'].max())
+
+    new_manifest = {
+        'version': SNAPSHOT_VERSION,
+        'generation': generation,
+        'rows': rows + added,
+        'watermark': str(max(watermarks)) if watermarks else None,
+        'columns': {name: {'file': files[name], 'dtype': dtype} for name, dtype in DTYPES.items()},
+        'tables': saved_tables,
+        }
+    write_manifest(directory, new_manifest)
+    # the files that are mapped stay readable until they are unmapped:
+    for file in snapshot_files(manifest) - snapshot_files(new_manifest):
+        directory.joinpath(file).unlink(missing_ok=True)
+
+    written = 'written anew' if not appended else f'{added} appended' + (
+        ', the joins written anew' if len(appended) == len(ASSESSMENT_COLUMNS) else '')
+    logging.info(f'\t\t\tColumnar snapshot {directory}: {rows + added} assessments ({written}) '
+                 f'in {time.monotonic() - started:.3f} s.')
+
+    return added
+
+
+def snapshot_engine(directory: pathlib.Path = SNAPSHOT_DIR) -> ColumnarEngine:
+    """ColumnarEngine that answers the reports from the snapshot in directory, without the database."""
+    columnar = ColumnarEngine()
+    columnar.columns = open_snapshot(directory)
+
+    return columnar
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Memory-mapped columnar snapshot of the assessments.')
+    parser.add_argument('action', choices=['save', 'open'],
+                        help='save: write the snapshot or append the new rows to it; open: answer the reports from it')
+    parser.add_argument('-d', '--directory', type=pathlib.Path, default=SNAPSHOT_DIR,
+                        help=f'directory of the snapshot (default {SNAPSHOT_DIR})')
+    parser.add_argument('--full', action='store_true', help='save: write the snapshot anew')
+    parser.add_argument('-r', '--reports', nargs='+', choices=list(COLUMNAR_REPORTS), help='open: only these reports')
+    args = parser.parse_args()
+
+    if args.action == 'save':
+        save_snapshot(args.directory, full=args.full)
+
+    else:
+        opened = time.perf_counter()
+        snapshot = snapshot_engine(args.directory)
+        print(f'Opened in {(time.perf_counter() - opened) * 1000:.3f} ms: {len(snapshot.columns.id)} assessments.')
+        for report_name in args.reports or COLUMNAR_REPORTS:
+            report_started = time.perf_counter()
+            report_rows = snapshot.run(report_name)
+            print(f'{report_name} ({(time.perf_counter() - report_started) * 1000:.3f} ms): {report_rows}')
@@ -0,0 +1,417 @@
+import argparse
+from collections import defaultdict
+from dataclasses import (
+    asdict,
+    dataclass,
+    field,
+    )
+import json
+import logging
+import pathlib
+import re
+from typing import (
+    Any,
+    Iterable,
+    Optional,
+    )
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    Engine,
+    inspect,
+    Join,
+    literal_column,
+    Select,
+    Table,
+    )
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import (
+    operators,
+    visitors,
+    )
+from sqlalchemy.sql.elements import (
+    BinaryExpression,
+    BooleanClauseList,
+    Label,
+    UnaryExpression,
+    )
+
+from database.connect_to_db_postgresql import engine
+from my_select import REPORTS
+
+
+PLAN_DIR = pathlib.Path(__file__).parent.joinpath('plans')  # snapshots: plans/<dialect>/<report>.json
+ALEMBIC_INI = pathlib.Path(__file__).parent.parent.joinpath('alembic.ini')
+REGRESSION_FACTOR = 1.5  # a plan whose estimated cost grew more than this is a regression
+MAX_INCLUDE = 3  # more columns than this are not worth a covering index
+
+EQUAL = (operators.eq, operators.in_op)
+RANGE = (operators.gt, operators.ge, operators.lt, operators.le, operators.between_op)
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')  # a full scan, not 'SCAN t USING [COVERING] INDEX ...'
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+@dataclass
+class Plan:
+    report: str
+    sql: str
+    shape: list[str]  # the operations of the plan tree, depth first
+    seq_scans: list[str]  # tables read in full
+    sorts: list[str]  # sorts the plan has to do (no index gives the order)
+    cost: Optional[float] = None  # PostgreSQL: the estimated total cost
+    time: Optional[float] = None  # PostgreSQL: the actual total time, ms
+    buffers: Optional[int] = None  # PostgreSQL: the shared blocks hit and read
+    raw: Any = None
+
+
+@dataclass(frozen=True)
+class IndexProposal:
+    table: str
+    columns: tuple[str, ...]
+    include: tuple[str, ...] = ()  # covering: PostgreSQL INCLUDE columns (an index-only scan)
+    reports: tuple[str, ...] = field(default=(), compare=False)
+
+    @property
+    def name(self) -> str:
+        return f'ix_{self.table}_{"_".join(self.columns)}'
+
+    def operation(self) -> str:
+        include = f', postgresql_include={list(self.include)!r}' if self.include else ''
+        return f'op.create_index({self.name!r}, {self.table!r}, {list(self.columns)!r}, unique=False{include})'
+
+    def __str__(self) -> str:
+        include = f' INCLUDE ({", ".join(self.include)})' if self.include else ''
+        return f'{self.name} ON {self.table} ({", ".join(self.columns)}){include} - for {", ".join(self.reports)}'
+
+
+def report_sql(connection: Connection, name: str) -> str:
+    """SQL of report `name` with its default parameters inlined (as run_report would execute it)."""
+    report = REPORTS[name]
+    params = dict(report.defaults)
+    if report.prepare is not None:
+        with Session(bind=connection) as session_:
+            params.update(report.prepare(session_, params))
+
+    statement = report.statement.params(params)
+
+    return str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def postgresql_nodes(node: dict) -> Iterable[dict]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from postgresql_nodes(child)
+
+
+def explain(connection: Connection, name: str) -> Plan:
+    sql = report_sql(connection, name)
+    if connection.dialect.name == 'postgresql':
+        raw = connection.exec_driver_sql(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}').scalar()[0]
+        nodes = list(postgresql_nodes(raw['Plan']))
+        return Plan(
+            name,
+            sql,
+            [' '.join(filter(None, (node['Node Type'], node.get('Relation Name'), node.get('Index Name'))))
+             for node in nodes],
+            [node['Relation Name'] for node in nodes if node['Node Type'] == 'Seq Scan'],
+            [', '.join(node['Sort Key']) for node in nodes if node['Node Type'] in ('Sort', 'Incremental Sort')],
+            raw['Plan']['Total Cost'],
+            raw['Plan']['Actual Total Time'],
+            raw['Plan'].get('Shared Hit Blocks', 0) + raw['Plan'].get('Shared Read Blocks', 0),
+            raw,
+            )
+
+    details = [detail for *_, detail in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}').all()]
+    return Plan(
+        name,
+        sql,
+        details,
+        [match.group(1) for match in map(SQLITE_SCAN.match, details) if match],
+        [detail for detail in details if detail.startswith('USE TEMP B-TREE')],
+        raw=details,
+        )
+
+
+def column_of(element) -> Optional[Column]:
+    """The table column behind element (desc(...), a label), None for expressions and other FROMs."""
+    while isinstance(element, (UnaryExpression, Label)):
+        element = element.element
+
+    if isinstance(element, Column) and isinstance(element.table, Table):
+        return element
+
+    return None
+
+
+def conditions(clause) -> list:
+    if clause is None:
+        return []
+
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        return [condition for element in clause.clauses for condition in conditions(element)]
+
+    return [clause]
+
+
+def join_conditions(from_) -> list:
+    if isinstance(from_, Join):
+        return join_conditions(from_.left) + join_conditions(from_.right) + conditions(from_.onclause)
+
+    return []
+
+
+def order_by_of(statement: Select) -> list:
+    """The ORDER BY elements of statement: its children in place of a marker put as the only ORDER BY."""
+    marker = literal_column('0')
+    ordered, marked = list(statement.get_children()), list(statement.order_by(None).order_by(marker).get_children())
+    start = next(index for index, child in enumerate(marked) if child is marker)
+
+    return ordered[start:len(ordered) - (len(marked) - start - 1)]
+
+
+@dataclass
+class TableUsage:
+    equal: list[str] = field(default_factory=list)  # compared with a value (directly or through a join)
+    range: list[str] = field(default_factory=list)
+    order: list[str] = field(default_factory=list)
+    join: list[str] = field(default_factory=list)
+    used: set[str] = field(default_factory=set)  # every column the query reads
+
+
+def add(columns: list, name: str) -> None:
+    if name not in columns:
+        columns.append(name)
+
+
+def select_usage(statement: Select) -> dict[str, TableUsage]:
+    usage, equal, pairs = defaultdict(TableUsage), [], []
+    for condition in conditions(statement.whereclause) + [
+            condition for from_ in statement.get_final_froms() for condition in join_conditions(from_)]:
+        if not isinstance(condition, BinaryExpression):
+            continue
+
+        left, right = column_of(condition.left), column_of(condition.right)
+        if left is not None and right is not None:
+            if condition.operator is operators.eq:
+                pairs.append((left, right))
+
+        elif left is not None or right is not None:
+            column = left if left is not None else right
+            if condition.operator in EQUAL:
+                equal.append(column)
+
+            elif condition.operator in RANGE:
+                add(usage[column.table.name].range, column.name)
+
+    for left, right in pairs:
+        add(usage[left.table.name].join, left.name)
+        add(usage[right.table.name].join, right.name)
+
+    changed = True
+    while changed:  # subjects.id = 2 and assessments.subject_id = subjects.id: assessments.subject_id = 2 too
+        changed = False
+        for left, right in pairs:
+            for column, other in ((left, right), (right, left)):
+                if any(column is known or column.compare(known) for known in equal) \
+                        and not any(other is known or other.compare(known) for known in equal):
+                    equal.append(other)
+                    changed = True
+
+    for column in equal:
+        add(usage[column.table.name].equal, column.name)
+
+    for element in order_by_of(statement):
+        column = column_of(element)
+        if column is not None:
+            add(usage[column.table.name].order, column.name)
+
+    for element in visitors.iterate(statement):
+        column = column_of(element)
+        if column is not None:
+            usage[column.table.name].used.add(column.name)
+
+    return usage
+
+
+def statement_usage(statement: Select) -> list[dict[str, TableUsage]]:
+    """How the tables are filtered, joined and ordered: by statement and by each of its subqueries."""
+    return [select_usage(element) for element in visitors.iterate(statement) if isinstance(element, Select)]
+
+
+def existing_indexes(connection: Connection, table: str) -> list[tuple[str, ...]]:
+    inspector = inspect(connection)
+    indexes = [tuple(index['column_names']) for index in inspector.get_indexes(table)]
+    indexes.append(tuple(inspector.get_pk_constraint(table)['constrained_columns']))
+
+    return indexes
+
+
+def serves(columns: tuple[str, ...], equal: tuple[str, ...], tail: tuple[str, ...]) -> bool:
+    """An index on columns serves the equality columns (in any order) followed by the tail columns."""
+    return set(columns[:len(equal)]) == set(equal) and columns[len(equal):len(equal) + len(tail)] == tail
+
+
+def propose(connection: Connection, plans: Iterable[Plan]) -> list[IndexProposal]:
+    """Indexes for the tables the plans read in full or sort: the equality columns first, then a range or the
+    order; the foreign keys they are joined by; the other columns read as INCLUDE (if few)."""
+    tables = set(inspect(connection).get_table_names())
+    needs = []  # (table, equality columns, tail columns, other columns read, report)
+    for plan in plans:
+        for usage in statement_usage(REPORTS[plan.report].statement):
+            flagged = set(plan.seq_scans)
+            if plan.sorts:
+                flagged.update(table for table, table_usage in usage.items() if table_usage.order)
+
+            for table in flagged & tables & usage.keys():
+                table_usage = usage[table]
+                primary_key = existing_indexes(connection, table)[-1]
+                equal = tuple(table_usage.equal)
+                tail = tuple(column for column in table_usage.range[:1] or table_usage.order if column not in equal)
+                if equal or tail:
+                    needs.append((table, equal, tail, table_usage.used - set(primary_key), plan.report))
+
+                needs += [
+                    (table, (column,), (), set(), plan.report)
+                    for column in table_usage.join if column not in primary_key
+                    ]
+
+    chosen = []  # [table, columns, include, reports]: the longest needs first, the shorter ones share them
+    for table, equal, tail, used, report in sorted(needs, key=lambda need: (-len(need[1] + need[2]), not need[2])):
+        if any(serves(columns, equal, tail) for columns in existing_indexes(connection, table)):
+            continue
+
+        index = next((index for index in chosen if index[0] == table and serves(index[1], equal, tail)), None)
+        if index is None:
+            index = [table, equal + tail, set(), set()]
+            chosen.append(index)
+
+        index[2] |= used
+        index[3].add(report)
+
+    proposals = []
+    for table, columns, include, reports in sorted(chosen, key=lambda index: index[:2]):
+        include = tuple(sorted(include - set(columns)))
+        proposals.append(IndexProposal(
+            table,
+            columns,
+            include if len(include) <= MAX_INCLUDE else (),
+            tuple(sorted(reports, key=report_order)),
+            ))
+
+    return proposals
+
+
+def report_order(name: str) -> int:
+    return list(REPORTS).index(name)
+
+
+def snapshot_path(directory: pathlib.Path, dialect: str, report: str) -> pathlib.Path:
+    return directory.joinpath(dialect, f'{report}.json')
+
+
+def save_snapshots(plans: Iterable[Plan], dialect: str, directory: pathlib.Path = PLAN_DIR) -> None:
+    for plan in plans:
+        path = snapshot_path(directory, dialect, plan.report)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(asdict(plan), ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+
+    logging.info(f'\t\t\tPlan snapshots saved to {directory.joinpath(dialect)}.')
+
+
+def regressions(plans: Iterable[Plan], dialect: str, directory: pathlib.Path = PLAN_DIR) -> list[str]:
+    """Differences from the saved snapshots that make a report slower: new full scans, new sorts, a higher cost."""
+    found = []
+    for plan in plans:
+        path = snapshot_path(directory, dialect, plan.report)
+        if not path.exists():
+            logging.warning(f'\t\t\tNo snapshot of {plan.report} in {path.parent}.')
+            continue
+
+        saved = Plan(**json.loads(path.read_text(encoding='utf-8')))
+        new_scans = sorted(set(plan.seq_scans) - set(saved.seq_scans))
+        if new_scans:
+            found.append(f'{plan.report}: full scan of {", ".join(new_scans)}')
+
+        if len(plan.sorts) > len(saved.sorts):
+            found.append(f'{plan.report}: sorts {saved.sorts} -> {plan.sorts}')
+
+        if plan.cost is not None and saved.cost and plan.cost > saved.cost * REGRESSION_FACTOR:
+            found.append(f'{plan.report}: estimated cost {saved.cost} -> {plan.cost}')
+
+        if plan.shape != saved.shape:
+            logging.info(f'\t\t\t{plan.report}: plan changed\n\t{saved.shape}\n\t{plan.shape}')
+
+    return found
+
+
+def write_migration(proposals: list[IndexProposal], message: str = 'Report indexes') -> pathlib.Path:
+    """A new Alembic revision (on top of the current head) that creates the proposed indexes."""
+    from alembic.config import Config  # only the generation of a migration needs Alembic itself
+    from alembic.script import ScriptDirectory
+    from alembic.util import rev_id
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option('script_location', str(ALEMBIC_INI.parent.joinpath('alembic')))
+    script = ScriptDirectory.from_config(config).generate_revision(
+        rev_id(),
+        message,
+        upgrades='\n    '.join(proposal.operation() for proposal in proposals),
+        downgrades='\n    '.join(
+            f'op.drop_index({proposal.name!r}, table_name={proposal.table!r})' for proposal in reversed(proposals)
+            ),
+        )
+
+    return pathlib.Path(script.path)
+
+
+def advise(engine_: Engine = engine, names: Optional[Iterable[str]] = None) -> tuple[list[Plan], list[IndexProposal]]:
+    """EXPLAIN every report (a seeded database gives representative plans) and propose indexes."""
+    with engine_.connect() as connection:
+        plans = [explain(connection, name) for name in (names or REPORTS)]
+        for plan in plans:
+            flags = [f'full scan of {table}' for table in plan.seq_scans] + [f'sort ({sort})' for sort in plan.sorts]
+            timing = f', cost {plan.cost}, {plan.time} ms, {plan.buffers} buffers' if plan.cost is not None else ''
+            logging.info(f'\t\t\t{plan.report}: {"; ".join(flags) or "indexed"}{timing}')
+
+        return plans, propose(connection, plans)
+
+
+def accepted(proposals: list[IndexProposal], answer: str) -> list[IndexProposal]:
+    if answer == 'all':
+        return proposals
+
+    return [proposals[int(number) - 1] for number in answer.split(',') if number.strip()]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='EXPLAIN the my_select reports, propose indexes and keep plan snapshots.',
+        epilog='examples: python -m reports.index_advisor --snapshot; '
+               'python -m reports.index_advisor --check; python -m reports.index_advisor --accept 1,3',
+        )
+    parser.add_argument('-r', '--reports', nargs='+', choices=list(REPORTS), help='only these reports')
+    parser.add_argument('-d', '--plan-dir', type=pathlib.Path, default=PLAN_DIR, help='directory of the snapshots')
+    parser.add_argument('--snapshot', action='store_true', help='save the plans as the new snapshots')
+    parser.add_argument('--check', action='store_true', help='compare with the snapshots, exit 1 on a regression')
+    parser.add_argument('--accept', help="proposals to write an Alembic migration for: 'all' or numbers, e.g. 1,3")
+    args = parser.parse_args()
+
+    explained, proposed = advise(names=args.reports)
+    for number, index_proposal in enumerate(proposed, 1):
+        print(f'{number}. {index_proposal}')
+
+    if args.accept:
+        print(f'Migration: {write_migration(accepted(proposed, args.accept))}')
+
+    if args.check:
+        slower = regressions(explained, engine.dialect.name, args.plan_dir)
+        for regression in slower:
+            print(f'REGRESSION {regression}')
+
+        if slower:
+            raise SystemExit(1)
+
+    if args.snapshot:
+        save_snapshots(explained, engine.dialect.name, args.plan_dir)
@@ -0,0 +1,102 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import logging
+from pprint import pprint
+import time
+from typing import (
+    Iterable,
+    Iterator,
+    Optional,
+    )
+
+from sqlalchemy import Engine
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from database.connect_to_db_postgresql import engine
+from my_select import (
+    REPORTS,
+    run_report,
+    )
+
+
+THREADS = 4  # no more than the pool_size of the engine: every worker holds a connection
+SNAPSHOT_OPTIONS = {'isolation_level': 'REPEATABLE READ', 'postgresql_readonly': True}
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+@contextmanager
+def exported_snapshot(engine_: Engine = engine) -> Iterator[Optional[str]]:
+    """PostgreSQL: id of the snapshot of a READ ONLY REPEATABLE READ transaction, open while the block runs
+    (the workers import it); None for the other backends."""
+    if engine_.dialect.name != 'postgresql':
+        yield None
+        return
+
+    with engine_.connect().execution_options(**SNAPSHOT_OPTIONS) as connection, connection.begin():
+        yield connection.exec_driver_sql('SELECT pg_export_snapshot()').scalar()
+
+
+@contextmanager
+def snapshot_session(engine_: Engine, snapshot: Optional[str]) -> Iterator[Session]:
+    """A session of its own connection, in the exported snapshot if there is one (every worker sees the same data)."""
+    with engine_.connect() as connection:
+        if snapshot is not None:
+            connection = connection.execution_options(**SNAPSHOT_OPTIONS)
+            connection.begin()
+            connection.exec_driver_sql(f"SET TRANSACTION SNAPSHOT '{snapshot}'")  # before any other query
+
+        with Session(bind=connection) as session_:
+            yield session_
+
+        connection.rollback()  # read only: nothing to commit
+
+
+def timed_report(engine_: Engine, snapshot: Optional[str], name: str, params: dict) -> tuple[list[Row], float]:
+    started = time.monotonic()
+    with snapshot_session(engine_, snapshot) as session_:
+        rows = run_report(name, session_, **params)
+
+    return rows, time.monotonic() - started
+
+
+def run_reports(
+        names: Optional[Iterable[str]] = None,
+        threads: int = THREADS,
+        engine_: Engine = engine,
+        params: Optional[dict[str, dict]] = None,
+        ) -> dict[str, list[Row]]:
+    """Run the reports (all by default) concurrently, each in its own session; the results in the order of names.
+
+    params: report name -> its parameters (the others run with their defaults)."""
+    names = list(REPORTS if names is None else names)
+    params = params or {}
+    started = time.monotonic()
+    with exported_snapshot(engine_) as snapshot, \
+            ThreadPoolExecutor(max_workers=threads, thread_name_prefix='report') as executor:
+        futures = {
+            name: executor.submit(timed_report, engine_, snapshot, name, params.get(name, {}))
+            for name in names
+            }
+        results = {name: future.result() for name, future in futures.items()}
+
+    durations = {name: seconds for name, (_, seconds) in results.items()}
+    slowest = max(durations, key=durations.get, default=None)
+    logging.info(f'\t\t\t{len(names)} report(s) in {time.monotonic() - started:.3f} s '
+                 f'(one after another: {sum(durations.values()):.3f} s, the slowest {slowest}: '
+                 f'{durations.get(slowest, 0):.3f} s), snapshot: {snapshot or "one per worker"}.')
+
+    return {name: rows for name, (rows, _) in results.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the my_select reports concurrently in one snapshot.')
+    parser.add_argument('-r', '--reports', nargs='+', choices=list(REPORTS), help='only these reports')
+    parser.add_argument('-t', '--threads', type=int, default=THREADS, help=f'worker threads (default {THREADS})')
+    args = parser.parse_args()
+
+    for report_name, report_rows in run_reports(args.reports, args.threads).items():
+        print(f'\n\n{REPORTS[report_name].description}:\n')
+        pprint(report_rows)
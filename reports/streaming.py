@@ -0,0 +1,72 @@
+import argparse
+from contextlib import nullcontext
+from pprint import pformat
+import sys
+from typing import (
+    Iterable,
+    Iterator,
+    Optional,
+    TextIO,
+    )
+
+from sqlalchemy import Executable
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from database.connect_to_db_postgresql import session
+from my_select import (
+    bind_report,
+    REPORTS,
+    )
+
+
+STREAM_CHUNK = 1_000  # rows fetched from the server-side cursor (and written out) at a time
+
+
+def stream_rows(
+        session_: Session,
+        statement: Executable,
+        params: Optional[dict] = None,
+        chunk_size: int = STREAM_CHUNK,
+        ) -> Iterator[Row]:
+    """Rows of statement as the server-side cursor (stream_results) delivers them, chunk_size at a time:
+    the memory does not grow with the size of the result."""
+    result = session_.execute(statement, params or {}, execution_options={'yield_per': chunk_size})
+    try:
+        yield from result
+
+    finally:  # the cursor is released even if the reader stops early
+        result.close()
+
+
+def stream_report(name: str, session_: Session = session, chunk_size: int = STREAM_CHUNK, **params) -> Iterator[Row]:
+    """my_select.run_report without .all(): the rows one by one."""
+    report = REPORTS[name]
+
+    return stream_rows(session_, report.statement, bind_report(report, session_, params), chunk_size)
+
+
+def render_rows(rows: Iterable, file: TextIO = sys.stdout, chunk_size: int = STREAM_CHUNK) -> int:
+    """Write rows one per line, flushed after the first one (it shows at once) and after every chunk_size rows.
+    Returns the number of rows."""
+    count = 0
+    for count, row in enumerate(rows, 1):
+        file.write(f'{pformat(row)}\n')
+        if count == 1 or count % chunk_size == 0:
+            file.flush()
+
+    file.flush()
+
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stream the rows of a my_select report to stdout or a file.')
+    parser.add_argument('report', choices=list(REPORTS))
+    parser.add_argument('-o', '--output', help='file to write the rows to (default stdout)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=STREAM_CHUNK,
+                        help=f'rows per fetch (default {STREAM_CHUNK})')
+    args = parser.parse_args()
+
+    with open(args.output, 'w', encoding='utf-8') if args.output else nullcontext(sys.stdout) as output:
+        render_rows(stream_report(args.report, chunk_size=args.chunk_size), output, args.chunk_size)
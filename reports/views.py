@@ -0,0 +1,350 @@
+import argparse
+from dataclasses import (
+    dataclass,
+    replace,
+    )
+from datetime import datetime
+import logging
+import threading
+import time
+from typing import (
+    Any,
+    Iterable,
+    Optional,
+    )
+
+from sqlalchemy import (
+    bindparam,
+    Column,
+    Connection,
+    delete,
+    Engine,
+    func,
+    Index,
+    insert,
+    Integer,
+    literal,
+    MetaData,
+    NUMERIC,
+    select,
+    Select,
+    Table,
+    text,
+    )
+from sqlalchemy.dialects import (
+    postgresql,
+    sqlite,
+    )
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import (
+    aliased,
+    Session,
+    )
+from sqlalchemy.schema import CreateIndex
+
+from database.connect_to_db_postgresql import (
+    engine,
+    session,
+    )
+from database.models import (
+    Assessment,
+    GroupSubjectScore,
+    StudentScore,
+    StudentSubjectScore,
+    TableVersion,
+    TeacherScore,
+    ViewRefresh,
+    )
+from database.summaries import (
+    aggregate,
+    SOURCES,
+    )
+from my_select import (
+    execute_report,
+    REPORTS,
+    summary_statements,
+    )
+from reports.cache import (
+    install_version_triggers,
+    VERSIONED_TABLES,
+    )
+
+
+INTERVAL = 300.0  # seconds a view may be older than at most
+WRITE_THRESHOLD = 10_000  # rows written to the raw tables after which a view is refreshed earlier
+CHECK_EVERY = 5.0  # seconds between the checks of the scheduler
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+# Not in Base.metadata: on PostgreSQL these are materialized views (Alembic), on SQLite tables (install_views)
+metadata = MetaData()
+
+
+def view_table(name: str, model) -> Table:
+    """Columns of the summary model; a unique index on its key (REFRESH ... CONCURRENTLY needs one) and
+    the indexes of the model."""
+    table = Table(name, metadata, *(Column(column.name, column.type) for column in model.__table__.columns))
+    Index(f'ux_{name}', *(table.c[column.name] for column in model.__table__.primary_key.columns), unique=True)
+    for index in model.__table__.indexes:
+        columns = [table.c[column.name] for column in index.columns]
+        Index(f'ix_{name}_{"_".join(column.name for column in columns)}', *columns)
+
+    return table
+
+
+OVERALL_SCORE = Table(
+    'mv_overall_score',
+    metadata,
+    Column('id', Integer),
+    Column('total', NUMERIC),
+    Column('count_', Integer),
+    Column('average', NUMERIC),
+    )
+Index('ux_mv_overall_score', OVERALL_SCORE.c.id, unique=True)
+
+
+@dataclass(frozen=True)
+class View:
+    name: str
+    table: Table
+    statement: Select  # the aggregation the view keeps
+
+
+VIEWS = {view.name: view for view in (
+    View('mv_student_scores', view_table('mv_student_scores', StudentScore), SOURCES[StudentScore]),
+    View(
+        'mv_student_subject_scores',
+        view_table('mv_student_subject_scores', StudentSubjectScore),
+        SOURCES[StudentSubjectScore],
+        ),
+    View(
+        'mv_group_subject_scores',
+        view_table('mv_group_subject_scores', GroupSubjectScore),
+        SOURCES[GroupSubjectScore],
+        ),
+    View('mv_teacher_scores', view_table('mv_teacher_scores', TeacherScore), SOURCES[TeacherScore]),
+    View(
+        OVERALL_SCORE.name,
+        OVERALL_SCORE,
+        aggregate(literal(1, Integer).label('id')).select_from(Assessment).where(Assessment.value_.isnot(None)),
+        ),
+    )}
+
+# The heavy my_select reports over the views instead of the raw (or summary) tables:
+VIEW_STATEMENTS = {
+    **summary_statements(
+        student_scores=aliased(StudentScore, VIEWS['mv_student_scores'].table, adapt_on_names=True),
+        student_subject_scores=aliased(
+            StudentSubjectScore, VIEWS['mv_student_subject_scores'].table, adapt_on_names=True
+            ),
+        group_subject_scores=aliased(GroupSubjectScore, VIEWS['mv_group_subject_scores'].table, adapt_on_names=True),
+        teacher_scores=aliased(TeacherScore, VIEWS['mv_teacher_scores'].table, adapt_on_names=True),
+        ),
+    'select_4': select(func.round(OVERALL_SCORE.c.average, 3).label('Whole_success_rate')),
+    }
+VIEW_REPORTS = {name: replace(REPORTS[name], statement=statement) for name, statement in VIEW_STATEMENTS.items()}
+
+
+def view_sql(view: View, connection: Connection) -> str:
+    return str(view.statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def write_volume(connection: Connection) -> int:
+    """Rows inserted, updated and deleted in the raw tables so far (a counter that only grows)."""
+    if connection.dialect.name == 'postgresql':  # the statistics collector counts every write of every process
+        return connection.scalar(
+            text('SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0) FROM pg_stat_user_tables '
+                 'WHERE relname IN :tables').bindparams(bindparam('tables', expanding=True)),
+            {'tables': list(VERSIONED_TABLES)},
+            )
+
+    # SQLite: the row triggers of reports.cache
+    return connection.scalar(
+        select(func.coalesce(func.sum(TableVersion.version), 0))
+        .where(TableVersion.table_name.in_(VERSIONED_TABLES))
+        )
+
+
+def record_refresh(connection: Connection, name: str, refreshed_at: datetime, volume: int, duration: float) -> None:
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    values = {'refreshed_at': refreshed_at, 'write_volume': volume, 'duration': duration}
+    connection.execute(
+        dialect.insert(ViewRefresh)
+        .values(view_name=name, **values)
+        .on_conflict_do_update(index_elements=[ViewRefresh.view_name], set_=values)
+        )
+
+
+def refresh_view(view: View, engine_: Engine = engine, concurrently: bool = True) -> float:
+    """Recompute view; the readers keep reading its previous rows meanwhile. Returns the seconds it took.
+
+    concurrently=False only for the first fill of a PostgreSQL view created WITH NO DATA (nobody can read it yet)."""
+    refreshed_at = datetime.now()
+    started = time.monotonic()
+    if engine_.dialect.name == 'postgresql':
+        # CONCURRENTLY: builds the new rows aside and merges them, SELECTs are not locked out
+        with engine_.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            volume = write_volume(connection)  # before the refresh: writes during it count for the next one
+            connection.exec_driver_sql(f'REFRESH MATERIALIZED VIEW {"CONCURRENTLY " * concurrently}{view.name}')
+
+    else:  # one transaction: in WAL mode the readers see the old rows until its commit
+        with engine_.begin() as connection:
+            volume = write_volume(connection)
+            connection.execute(delete(view.table))
+            connection.execute(
+                insert(view.table).from_select([column.name for column in view.table.columns], view.statement)
+                )
+
+    duration = time.monotonic() - started
+    with engine_.begin() as connection:
+        record_refresh(connection, view.name, refreshed_at, volume, duration)
+
+    logging.info(f'\t\t\tView {view.name} refreshed in {duration:.3f} s.')
+
+    return duration
+
+
+def populated_views(connection: Connection) -> set[str]:
+    """The materialized views with rows to read (created by the migration or refreshed); none on SQLite."""
+    if connection.dialect.name != 'postgresql':
+        return set()
+
+    return set(connection.scalars(
+        text('SELECT matviewname FROM pg_matviews WHERE ispopulated AND schemaname = current_schema()')
+        ))
+
+
+def install_views(engine_: Engine = engine) -> None:
+    """Create the views (the Alembic migration does the same on PostgreSQL) and fill the ones never refreshed.
+
+    A view the migration created with its rows is refreshed CONCURRENTLY: its readers are not locked out."""
+    ViewRefresh.__table__.create(engine_, checkfirst=True)
+    if engine_.dialect.name == 'postgresql':
+        with engine_.begin() as connection:
+            for view in VIEWS.values():
+                connection.exec_driver_sql(
+                    f'CREATE MATERIALIZED VIEW IF NOT EXISTS {view.name} AS {view_sql(view, connection)} WITH NO DATA'
+                    )
+                for index in view.table.indexes:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+
+    else:  # SQLite emulation: plain tables rebuilt by refresh_view
+        install_version_triggers(engine_)  # table_versions counts the written rows
+        with engine_.connect() as connection:
+            connection.exec_driver_sql('PRAGMA journal_mode=WAL')  # readers do not wait for a rebuild
+
+        metadata.create_all(engine_, checkfirst=True)
+
+    with engine_.connect() as connection:
+        refreshed = set(connection.scalars(select(ViewRefresh.view_name)))
+        populated = populated_views(connection)
+
+    for view in VIEWS.values():
+        if view.name not in refreshed:
+            refresh_view(view, engine_, concurrently=view.name in populated)
+
+
+def staleness(engine_: Engine = engine) -> dict[str, dict[str, Any]]:
+    """For every view: when its data was taken, how old it is (seconds) and the rows written since."""
+    with engine_.connect() as connection:
+        volume = write_volume(connection)
+        refreshes = {refresh.view_name: refresh for refresh in connection.execute(select(ViewRefresh.__table__))}
+
+    now = datetime.now()
+    states = {}
+    for name in VIEWS:
+        refresh = refreshes.get(name)
+        if refresh is None:
+            states[name] = {'refreshed_at': None, 'age': None, 'writes_since': None}
+            continue
+
+        writes = volume - refresh.write_volume
+        states[name] = {
+            'refreshed_at': refresh.refreshed_at,
+            'age': (now - refresh.refreshed_at).total_seconds(),
+            'writes_since': writes if writes >= 0 else volume,  # the statistics were reset
+            }
+
+    return states
+
+
+class ViewRefresher(threading.Thread):
+    """Refreshes a view when it is older than interval or write_threshold rows were written after its refresh."""
+
+    def __init__(
+            self,
+            interval: float = INTERVAL,
+            write_threshold: int = WRITE_THRESHOLD,
+            check_every: float = CHECK_EVERY,
+            engine_: Engine = engine,
+            ):
+        super().__init__(name='ViewRefresher', daemon=True)
+        self.interval = interval
+        self.write_threshold = write_threshold
+        self.check_every = check_every
+        self.engine = engine_
+        self.stopped = threading.Event()
+
+    def due(self) -> list[str]:
+        return [
+            name for name, state in staleness(self.engine).items()
+            if state['refreshed_at'] is None
+            or state['age'] >= self.interval
+            or state['writes_since'] >= self.write_threshold
+            ]
+
+    def refresh(self, names: Optional[Iterable[str]] = None) -> None:
+        for name in VIEWS if names is None else names:
+            refresh_view(VIEWS[name], self.engine)
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                self.refresh(self.due())
+
+            except SQLAlchemyError as error:  # the next check tries again
+                logging.error(f'\t\t\tViews were not refreshed, error:\n{error}')
+
+            self.stopped.wait(self.check_every)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+def run_view_report(name: str, session_: Session = session, **params) -> list[Row]:
+    """Report `name` read from the views (as fresh as their last refresh); the other reports as usual."""
+    return execute_report(VIEW_REPORTS.get(name, REPORTS[name]), session_, **params)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Refresh the materialized views of the reports on a schedule.')
+    parser.add_argument('-i', '--interval', type=float, default=INTERVAL,
+                        help=f'seconds a view may be older than (default {INTERVAL})')
+    parser.add_argument('-t', '--write-threshold', type=int, default=WRITE_THRESHOLD,
+                        help=f'written rows that trigger an earlier refresh (default {WRITE_THRESHOLD})')
+    parser.add_argument('-c', '--check-every', type=float, default=CHECK_EVERY,
+                        help=f'seconds between the checks (default {CHECK_EVERY})')
+    parser.add_argument('--once', action='store_true', help='refresh every view now and exit')
+    parser.add_argument('--status', action='store_true', help='print the staleness of the views and exit')
+    args = parser.parse_args()
+
+    install_views()
+    if args.status:
+        for view_name, state in staleness().items():
+            print(f'{view_name}: {state}')
+
+    else:
+        refresher = ViewRefresher(args.interval, args.write_threshold, args.check_every)
+        if args.once:
+            refresher.refresh()
+
+        else:
+            refresher.start()
+            try:
+                while refresher.is_alive():
+                    refresher.join(1)
+
+            except KeyboardInterrupt:
+                refresher.stop()
@@ -1,17 +1,23 @@
-from collections import Counter
-from datetime import (
-    datetime, 
-    timedelta,
-    )
+import argparse
 import logging
-from random import randint
+from typing import Optional
 
-from faker import Faker
-from faker.providers import DynamicProvider
+import numpy as np
+from sqlalchemy import (
+    Connection,
+    select,
+    )
 from sqlalchemy.exc import SQLAlchemyError
 
 # export PYTHONPATH="${PYTHONPATH}:/1prj/example_sqlalchemy/"
-from database.connect_to_db_postgresql import session
+from database.bulk import (
+    BATCH_SIZE,
+    load_rows,
+    )
+from database.connect_to_db_postgresql import (
+    engine,
+    session,
+    )
 from database.models import (
     Group,
     Student,
@@ -19,141 +25,283 @@ from database.models import (
     Subject,
     Assessment
     )
+from database.summaries import rebuild_summaries
 from exception_catcher import exeption_catcher
+# the dataset itself, without the database (worker processes import seeds.dataset, not this module):
+from seeds.dataset import (  # noqa: F401 - seed.STREAMS, seed.group_name... of the seeds.* modules
+    fake_data_generator,
+    generate_assessments,
+    group_name,
+    PROFILE,
+    STREAMS,
+    YEAR_STUDY_START,
+    )
+from seeds.distributions import (
+    DATE_DISTRIBUTIONS,
+    KEY_DISTRIBUTIONS,
+    )
+from seeds.generators import rows
+from seeds.profiles import (
+    apply_rng_seed,
+    DEFAULT_PROFILE,
+    make_profile,
+    PROFILES,
+    SeedProfile,
+    )
 
 
-NUMBER_OF_GROUPS = 3
-NUMBER_OF_STUDENTS = randint(30, 50)
-NUMBER_OF_TEACHERS = randint(3, 5)
-NUMBER_OF_SUBJECTS = randint(5, 8)
-NUMBER_OF_ASSESSMENTS = 19 * NUMBER_OF_SUBJECTS * NUMBER_OF_STUDENTS  # randint(1, 19)
-YEAR_STUDY_START = 2022
+NUMBER_OF_GROUPS = PROFILE.groups
+NUMBER_OF_STUDENTS = PROFILE.students
+NUMBER_OF_TEACHERS = PROFILE.teachers
+NUMBER_OF_SUBJECTS = PROFILE.subjects
+NUMBER_OF_ASSESSMENTS = PROFILE.max_total_assessments  # upper bound, 6..19 per student
+MODES = {
+    'serial': 'one table after another in this process',
+    'parallel': 'students and assessments in worker processes by id range',
+    'pipeline': 'generator processes and writer threads at the same time',
+    'snapshot': 'load the cached snapshot of the profile and seed (generate and cache it if missing)',
+    'resumable': 'checkpointed batches, the same command resumes a failed run',
+    'scheduled': 'independent tables at the same time, following the foreign keys',
+    }
 
 logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
 
 
+def existing_ids(model, default: int, *criteria, connection: Connection = None) -> np.ndarray:
+    """Ids that really are in the table of model (1..default if the table is empty or unavailable)."""
+    statement = select(model.id).where(*criteria).order_by(model.id)
+    if connection is not None:
+        ids = np.fromiter(connection.scalars(statement), dtype=np.int64)
+
+    else:
+        try:
+            ids = np.fromiter(session.scalars(statement), dtype=np.int64)
+
+        except SQLAlchemyError:
+            session.rollback()
+            ids = None
+
+    return ids if ids is not None and len(ids) else np.arange(1, default + 1)
+
+
+def write_groups(connection: Connection, profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> int:
+    fake_groups = ({'group_name': group_name(number)} for number in range(1, profile.groups + 1))
+
+    return load_rows(connection, Group.__table__, fake_groups, batch_size, ignore_conflicts=True)
+
+
+def write_students(connection: Connection, profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> int:
+    fake_data = fake_data_generator(profile, STREAMS['students'])
+    group_ids = existing_ids(Group, profile.groups, connection=connection)
+
+    # repeated names are redrawn here, names that are already in the table are skipped by the INSERT:
+    names = fake_data.unique_names(profile.students)
+    for_students = rows({'name': names, 'group_id': fake_data.keys(group_ids, len(names), profile.group_sizes)})
+
+    return load_rows(connection, Student.__table__, for_students, batch_size, ignore_conflicts=True)
+
+
+def write_teachers(connection: Connection, profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> int:
+    fake_data = fake_data_generator(profile, STREAMS['teachers'])
+    fake_teachers = rows({'name': fake_data.unique_names(profile.teachers)})
+
+    return load_rows(connection, Teacher.__table__, fake_teachers, batch_size, ignore_conflicts=True)
+
+
+def write_subjects(connection: Connection, profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> int:
+    fake_data = fake_data_generator(profile, STREAMS['subjects'])
+    teacher_ids = existing_ids(Teacher, profile.teachers, connection=connection)
+    for_subjects = rows({
+        'subject': fake_data.subjects(profile.subjects),
+        'teacher_id': fake_data.keys(teacher_ids, profile.subjects, profile.teacher_load),
+        })
+
+    return load_rows(connection, Subject.__table__, for_subjects, batch_size)
+
+
+def write_assessments(connection: Connection, profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> int:
+    subject_ids = existing_ids(Subject, profile.subjects, connection=connection)
+    student_ids = existing_ids(Student, profile.students, connection=connection)
+    for_assessments = generate_assessments(student_ids, subject_ids, profile)
+
+    return load_rows(connection, Assessment.__table__, for_assessments, batch_size)
+
+
 @exeption_catcher(1)
-def create_groups() -> bool:
+def create_groups(profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> bool:
     """Create fake groups."""
-    fake_groups = [f'Group-{number}' for number in range(1, NUMBER_OF_GROUPS + 1)]
-    [session.add(Group(group_name=group)) for group in fake_groups]
+    write_groups(session.connection(), profile, batch_size)
     session.commit()
 
     return True
 
 
 @exeption_catcher(2)
-def create_students() -> bool:
+def create_students(profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> bool:
     """Create fake students."""
-    fake_data = Faker('uk_UA')
-
-    fake_students = [fake_data.name() for _ in range(NUMBER_OF_STUDENTS)]
-    for_students = [(student, randint(1, NUMBER_OF_GROUPS)) for student in fake_students]
-    [session.add(Student(name=name, group_id=id_)) for name, id_ in for_students]
+    write_students(session.connection(), profile, batch_size)
     session.commit()
 
     return True
 
 
 @exeption_catcher(3)
-def create_teachers() -> bool:
+def create_teachers(profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> bool:
     """Create fake teachers."""
-    fake_data = Faker('uk_UA')
-
-    fake_teachers = [fake_data.name() for _ in range(NUMBER_OF_TEACHERS)]
-    [session.add(Teacher(name=name)) for name in fake_teachers]
+    write_teachers(session.connection(), profile, batch_size)
     session.commit()
 
     return True
 
 
 @exeption_catcher(4)
-def create_subjects() -> bool:
+def create_subjects(profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> bool:
     """Create fake subjects."""
-    fake_data = Faker('uk_UA')
-
-    try:
-        number_of_subjects = len(session.query(Subject).all()) or NUMBER_OF_SUBJECTS
-
-    except SQLAlchemyError:
-        number_of_subjects = NUMBER_OF_SUBJECTS
-
-    try:
-        number_of_teachers = len(session.query(Teacher).all()) or NUMBER_OF_TEACHERS
-
-    except SQLAlchemyError:
-        number_of_teachers = NUMBER_OF_TEACHERS
-
-    fake_subjects = [fake_data.job() for _ in range(number_of_subjects)]
-    for_subjects = [(subject, randint(1, number_of_teachers)) for subject in fake_subjects]
-    [session.add(Subject(subject=subject, teacher_id=id_)) for subject, id_ in for_subjects]
+    write_subjects(session.connection(), profile, batch_size)
     session.commit()
 
     return True
 
 
 @exeption_catcher(5)
-def create_assessments() -> bool:
+def create_assessments(profile: SeedProfile = PROFILE, batch_size: int = BATCH_SIZE) -> bool:
     """Create fake assessments."""
-    fake_data = Faker('uk_UA')
-
-    try:
-        number_of_subjects = len(session.query(Subject).all()) or NUMBER_OF_SUBJECTS
-
-    except SQLAlchemyError:
-        number_of_subjects = NUMBER_OF_SUBJECTS
-
-    try:
-        number_of_students = len(session.query(Student).all()) or NUMBER_OF_STUDENTS
-
-    except SQLAlchemyError:
-        number_of_students = NUMBER_OF_STUDENTS
-
-    assessments_provider = DynamicProvider(
-            provider_name='assessments',
-            elements=list(range(1, 6)),
-    )
-    fake_data.add_provider(assessments_provider)	
-    fake_assessments = [fake_data.assessments() for _ in range(NUMBER_OF_ASSESSMENTS)]
-    # до 20 оцінок у кожного студента з усіх предметів:       
-    for_assessments = []
-    student_id = 1
-    for value in fake_assessments:
-                
-        # до 20 оцінок у кожного студента з усіх предметів:
-        if Counter(elem[3] for elem in for_assessments).get(student_id, 0) >= randint(6, 19):
-            student_id += 1
-
-        if student_id > number_of_students:
-            break  # ? why not 'while' whole loop
-            
-        for_assessments.append((value,
-                                # datetime(2023, 2, randint(1, 28)).date(),
-                                random_study_day(),
-                                randint(1, number_of_subjects),
-                                student_id))
-
-    [session.add(Assessment(value_=p1, date_of=p2, subject_id=p3, student_id=p4)) for p1, p2, p3, p4 in for_assessments]
+    write_assessments(session.connection(), profile, batch_size)
     session.commit()
 
     return True
 
 
-def random_study_day() -> datetime.date:
-    start_date = datetime.strptime(f'{YEAR_STUDY_START}-09-01', '%Y-%m-%d')
-    end_date = datetime.strptime(f'{YEAR_STUDY_START+1}-06-15', '%Y-%m-%d')
+def seed_tables(
+        profile: SeedProfile = PROFILE,
+        mode: str = 'serial',
+        workers: Optional[int] = None,
+        writers: int = 2,
+        batch_size: int = BATCH_SIZE,
+        ) -> bool:
+    """Seed all tables with the dataset of profile in one of MODES."""
+    apply_rng_seed(profile.rng_seed)
+    logging.info(f'\t\t\tSeeding ({mode}) {profile}.')
+    # the seeds.* modules import this module, so they are imported only here:
+    if mode == 'parallel':
+        from seeds.parallel import (
+            seed_parallel,
+            WORKERS,
+            )
+
+        return seed_parallel(profile, workers or WORKERS, batch_size)
+
+    if mode == 'pipeline':
+        from seeds.pipeline import (
+            PRODUCERS,
+            seed_pipelined,
+            )
+
+        return seed_pipelined(profile, workers or PRODUCERS, writers, batch_size=batch_size)
+
+    if mode == 'snapshot':
+        from seeds.snapshot import seed_from_snapshot
+
+        return seed_from_snapshot(profile, batch_size)
+
+    if mode == 'resumable':
+        from seeds.checkpoint import seed_resumable
+
+        return seed_resumable(profile, batch_size)
+
+    if mode == 'scheduled':
+        from seeds.scheduler import (
+            seed_scheduled,
+            THREADS,
+            )
+
+        return seed_scheduled(profile, workers or THREADS, batch_size)
+
+    return all((
+        create_groups(profile, batch_size),
+        create_students(profile, batch_size),
+        create_teachers(profile, batch_size),
+        create_subjects(profile, batch_size),
+        create_assessments(profile, batch_size),
+        ))
+
+
+def run(
+        profile: SeedProfile = PROFILE,
+        mode: str = 'serial',
+        workers: Optional[int] = None,
+        writers: int = 2,
+        batch_size: int = BATCH_SIZE,
+        ) -> bool:
+    """Seed all tables, then rebuild the summary tables (the bulk loads bypass the ORM events).
+    A failed seed leaves them as they were: the next successful run rebuilds them."""
+    if not seed_tables(profile, mode, workers, writers, batch_size):
+        return False
+
+    with engine.begin() as connection:
+        rebuild_summaries(connection)
+
+    return True
 
-    current_date = start_date + timedelta(randint(1, (end_date - start_date).days - 9))  # 9=Saturday Sunday + last week
 
-    while current_date.isoweekday() in (6, 7):  # Saturday Sunday
-        current_date += timedelta(1)
-    
-    return current_date
+def parse_arguments(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Seed the database with a reproducible fake dataset.',
+        epilog='''
+        Some examples: |_
+        python seed.py -p tiny _|_
+        python seed.py -p large --rng-seed 42 -m parallel -w 8 _|_
+        python seed.py -p small --students 500 --years 2 _|_
+        python seed.py -p xlarge --rng-seed 42 -m snapshot _|_
+        python seed.py -p xlarge --rng-seed 42 -m resumable _|_
+        python seed.py -p large -m pipeline -w 6 --writers 2 _|_
+        python seed.py -p large -m scheduled _|_
+        python seed.py -p skewed --rng-seed 42 -m snapshot _|_
+        python seed.py -p small --group-sizes zipf --assessment-dates clustered _|'''
+        )
+    parser.add_argument('-p', '--profile', choices=PROFILES, default=DEFAULT_PROFILE,
+                        help=f': Dataset size: {", ".join(PROFILES)}.')
+    parser.add_argument('--groups', type=int, help=': Override number of groups.')
+    parser.add_argument('--students', type=int, help=': Override number of students.')
+    parser.add_argument('--teachers', type=int, help=': Override number of teachers.')
+    parser.add_argument('--subjects', type=int, help=': Override number of subjects.')
+    parser.add_argument('--years', type=int, help=': Override number of academic years.')
+    parser.add_argument('--min-assessments', type=int, help=': Override min assessments per student.')
+    parser.add_argument('--max-assessments', type=int, help=': Override max assessments per student.')
+    parser.add_argument('--group-sizes', choices=KEY_DISTRIBUTIONS, help=': Distribution of students over groups.')
+    parser.add_argument('--teacher-load', choices=KEY_DISTRIBUTIONS, help=': Distribution of subjects over teachers.')
+    parser.add_argument('--subject-popularity', choices=KEY_DISTRIBUTIONS,
+                        help=': Distribution of assessments over subjects.')
+    parser.add_argument('--assessment-dates', choices=DATE_DISTRIBUTIONS,
+                        help=': Distribution of assessments over the working days (clustered - exam weeks).')
+    parser.add_argument('--zipf-exponent', type=float, help=': Skew of the zipf distributions (larger - hotter keys).')
+    parser.add_argument('-s', '--rng-seed', type=int, help=': RNG seed (the same seed - the same dataset).')
+    parser.add_argument('-m', '--mode', choices=MODES, default='serial',
+                        help=': ' + '; '.join(f'{mode} - {description}' for mode, description in MODES.items()) + '.')
+    parser.add_argument('-w', '--workers', type=int,
+                        help=': Worker processes (parallel), generator processes (pipeline), threads (scheduled).')
+    parser.add_argument('--writers', type=int, default=2, help=': Writer threads (connections) of the pipeline.')
+    parser.add_argument('-b', '--batch-size', type=int, default=BATCH_SIZE, help=': Rows per INSERT/COPY batch.')
+
+    return parser.parse_args(argv)
 
 
 if __name__ == '__main__':
-    create_groups()
-    create_students()
-    create_teachers()
-    create_subjects()
-    create_assessments()
+    arguments = parse_arguments()
+    seed_profile = make_profile(
+        arguments.profile,
+        groups=arguments.groups,
+        students=arguments.students,
+        teachers=arguments.teachers,
+        subjects=arguments.subjects,
+        years=arguments.years,
+        min_assessments=arguments.min_assessments,
+        max_assessments=arguments.max_assessments,
+        rng_seed=arguments.rng_seed,
+        group_sizes=arguments.group_sizes,
+        teacher_load=arguments.teacher_load,
+        subject_popularity=arguments.subject_popularity,
+        assessment_dates=arguments.assessment_dates,
+        zipf_exponent=arguments.zipf_exponent,
+        )
+    run(seed_profile, arguments.mode, arguments.workers, arguments.writers, arguments.batch_size)
@@ -0,0 +1,156 @@
+from functools import lru_cache
+import logging
+import multiprocessing
+from multiprocessing.context import BaseContext
+import os
+import threading
+import traceback
+from typing import (
+    Callable,
+    Iterable,
+    )
+
+import numpy as np
+from sqlalchemy import (
+    Engine,
+    Table,
+    )
+
+from database.bulk import (
+    BATCH_SIZE,
+    load_rows,
+    )
+from seeds.dataset import (
+    fake_data_generator,
+    STREAMS,
+    )
+from seeds.generators import (
+    FakeDataGenerator,
+    rows,
+    )
+from seeds.profiles import SeedProfile
+
+
+# The stages of seeds.pipeline. A producer process imports only this module: with the spawn or forkserver start
+# method importing database.connect_to_db_postgresql would ask for the password and build its engine again.
+WRITERS = 2  # writer threads, each with an own connection
+PRODUCERS = max(1, (os.cpu_count() or 1) - 1)  # generator processes
+QUEUE_SIZE = 8  # generated batches waiting for a writer: bounds the peak memory
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+# (batch number) -> column arrays of the batch
+BatchMaker = Callable[[int], dict[str, np.ndarray]]
+
+
+@lru_cache(maxsize=None)
+def generator(profile: SeedProfile, stream: int) -> FakeDataGenerator:
+    """Vocabulary pools are built once per producer process."""
+    return fake_data_generator(profile, stream)
+
+
+def student_batch(profile: SeedProfile, group_ids: np.ndarray, batch_size: int, batch: int) -> dict[str, np.ndarray]:
+    fake_data = generator(profile, STREAMS['students']).stream(STREAMS['students'], batch)
+    names = fake_data.unique_names(min(batch_size, profile.students - batch * batch_size))
+
+    return {'name': names, 'group_id': fake_data.keys(group_ids, len(names), profile.group_sizes)}
+
+
+def assessment_batch(
+        profile: SeedProfile,
+        student_ids: np.ndarray,
+        subject_ids: np.ndarray,
+        students_per_batch: int,
+        batch: int,
+        ) -> dict[str, np.ndarray]:
+    fake_data = generator(profile, STREAMS['assessments']).stream(STREAMS['assessments'], batch)
+    chunk = student_ids[batch * students_per_batch:(batch + 1) * students_per_batch]
+    columns = list(fake_data.assessments(
+        chunk,
+        subject_ids,
+        profile.min_assessments,
+        profile.max_assessments,
+        profile.subject_popularity,
+        profile.assessment_dates,
+        ))
+
+    return {name: np.concatenate([part[name] for part in columns]) for name in columns[0]}
+
+
+def produce(make_batch: BatchMaker, batches: Iterable[int], queue: multiprocessing.Queue) -> None:
+    """Producer process: generate its share of batches; blocks while the queue is full."""
+    try:
+        for batch in batches:
+            queue.put(('batch', make_batch(batch)))
+
+    except Exception:
+        queue.put(('error', traceback.format_exc()))
+
+
+def run_pipeline(
+        table: Table,
+        make_batch: BatchMaker,
+        batches: int,
+        engine_: Engine,
+        producers: int = PRODUCERS,
+        writers: int = WRITERS,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        ignore_conflicts: bool = False,
+        context: BaseContext = multiprocessing.get_context(),
+        ) -> int:
+    """Generate batches in producer processes (of the start method of context) and write them in writer threads
+    at the same time."""
+    if engine_.dialect.name == 'sqlite':
+        writers = 1  # SQLite has one writer at a time anyway
+
+    producers = max(1, min(producers, batches))
+    queue = context.Queue(queue_size)
+    processes = [
+        context.Process(target=produce, args=(make_batch, range(number, batches, producers), queue),
+                                name=f'producer-{number}')
+        for number in range(producers)
+        ]
+    written = []
+    errors = []
+
+    def write() -> None:
+        try:
+            connection = engine_.connect()  # own connection of the writer
+
+        except Exception as error:
+            errors.append(error)
+            connection = None
+
+        # a failed writer keeps draining the queue, otherwise the producers would block forever:
+        while (item := queue.get()) is not None:
+            kind, payload = item
+            if kind == 'error':
+                errors.append(payload)
+
+            if errors:
+                continue
+
+            try:
+                with connection.begin():
+                    written.append(load_rows(connection, table, rows(payload), batch_size, ignore_conflicts))
+
+            except Exception as error:
+                errors.append(error)
+
+        if connection is not None:
+            connection.close()
+
+    threads = [threading.Thread(target=write, name=f'writer-{number}') for number in range(writers)]
+    [process.start() for process in processes]
+    [thread.start() for thread in threads]
+    [process.join() for process in processes]
+    [queue.put(None) for _ in threads]
+    [thread.join() for thread in threads]
+
+    if errors:
+        raise RuntimeError(f'Pipeline of {table.name} failed:\n{errors[0]}')
+
+    logging.info(f'\t\t\t{table.name}: {sum(written)} row(s) in {len(written)} batch(es).')
+
+    return sum(written)
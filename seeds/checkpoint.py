@@ -0,0 +1,232 @@
+from dataclasses import replace
+import logging
+import random
+import time
+from typing import (
+    Callable,
+    Optional,
+    )
+
+import numpy as np
+from sqlalchemy import (
+    Column,
+    Connection,
+    create_engine,
+    Engine,
+    func,
+    insert,
+    Integer,
+    MetaData,
+    select,
+    String,
+    Table,
+    TIMESTAMP,
+    )
+from sqlalchemy.exc import (
+    DBAPIError,
+    IntegrityError,
+    OperationalError,
+    )
+
+from database.bulk import (
+    BATCH_SIZE,
+    load_rows,
+    )
+from database.connect_to_db_postgresql import url_to_db
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    Teacher,
+    )
+import seed
+from seeds.generators import rows
+from seeds.profiles import (
+    profile_key,
+    SeedProfile,
+    )
+
+
+RETRIES = 8  # attempts of one batch after a dropped connection
+RETRY_DELAY = 1.0  # seconds, doubled after every failed attempt
+START = -1  # batch number of the "students before this run" mark
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+# Own metadata: the service table is not a part of the models (and of the Alembic migrations).
+metadata = MetaData()
+checkpoints = Table(
+    'seed_checkpoints',
+    metadata,
+    Column('run_key', String(12), primary_key=True),
+    Column('table_name', String(30), primary_key=True),
+    Column('batch', Integer, primary_key=True),
+    Column('last_key', Integer),  # the last id the batch covered
+    Column('rows', Integer),
+    Column('created_at', TIMESTAMP(timezone=False), server_default=func.current_timestamp()),
+    )
+
+# (connection) -> (last_key, rows written)
+BatchWriter = Callable[[Connection], tuple[Optional[int], int]]
+
+
+def done_batches(engine_: Engine, run_key: str, table_name: str) -> dict[int, tuple[Optional[int], int]]:
+    """{batch: (last_key, rows)} of the batches of table that were committed by the run."""
+    with engine_.connect() as connection:
+        result = connection.execute(
+            select(checkpoints.c.batch, checkpoints.c.last_key, checkpoints.c.rows)
+            .where(checkpoints.c.run_key == run_key, checkpoints.c.table_name == table_name)
+            )
+
+        return {batch: (last_key, rows_) for batch, last_key, rows_ in result}
+
+
+def is_disconnect(error: DBAPIError) -> bool:
+    return error.connection_invalidated or isinstance(error, OperationalError)
+
+
+def run_batch(
+        engine_: Engine,
+        run_key: str,
+        table_name: str,
+        batch: int,
+        write: BatchWriter,
+        retries: int = RETRIES,
+        ) -> int:
+    """Write one batch and its checkpoint in one transaction (exactly once), retrying after a dropped connection."""
+    for attempt in range(1, retries + 1):
+        try:
+            with engine_.begin() as connection:
+                last_key, written = write(connection)
+                connection.execute(insert(checkpoints).values(
+                    run_key=run_key, table_name=table_name, batch=batch, last_key=last_key, rows=written
+                    ))
+
+            logging.debug(f'\t\t{table_name}: batch {batch} - {written} row(s) committed.')
+            return written
+
+        except IntegrityError:
+            # the commit of an earlier attempt did reach the server - its checkpoint rejected this duplicate
+            already = done_batches(engine_, run_key, table_name).get(batch)
+            if already is None:
+                raise
+
+            return already[1]
+
+        except DBAPIError as error:
+            if not is_disconnect(error) or attempt == retries:
+                raise
+
+            delay = RETRY_DELAY * 2 ** (attempt - 1)
+            logging.warning(f'\t\t\t{table_name}: batch {batch} lost the connection (attempt {attempt}), '
+                            f'retry in {delay:.0f} s, error:\n{error.orig}')
+            time.sleep(delay)
+
+
+def ids_of(connection: Connection, model, default: int) -> np.ndarray:
+    """Ids really in the table (gaps after skipped conflicts or other runs), 1..default if it is empty."""
+    ids = np.fromiter(connection.scalars(select(model.id).order_by(model.id)), dtype=np.int64)
+
+    return ids if len(ids) else np.arange(1, default + 1)
+
+
+def seed_resumable(profile: SeedProfile, batch_size: int = BATCH_SIZE, retries: int = RETRIES) -> bool:
+    """Seed in committed, checkpointed batches; run it again with the same profile to resume after a failure."""
+    if profile.rng_seed is None:  # resuming regenerates the missing batches - they must be the same
+        profile = replace(profile, rng_seed=random.randrange(2 ** 31))
+        logging.warning(f'\t\t\tNo RNG seed - use --rng-seed {profile.rng_seed} to resume this run.')
+
+    # the batches are numbered by batch_size: a run resumed with another one would redo or skip rows
+    run_key = profile_key(profile, year=seed.YEAR_STUDY_START, batch_size=batch_size)
+    engine_ = create_engine(url_to_db, pool_pre_ping=True)  # pre-ping replaces connections dropped in between
+    metadata.create_all(engine_)
+    logging.info(f'\t\t\tResumable seed, run {run_key}.')
+
+    def once(table_name: str, write: BatchWriter) -> None:
+        if 0 not in done_batches(engine_, run_key, table_name):
+            run_batch(engine_, run_key, table_name, 0, write, retries)
+
+    def write_groups(connection: Connection) -> tuple[Optional[int], int]:
+        groups = ({'group_name': seed.group_name(number)} for number in range(1, profile.groups + 1))
+        return None, load_rows(connection, Group.__table__, groups, batch_size, ignore_conflicts=True)
+
+    def write_teachers(connection: Connection) -> tuple[Optional[int], int]:
+        names = seed.fake_data_generator(profile, seed.STREAMS['teachers']).unique_names(profile.teachers)
+        teachers = rows({'name': names})
+        return None, load_rows(connection, Teacher.__table__, teachers, batch_size, ignore_conflicts=True)
+
+    def write_subjects(connection: Connection) -> tuple[Optional[int], int]:
+        fake_data = seed.fake_data_generator(profile, seed.STREAMS['subjects'])
+        subjects = rows({
+            'subject': fake_data.subjects(profile.subjects),
+            'teacher_id': fake_data.keys(
+                ids_of(connection, Teacher, profile.teachers), profile.subjects, profile.teacher_load
+                ),
+            })
+        return None, load_rows(connection, Subject.__table__, subjects, batch_size)
+
+    once('groups_', write_groups)
+    once('teachers', write_teachers)
+    once('subjects', write_subjects)
+
+    # students: fixed-size batches, every batch with an own RNG stream - a resumed batch draws the same rows
+    done = done_batches(engine_, run_key, 'students')
+    if START not in done:
+        run_batch(engine_, run_key, 'students', START,
+                  lambda connection: (connection.scalar(select(func.max(Student.id))) or 0, 0), retries)
+        done = done_batches(engine_, run_key, 'students')
+
+    with engine_.connect() as connection:
+        group_ids = ids_of(connection, Group, profile.groups)
+
+    fake_data = seed.fake_data_generator(profile, seed.STREAMS['students'])
+    for batch, first in enumerate(range(0, profile.students, batch_size)):
+        if batch in done:
+            continue
+
+        def write_students(connection: Connection, batch=batch, size=min(batch_size, profile.students - first)):
+            batch_data = fake_data.stream(seed.STREAMS['students'], batch)
+            names = batch_data.unique_names(size)  # repeats across batches are skipped by the INSERT
+            students = rows({'name': names, 'group_id': batch_data.keys(group_ids, len(names), profile.group_sizes)})
+            written = load_rows(connection, Student.__table__, students, batch_size, ignore_conflicts=True)
+            return connection.scalar(select(func.max(Student.id))), written
+
+        run_batch(engine_, run_key, 'students', batch, write_students, retries)
+
+    # assessments: keyset pagination over the students of this run, from the last committed student id on
+    done_students = done_batches(engine_, run_key, 'students')
+    last_student = max(last_key or 0 for last_key, _ in done_students.values())  # the last student of this run
+    done = done_batches(engine_, run_key, 'assessments')
+    batch = max(done, default=-1) + 1
+    last_key = done[batch - 1][0] if done else done_students[START][0]
+    students_per_batch = max(1, batch_size // profile.max_assessments)
+    fake_data = seed.fake_data_generator(profile, seed.STREAMS['assessments'])
+    with engine_.connect() as connection:
+        subject_ids = ids_of(connection, Subject, profile.subjects)
+
+    while last_key < last_student:  # not "while rows are written": a batch may draw no assessments at all
+        def write_assessments(connection: Connection, batch=batch, after=last_key):
+            student_ids = np.fromiter(
+                connection.scalars(
+                    select(Student.id).where(Student.id > after, Student.id <= last_student)
+                    .order_by(Student.id).limit(students_per_batch)
+                    ),
+                dtype=np.int64,
+                )
+            if not len(student_ids):  # the rest of the students of the run were deleted
+                return last_student, 0
+
+            assessments = seed.generate_assessments(
+                student_ids, subject_ids, profile, fake_data.stream(seed.STREAMS['assessments'], batch)
+                )
+            return int(student_ids[-1]), load_rows(connection, Assessment.__table__, assessments, batch_size)
+
+        run_batch(engine_, run_key, 'assessments', batch, write_assessments, retries)
+        last_key = done_batches(engine_, run_key, 'assessments')[batch][0]
+        batch += 1
+
+    engine_.dispose()
+    logging.info(f'\t\t\tResumable seed {run_key} finished.')
+
+    return True
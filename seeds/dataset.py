@@ -0,0 +1,50 @@
+from itertools import chain
+from typing import Iterator
+
+import numpy as np
+
+from seeds.generators import (
+    FakeDataGenerator,
+    rows,
+    )
+from seeds.profiles import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    SeedProfile,
+    )
+
+
+PROFILE = PROFILES[DEFAULT_PROFILE]
+YEAR_STUDY_START = 2022
+# own RNG stream of every table, so that e.g. teachers do not repeat the names of the first students:
+STREAMS = {'students': 1, 'teachers': 2, 'subjects': 3, 'assessments': 4}
+
+
+def group_name(number: int) -> str:
+    """Group name that fits groups_.group_name CHAR(7): 'Group-1'..'Group-9', then 'G000010'..."""
+    return f'Group-{number}' if number < 10 else f'G{number:06d}'
+
+
+def fake_data_generator(profile: SeedProfile, *stream: int) -> FakeDataGenerator:
+    return FakeDataGenerator(YEAR_STUDY_START, profile.years, profile.rng_seed, stream, profile.zipf_exponent)
+
+
+def generate_assessments(
+        student_ids: np.ndarray,
+        subject_ids: np.ndarray,
+        profile: SeedProfile = PROFILE,
+        fake_data: FakeDataGenerator = None,
+        ) -> Iterator[dict]:
+    """Yield assessment rows lazily, a quota of assessments per student, in O(n)."""
+    fake_data = fake_data or fake_data_generator(profile, STREAMS['assessments'])
+    # до 20 оцінок у кожного студента з усіх предметів (квота тягнеться один раз на студента):
+    batches = fake_data.assessments(
+        student_ids,
+        subject_ids,
+        profile.min_assessments,
+        profile.max_assessments,
+        profile.subject_popularity,
+        profile.assessment_dates,
+        )
+
+    return chain.from_iterable(rows(columns) for columns in batches)
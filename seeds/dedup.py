@@ -0,0 +1,55 @@
+from hashlib import blake2b
+import math
+from typing import Union
+
+
+SET_LIMIT = 1_000_000  # up to this many expected values an exact set is cheap enough
+BLOOM_ERROR_RATE = 0.001
+
+
+class SetDeduplicator:
+    """Exact: remembers every value."""
+
+    def __init__(self):
+        self.seen = set()
+
+    def add(self, value: str) -> bool:
+        """True if value was not seen before."""
+        if value in self.seen:
+            return False
+
+        self.seen.add(value)
+        return True
+
+
+class BloomFilter:
+    """Approximate, fixed memory: a few bits per value, rare false "seen" answers (never false "new")."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))  # bits
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, value: str) -> list[int]:
+        digest = blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]  # double hashing
+
+    def add(self, value: str) -> bool:
+        """True if value was (certainly) not seen before."""
+        new = False
+        for position in self.positions(value):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+
+        return new
+
+
+Deduplicator = Union[SetDeduplicator, BloomFilter]
+
+
+def make_deduplicator(expected: int) -> Deduplicator:
+    """Exact set for ordinary sizes, Bloom filter when a set of all values would take gigabytes."""
+    return SetDeduplicator() if expected <= SET_LIMIT else BloomFilter(expected)
@@ -0,0 +1,63 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+
+UNIFORM = 'uniform'
+ZIPF = 'zipf'  # the key of rank k (ids in ascending order) is drawn with weight 1 / k ** exponent
+CLUSTERED = 'clustered'  # hot keys: the first HOT_KEYS share of keys gets HOT_SHARE of draws; dates: exam weeks
+KEY_DISTRIBUTIONS = (UNIFORM, ZIPF, CLUSTERED)
+DATE_DISTRIBUTIONS = (UNIFORM, CLUSTERED)
+ZIPF_EXPONENT = 1.1
+HOT_KEYS = 0.1
+HOT_SHARE = 0.8
+EXAM_DAYS = 10  # working days of a winter (end of December) and a summer (end of the year) exam session
+EXAM_SHARE = 0.4  # of all assessments are given in the exam sessions
+
+
+def key_weights(size: int, distribution: str = UNIFORM, exponent: float = ZIPF_EXPONENT) -> Optional[np.ndarray]:
+    """Probabilities of `size` keys in ascending id order (None - uniform, drawn the cheap way)."""
+    if distribution not in KEY_DISTRIBUTIONS:
+        raise ValueError(f'Unknown key distribution {distribution!r}, expected one of {KEY_DISTRIBUTIONS}.')
+
+    if distribution == ZIPF:
+        weights = 1 / np.arange(1, size + 1) ** exponent
+
+    elif distribution == CLUSTERED and math.ceil(size * HOT_KEYS) < size:
+        hot = math.ceil(size * HOT_KEYS)
+        weights = np.full(size, (1 - HOT_SHARE) / (size - hot))
+        weights[:hot] = HOT_SHARE / hot
+
+    else:
+        return None
+
+    return weights / weights.sum()
+
+
+def exam_days(calendar: np.ndarray) -> np.ndarray:
+    """Mask of the last EXAM_DAYS working days of every December and of every academic year."""
+    months = calendar.astype('datetime64[M]').astype(int) % 12 + 1
+    years = calendar.astype('datetime64[Y]').astype(int)
+    exam_session = np.where(months == 12, 0, np.where(months <= 6, 1, -1))  # winter, summer, no session
+    mask = np.zeros(len(calendar), dtype=bool)
+    for year, kind in {(year, kind) for year, kind in zip(years.tolist(), exam_session.tolist()) if kind >= 0}:
+        days = np.flatnonzero((years == year) & (exam_session == kind))
+        mask[days[-EXAM_DAYS:]] = True
+
+    return mask
+
+
+def date_weights(calendar: np.ndarray, distribution: str = UNIFORM) -> Optional[np.ndarray]:
+    """Probabilities of the working days of calendar (None - uniform)."""
+    if distribution not in DATE_DISTRIBUTIONS:
+        raise ValueError(f'Unknown date distribution {distribution!r}, expected one of {DATE_DISTRIBUTIONS}.')
+
+    if distribution == UNIFORM:
+        return None
+
+    exams = exam_days(calendar)
+    if exams.all() or not exams.any():
+        return None
+
+    return np.where(exams, EXAM_SHARE / exams.sum(), (1 - EXAM_SHARE) / (~exams).sum())
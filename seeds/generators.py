@@ -0,0 +1,164 @@
+import copy
+from datetime import date
+import logging
+from typing import (
+    Callable,
+    Iterator,
+    Optional,
+    Sequence,
+    )
+
+from faker import Faker
+import numpy as np
+
+from seeds.dedup import (
+    Deduplicator,
+    make_deduplicator,
+    )
+from seeds.distributions import (
+    date_weights,
+    key_weights,
+    UNIFORM,
+    ZIPF_EXPONENT,
+    )
+
+
+LOCALE = 'uk_UA'
+POOL_DRAWS = 2_000  # Faker calls per vocabulary pool (duplicates are dropped)
+STUDENTS_PER_CHUNK = 10_000  # students whose assessments are drawn in one NumPy batch
+SUBJECT_LENGTH = 40  # subjects.subject CHAR(40)
+NAME_LENGTH = 50  # students.name, teachers.name VARCHAR(50)
+LONG_NAME_SHARE = 0.2  # 'last first middle' names, as Faker's uk_UA formats do
+UNIQUE_ATTEMPTS = 20  # rounds of redrawing duplicate names before the numbered names (and numbers per name)
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def study_calendar(year_study_start: int, years: int = 1) -> np.ndarray:
+    """All working days (datetime64[D]) of `years` academic years: 2 Sep - 6 Jun (without the last week)."""
+    days = [np.arange(np.datetime64(date(year, 9, 2)), np.datetime64(date(year + 1, 6, 7)), dtype='datetime64[D]')
+            for year in range(year_study_start, year_study_start + years)]
+    days = np.concatenate(days)
+
+    return days[np.is_busday(days)]
+
+
+def vocabulary(provider: Callable[[], str], draws: int = POOL_DRAWS) -> np.ndarray:
+    """Unique values of a Faker provider (sorted: the order of a set of str depends on PYTHONHASHSEED)."""
+    return np.array(sorted({provider() for _ in range(draws)}))
+
+
+def rows(columns: dict[str, np.ndarray]) -> Iterator[dict]:
+    """Turn equally long column arrays into row dicts of plain Python values (for the DBAPI)."""
+    names = list(columns)
+    for values in zip(*(column.tolist() for column in columns.values())):
+        yield dict(zip(names, values))
+
+
+class FakeDataGenerator:
+    """Vocabulary pools are built once with Faker, then values are drawn in batches with NumPy."""
+
+    def __init__(
+            self,
+            year_study_start: int,
+            years: int = 1,
+            rng_seed: Optional[int] = None,
+            stream: Sequence[int] = (),
+            zipf_exponent: float = ZIPF_EXPONENT,
+            ):
+        fake_data = Faker(LOCALE)
+        fake_data.seed_instance(rng_seed)
+        self.first_names = (vocabulary(fake_data.first_name_male), vocabulary(fake_data.first_name_female))
+        self.last_names = (vocabulary(fake_data.last_name_male), vocabulary(fake_data.last_name_female))
+        self.middle_names = (vocabulary(fake_data.middle_name_male), vocabulary(fake_data.middle_name_female))
+        self.jobs = vocabulary(lambda: fake_data.job()[:SUBJECT_LENGTH].strip())
+        self.calendar = study_calendar(year_study_start, years)
+        self.rng_seed = rng_seed
+        self.zipf_exponent = zipf_exponent
+        # every table (and shard) gets an own independent stream of the same seed:
+        self.rng = np.random.default_rng(None if rng_seed is None else [rng_seed, *stream])
+
+    def stream(self, *stream: int) -> 'FakeDataGenerator':
+        """The same vocabulary pools with another RNG stream of the same seed (e.g. one per batch)."""
+        fake_data = copy.copy(self)
+        fake_data.rng = np.random.default_rng(None if self.rng_seed is None else [self.rng_seed, *stream])
+
+        return fake_data
+
+    def choice(self, pool: np.ndarray, size: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        if weights is None:
+            return pool[self.rng.integers(0, len(pool), size)]
+
+        return pool[self.rng.choice(len(pool), size, p=weights)]
+
+    def names(self, size: int) -> np.ndarray:
+        """Full names: 'first last' or 'last first middle' of one gender."""
+        female = self.rng.random(size) < 0.5
+        long_name = self.rng.random(size) < LONG_NAME_SHARE
+        first = np.where(female, self.choice(self.first_names[1], size), self.choice(self.first_names[0], size))
+        last = np.where(female, self.choice(self.last_names[1], size), self.choice(self.last_names[0], size))
+        middle = np.where(female, self.choice(self.middle_names[1], size), self.choice(self.middle_names[0], size))
+        short_names = np.char.add(np.char.add(first, ' '), last)
+        long_names = np.char.add(np.char.add(np.char.add(np.char.add(last, ' '), first), ' '), middle)
+
+        return np.where(long_name, long_names, short_names)
+
+    def unique_names(self, size: int, deduplicator: Deduplicator = None) -> np.ndarray:
+        """Exactly size names without repeats, for the unique=True name columns: duplicates are redrawn, and once
+        the vocabulary is exhausted the rest are drawn names with a number ('Ірина Бойко 2', 'Ірина Бойко 3')."""
+        deduplicator = deduplicator or make_deduplicator(size)
+        names = []
+        for _ in range(UNIQUE_ATTEMPTS):
+            names.extend(name for name in self.names(size - len(names)).tolist() if deduplicator.add(name))
+            if len(names) == size:
+                return np.array(names)
+
+        numbers = {}  # the last number given to a name
+        for name in self.names(size - len(names)).tolist():
+            for _ in range(UNIQUE_ATTEMPTS):
+                numbers[name] = numbers.get(name, 1) + 1
+                suffix = f' {numbers[name]}'
+                numbered = f'{name[:NAME_LENGTH - len(suffix)]}{suffix}'
+                if deduplicator.add(numbered):
+                    names.append(numbered)
+                    break
+
+            else:
+                raise ValueError(f'Only {len(names)} unique name(s) of {size}: the vocabulary is exhausted.')
+
+        return np.array(names)
+
+    def subjects(self, size: int) -> np.ndarray:
+        return self.choice(self.jobs, size)
+
+    def keys(self, ids: np.ndarray, size: int, distribution: str = UNIFORM) -> np.ndarray:
+        """Random foreign keys from the ids that really exist in the parent table (skewed: the first ids are hot)."""
+        return self.choice(ids, size, key_weights(len(ids), distribution, self.zipf_exponent))
+
+    def grades(self, size: int) -> np.ndarray:
+        return self.rng.integers(1, 6, size, dtype=np.int8)
+
+    def study_dates(self, size: int, distribution: str = UNIFORM) -> np.ndarray:
+        return self.choice(self.calendar, size, date_weights(self.calendar, distribution))
+
+    def assessments(
+            self,
+            student_ids: np.ndarray,
+            subject_ids: np.ndarray,
+            min_assessments: int = 6,
+            max_assessments: int = 19,
+            subject_popularity: str = UNIFORM,
+            assessment_dates: str = UNIFORM,
+            ) -> Iterator[dict[str, np.ndarray]]:
+        """Column batches of assessments: a quota of min..max assessments per student, drawn once."""
+        for start in range(0, len(student_ids), STUDENTS_PER_CHUNK):
+            chunk = student_ids[start:start + STUDENTS_PER_CHUNK]
+            quotas = self.rng.integers(min_assessments, max_assessments + 1, len(chunk))
+            chunk = np.repeat(chunk, quotas)
+            size = len(chunk)
+            yield {
+                'value_': self.grades(size),
+                'date_of': self.study_dates(size, assessment_dates),
+                'subject_id': self.keys(subject_ids, size, subject_popularity),
+                'student_id': chunk,
+                }
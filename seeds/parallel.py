@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+
+import numpy as np
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    func,
+    MetaData,
+    select,
+    Table,
+    )
+
+from database.bulk import (
+    BATCH_SIZE,
+    load_rows,
+    )
+from database.connect_to_db_postgresql import (
+    engine,
+    session,
+    url_to_db,
+    )
+from database.id_allocator import id_allocator
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    )
+import seed
+from seeds.profiles import SeedProfile
+from seeds.shard import seed_shard  # a worker process imports only seeds.shard, not the engine of this module
+
+
+WORKERS = os.cpu_count() or 1
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def shards(batches: int, workers: int) -> list[range]:
+    """Split the logical batches into at most `workers` contiguous, nearly equal runs."""
+    return [range(int(part[0]), int(part[-1]) + 1)
+            for part in np.array_split(np.arange(batches), max(1, workers)) if len(part)]
+
+
+def check_consistency(student_ids: np.ndarray, expected_students: int, expected_assessments: int) -> bool:
+    """Compare what the workers reported with what is in the tables and look for orphan assessments.
+
+    Counted by the reserved ids themselves (a temporary table): the ids of a block need not be contiguous on
+    PostgreSQL, rows of other sessions may lie between them."""
+    connection = session.connection()
+    reserved = Table('reserved_student_ids', MetaData(), Column('id', BigInteger, primary_key=True),
+                     prefixes=['TEMPORARY'])
+    reserved.create(connection)
+    try:
+        load_rows(connection, reserved, ({'id': int(id_)} for id_ in student_ids))
+        students = connection.scalar(select(func.count(Student.id)).join(reserved, reserved.c.id == Student.id))
+        assessments = connection.scalar(
+            select(func.count(Assessment.id)).join(reserved, reserved.c.id == Assessment.student_id)
+            )
+        orphans = connection.scalar(
+            select(func.count(Assessment.id))
+            .outerjoin(Student, Assessment.student_id == Student.id)
+            .where(Assessment.student_id.isnot(None), Student.id.is_(None))
+            )
+
+    finally:
+        reserved.drop(connection)
+        session.commit()
+
+    consistent = (students, assessments, orphans) == (expected_students, expected_assessments, 0)
+    log = logging.info if consistent else logging.error
+    log(f'\t\t\tConsistency check: students {students}/{expected_students}, '
+        f'assessments {assessments}/{expected_assessments}, orphan assessments {orphans}.')
+
+    return consistent
+
+
+def seed_parallel(
+        profile: SeedProfile = seed.PROFILE,
+        workers: int = WORKERS,
+        batch_size: int = BATCH_SIZE,
+        ) -> bool:
+    """Seed groups, teachers and subjects here, then students and assessments in worker processes by batches."""
+    number_of_students = profile.students
+    seed.create_groups(profile, batch_size)
+    seed.create_teachers(profile, batch_size)
+    seed.create_subjects(profile, batch_size)
+
+    group_ids = seed.existing_ids(Group, profile.groups)
+    subject_ids = seed.existing_ids(Subject, profile.subjects)
+    session.commit()
+    # ids reserved from the sequence: workers write students and their assessments without reading ids back first
+    student_ids = id_allocator(engine, Student.__table__).allocate(number_of_students)
+    # the names of the whole run at once (as the serial seed draws them): unique in the run, the shards never
+    # wait for each other's uncommitted names (ON CONFLICT) and the same seed gives the same names
+    names = seed.fake_data_generator(profile, seed.STREAMS['students']).unique_names(number_of_students)
+    parts = shards(-(-number_of_students // batch_size), workers)
+    written_students = written_assessments = 0
+    failed = False
+    with ProcessPoolExecutor(max_workers=len(parts)) as executor:
+        futures = []
+        for part in parts:
+            shard = slice(part.start * batch_size, part.stop * batch_size)
+            futures.append(executor.submit(seed_shard, url_to_db, student_ids[shard], names[shard], part.start,
+                                           group_ids, subject_ids, profile, batch_size))
+        for part, future in zip(parts, futures):
+            try:
+                students, assessments = future.result()
+
+            except Exception as error:
+                logging.error(f'\t\t\tWrong seed of shard {part.start}-{part.stop - 1}, error:\n{error}')
+                failed = True
+                continue
+
+            written_students += students
+            written_assessments += assessments
+
+    return check_consistency(student_ids, written_students, written_assessments) and not failed
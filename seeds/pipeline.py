@@ -0,0 +1,71 @@
+from functools import partial
+import logging
+
+from sqlalchemy import (
+    func,
+    select,
+    )
+
+from database.bulk import BATCH_SIZE
+from database.connect_to_db_postgresql import (
+    engine,
+    session,
+    )
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    )
+import seed
+# a producer process imports only seeds.batches, not the engine of this module:
+from seeds.batches import (
+    assessment_batch,
+    PRODUCERS,
+    QUEUE_SIZE,
+    run_pipeline,
+    student_batch,
+    WRITERS,
+    )
+from seeds.profiles import SeedProfile
+
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def seed_pipelined(
+        profile: SeedProfile = seed.PROFILE,
+        producers: int = PRODUCERS,
+        writers: int = WRITERS,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        ) -> bool:
+    """Seed small tables directly, students and assessments through the generate/write pipeline."""
+    seed.create_groups(profile, batch_size)
+    seed.create_teachers(profile, batch_size)
+    seed.create_subjects(profile, batch_size)
+
+    group_ids = seed.existing_ids(Group, profile.groups)
+    subject_ids = seed.existing_ids(Subject, profile.subjects)
+    last_id = session.scalar(select(func.max(Student.id))) or 0
+    session.commit()
+    options = {'producers': producers, 'writers': writers, 'queue_size': queue_size, 'batch_size': batch_size}
+
+    try:
+        batches = -(-profile.students // batch_size)
+        make_batch = partial(student_batch, profile, group_ids, batch_size)
+        # names repeated across batches are skipped by the INSERT:
+        run_pipeline(Student.__table__, make_batch, batches, engine, ignore_conflicts=True, **options)
+
+        student_ids = seed.existing_ids(Student, 0, Student.id > last_id)
+        session.commit()
+        students_per_batch = max(1, batch_size // profile.max_assessments)
+        batches = -(-len(student_ids) // students_per_batch)
+        make_batch = partial(assessment_batch, profile, student_ids, subject_ids, students_per_batch)
+        run_pipeline(Assessment.__table__, make_batch, batches, engine, **options)
+
+    except Exception as error:
+        logging.error(f'\t\t\tWrong pipelined seed, error:\n{error}')
+        return False
+
+    return True
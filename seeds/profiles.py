@@ -0,0 +1,80 @@
+from dataclasses import (
+    asdict,
+    dataclass,
+    replace,
+    )
+import hashlib
+import json
+import random
+from typing import Optional
+
+from faker import Faker
+
+from seeds.distributions import (
+    CLUSTERED,
+    UNIFORM,
+    ZIPF,
+    ZIPF_EXPONENT,
+    )
+
+
+@dataclass(frozen=True)
+class SeedProfile:
+    """Size of a fake dataset and the RNG seed that makes it reproducible."""
+    groups: int
+    students: int
+    teachers: int
+    subjects: int
+    years: int = 1  # academic years, starting from seed.YEAR_STUDY_START
+    min_assessments: int = 6  # assessments per student (all subjects together)
+    max_assessments: int = 19
+    rng_seed: Optional[int] = None  # None - a new dataset on every run
+    # seeds.distributions: how foreign keys and dates are drawn (uniform, or hot keys / exam weeks):
+    group_sizes: str = UNIFORM  # students.group_id
+    teacher_load: str = UNIFORM  # subjects.teacher_id
+    subject_popularity: str = UNIFORM  # assessments.subject_id
+    assessment_dates: str = UNIFORM  # assessments.date_of
+    zipf_exponent: float = ZIPF_EXPONENT
+
+    @property
+    def max_total_assessments(self) -> int:
+        return self.students * self.max_assessments
+
+
+PROFILES = {
+    'tiny': SeedProfile(groups=2, students=10, teachers=2, subjects=3),
+    'small': SeedProfile(groups=3, students=40, teachers=4, subjects=6),  # the original training dataset
+    'large': SeedProfile(groups=100, students=100_000, teachers=200, subjects=300, years=2),
+    'xlarge': SeedProfile(groups=1_000, students=1_000_000, teachers=2_000, subjects=3_000, years=3),
+    # a few large groups, popular subjects and busy teachers, exam-week spikes - for hot-key benchmarks:
+    'skewed': SeedProfile(
+        groups=100,
+        students=100_000,
+        teachers=200,
+        subjects=300,
+        years=2,
+        group_sizes=ZIPF,
+        teacher_load=CLUSTERED,
+        subject_popularity=ZIPF,
+        assessment_dates=CLUSTERED,
+        ),
+    }
+DEFAULT_PROFILE = 'small'
+
+
+def make_profile(name: str = DEFAULT_PROFILE, **overrides) -> SeedProfile:
+    """Named profile with explicit overrides (None values are ignored)."""
+    return replace(PROFILES[name], **{key: value for key, value in overrides.items() if value is not None})
+
+
+def profile_key(profile: SeedProfile, **extra) -> str:
+    """Short stable digest of all profile fields (and extra values): the same key - the same dataset."""
+    key = json.dumps({**asdict(profile), **extra}, sort_keys=True)
+
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def apply_rng_seed(rng_seed: Optional[int]) -> None:
+    """Seed `random` and Faker so that the same profile generates the same dataset."""
+    random.seed(rng_seed)
+    Faker.seed(rng_seed)
@@ -0,0 +1,165 @@
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+    )
+from dataclasses import dataclass
+from functools import partial
+from graphlib import TopologicalSorter
+import logging
+import time
+from typing import (
+    Callable,
+    Iterable,
+    Optional,
+    )
+
+from sqlalchemy import (
+    Connection,
+    Engine,
+    MetaData,
+    )
+
+from database.bulk import BATCH_SIZE
+from database.connect_to_db_postgresql import engine
+from database.models import (
+    Assessment,
+    Base,
+    Group,
+    Student,
+    Subject,
+    Teacher,
+    )
+import seed
+from seeds.profiles import SeedProfile
+
+
+THREADS = 4  # connections loading tables at the same time (the widest level of the models graph is 2)
+TIMELINE_WIDTH = 40  # characters of the longest bar of the timeline report
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+# (connection) -> rows written; the scheduler commits the connection's transaction
+Load = Callable[[Connection], int]
+
+
+@dataclass
+class Stage:
+    """Timeline of one table load, seconds from the start of the run."""
+    table: str
+    ready: float  # all parents committed
+    started: float = 0.0  # a thread (connection) took it
+    finished: float = 0.0  # committed or failed
+    rows: int = 0
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+def dependencies(tables: Iterable[str], metadata: MetaData = Base.metadata) -> dict[str, set[str]]:
+    """{table: parent tables} from the foreign keys of metadata, only among `tables`."""
+    tables = set(tables)
+
+    return {
+        name: {key.column.table.name for key in metadata.tables[name].foreign_keys} & (tables - {name})
+        for name in tables
+        }
+
+
+def load_table(engine_: Engine, stage: Stage, load: Load, origin: float) -> Stage:
+    """Run one load in an own connection and transaction, recording its timeline."""
+    stage.started = time.perf_counter() - origin
+    try:
+        with engine_.begin() as connection:
+            stage.rows = load(connection)
+
+    except Exception as error:
+        stage.error = str(error)
+
+    stage.finished = time.perf_counter() - origin
+
+    return stage
+
+
+def run_scheduled(
+        loads: dict[str, Load],
+        engine_: Engine = engine,
+        threads: int = THREADS,
+        metadata: MetaData = Base.metadata,
+        ) -> list[Stage]:
+    """Load tables concurrently, each one as soon as all its parents are committed; stages in start order."""
+    if engine_.dialect.name == 'sqlite':
+        threads = 1  # SQLite has one writer at a time anyway
+
+    graph = dependencies(loads, metadata)
+    sorter = TopologicalSorter(graph)
+    sorter.prepare()  # raises graphlib.CycleError on circular foreign keys
+    stages = {}
+    failed = set()
+    running = {}
+    origin = time.perf_counter()
+    with ThreadPoolExecutor(max(1, threads), thread_name_prefix='seed') as executor:
+        while sorter.is_active():
+            for name in sorter.get_ready():
+                ready = time.perf_counter() - origin
+                stage = stages[name] = Stage(name, ready, ready, ready)
+                if graph[name] & failed:  # no parent rows - the children would only fail too
+                    stage.error = f'skipped, parent failed: {", ".join(sorted(graph[name] & failed))}'
+                    failed.add(name)
+                    sorter.done(name)
+                    continue
+
+                running[executor.submit(load_table, engine_, stage, loads[name], origin)] = name
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                if future.result().error:
+                    failed.add(name)
+
+                sorter.done(name)
+
+    return sorted(stages.values(), key=lambda stage: (stage.started, stage.table))
+
+
+def report_timeline(stages: list[Stage]) -> str:
+    """Text timeline: waiting for a thread as '.', loading as '#', one line per table."""
+    total = max((stage.finished for stage in stages), default=0) or 1
+    scale = TIMELINE_WIDTH / total
+    lines = []
+    for stage in stages:
+        bar = ' ' * round(stage.ready * scale)
+        bar += '.' * (round(stage.started * scale) - len(bar))
+        bar += '#' * max(1, round(stage.finished * scale) - len(bar))
+        bar = bar[:TIMELINE_WIDTH]
+        result = f'{stage.rows} row(s)' if stage.error is None else f'ERROR {stage.error.splitlines()[0]}'
+        lines.append(f'{stage.table:>12} |{bar:<{TIMELINE_WIDTH}}| '
+                     f'{stage.started:7.2f}..{stage.finished:7.2f} s  {result}')
+
+    lines.append(f'{"total":>12} |{"#" * TIMELINE_WIDTH}| {0:7.2f}..{total:7.2f} s')
+
+    return '\n'.join(lines)
+
+
+def seed_scheduled(profile: SeedProfile = seed.PROFILE, threads: int = THREADS, batch_size: int = BATCH_SIZE) -> bool:
+    """Seed all tables, independent ones at the same time on separate connections."""
+    write = {'profile': profile, 'batch_size': batch_size}
+    loads = {
+        Group.__tablename__: partial(seed.write_groups, **write),
+        Student.__tablename__: partial(seed.write_students, **write),
+        Teacher.__tablename__: partial(seed.write_teachers, **write),
+        Subject.__tablename__: partial(seed.write_subjects, **write),
+        Assessment.__tablename__: partial(seed.write_assessments, **write),
+        }
+    stages = run_scheduled(loads, threads=threads)
+    logging.info(f'\t\t\tSeed timeline:\n{report_timeline(stages)}')
+    errors = [stage for stage in stages if stage.error is not None]
+    for stage in errors:
+        logging.error(f'\t\t\tWrong load of {stage.table}, error:\n{stage.error}')
+
+    return not errors
@@ -0,0 +1,77 @@
+import logging
+
+import numpy as np
+from sqlalchemy import (
+    create_engine,
+    select,
+    )
+
+from database.bulk import (
+    BATCH_SIZE,
+    load_rows,
+    )
+from database.models import (
+    Assessment,
+    Student,
+    )
+from seeds.batches import generator
+from seeds.dataset import (
+    generate_assessments,
+    PROFILE,
+    STREAMS,
+    )
+from seeds.generators import rows
+from seeds.profiles import SeedProfile
+
+
+# The worker of seeds.parallel. A worker process imports only this module: with the spawn start method (Windows,
+# macOS) importing database.connect_to_db_postgresql would ask for the password and build its engine again.
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def seed_shard(
+        url: str,
+        student_ids: np.ndarray,
+        names: np.ndarray,
+        first_batch: int,
+        group_ids: np.ndarray,
+        subject_ids: np.ndarray,
+        profile: SeedProfile = PROFILE,
+        batch_size: int = BATCH_SIZE,
+        ) -> tuple[int, int]:
+    """Worker: write the students with the reserved student_ids and names (unique in the run, drawn by the parent),
+    the logical batches first_batch... of batch_size students, and their assessments.
+
+    Every batch draws its groups and assessments from the RNG streams of its number, as in seeds.batches: the same
+    profile and RNG seed give the same rows whatever the number of workers and the ids the allocator handed out."""
+    engine_ = create_engine(url)  # of this process: the connections of a pool are not shared between processes
+    written_students = written_assessments = 0
+    try:
+        with engine_.begin() as connection:
+            for batch, first in enumerate(range(0, len(student_ids), batch_size), first_batch):
+                ids = student_ids[first:first + batch_size]
+                fake_data = generator(profile, STREAMS['students']).stream(STREAMS['students'], batch)
+                students = rows({
+                    'id': ids,
+                    'name': names[first:first + batch_size],
+                    'group_id': fake_data.keys(group_ids, len(ids), profile.group_sizes),
+                    })
+                # a name already in the table is skipped, so assessments go only to the students really written:
+                written_students += load_rows(connection, Student.__table__, students, batch_size,
+                                              ignore_conflicts=True)
+                written_ids = np.fromiter(
+                    connection.scalars(select(Student.id).where(Student.id.in_(ids.tolist())).order_by(Student.id)),
+                    dtype=np.int64,
+                    )
+
+                fake_data = generator(profile, STREAMS['assessments']).stream(STREAMS['assessments'], batch)
+                assessments = generate_assessments(written_ids, subject_ids, profile, fake_data)
+                written_assessments += load_rows(connection, Assessment.__table__, assessments, batch_size)
+
+    finally:
+        engine_.dispose()
+
+    logging.info(f'\t\t\tShard of batches {first_batch}-{batch}: {written_students} student(s), '
+                 f'{written_assessments} assessment(s).')
+
+    return written_students, written_assessments
@@ -0,0 +1,157 @@
+from dataclasses import asdict
+import json
+import logging
+import pathlib
+import shutil
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import (
+    Engine,
+    func,
+    select,
+    Table,
+    )
+
+from database.bulk import (
+    BATCH_SIZE,
+    load_rows,
+    sync_sequence,
+    )
+from database.connect_to_db_postgresql import engine
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    Teacher,
+    )
+import seed
+from seeds.generators import rows
+from seeds.profiles import (
+    profile_key,
+    SeedProfile,
+    )
+
+
+SNAPSHOT_DIR = pathlib.Path(__file__).parent.parent.joinpath('snapshots')
+MANIFEST = 'manifest.json'
+SNAPSHOT_VERSION = 1  # change when the generators change - old snapshots are not reused then
+TABLES = {table.name: table for table in (Group.__table__, Teacher.__table__, Subject.__table__,
+                                          Student.__table__, Assessment.__table__)}  # parents first
+
+logging.basicConfig(level=logging.DEBUG, format='%(threadName)s %(message)s')
+
+
+def snapshot_path(profile: SeedProfile, directory: pathlib.Path = SNAPSHOT_DIR) -> pathlib.Path:
+    """Directory of the snapshot of profile: sizes, RNG seed and generator version make the key."""
+    digest = profile_key(profile, version=SNAPSHOT_VERSION, year=seed.YEAR_STUDY_START)
+
+    return directory.joinpath(f'{profile.students}-students-seed-{profile.rng_seed}-{digest}')
+
+
+def generate_dataset(profile: SeedProfile) -> Iterator[tuple[Table, dict[str, np.ndarray]]]:
+    """Column batches of the whole dataset of profile with explicit ids, parent tables first."""
+    group_ids = np.arange(1, profile.groups + 1)
+    yield Group.__table__, {'id': group_ids, 'group_name': np.array([seed.group_name(id_) for id_ in group_ids])}
+
+    names = seed.fake_data_generator(profile, seed.STREAMS['teachers']).unique_names(profile.teachers)
+    teacher_ids = np.arange(1, len(names) + 1)
+    yield Teacher.__table__, {'id': teacher_ids, 'name': names}
+
+    fake_data = seed.fake_data_generator(profile, seed.STREAMS['subjects'])
+    subject_ids = np.arange(1, profile.subjects + 1)
+    yield Subject.__table__, {
+        'id': subject_ids,
+        'subject': fake_data.subjects(profile.subjects),
+        'teacher_id': fake_data.keys(teacher_ids, profile.subjects, profile.teacher_load),
+        }
+
+    fake_data = seed.fake_data_generator(profile, seed.STREAMS['students'])
+    names = fake_data.unique_names(profile.students)
+    student_ids = np.arange(1, len(names) + 1)
+    yield Student.__table__, {
+        'id': student_ids,
+        'name': names,
+        'group_id': fake_data.keys(group_ids, len(names), profile.group_sizes),
+        }
+
+    fake_data = seed.fake_data_generator(profile, seed.STREAMS['assessments'])
+    batches = fake_data.assessments(
+        student_ids,
+        subject_ids,
+        profile.min_assessments,
+        profile.max_assessments,
+        profile.subject_popularity,
+        profile.assessment_dates,
+        )
+    for columns in batches:
+        yield Assessment.__table__, columns
+
+
+def write_snapshot(profile: SeedProfile, directory: pathlib.Path = SNAPSHOT_DIR) -> pathlib.Path:
+    """Generate the dataset of profile into compressed columnar .npz files plus a manifest."""
+    path = snapshot_path(profile, directory)
+    partial = path.with_name(f'{path.name}.partial')  # a crash must not leave a "cached" half snapshot
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+
+    manifest = {'version': SNAPSHOT_VERSION, 'profile': asdict(profile), 'tables': {}}
+    for table, columns in generate_dataset(profile):
+        files = manifest['tables'].setdefault(table.name, [])
+        file_name = f'{table.name}-{len(files):05d}.npz'
+        np.savez_compressed(partial.joinpath(file_name), **columns)
+        files.append({'file': file_name, 'rows': len(next(iter(columns.values())))})
+
+    partial.joinpath(MANIFEST).write_text(json.dumps(manifest, indent=2))
+    shutil.rmtree(path, ignore_errors=True)
+    partial.rename(path)
+    logging.info(f'\t\t\tSnapshot written: {path}')
+
+    return path
+
+
+def load_snapshot(path: pathlib.Path, engine_: Engine = engine, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """Bulk load a snapshot (COPY on PostgreSQL) into empty tables, in one transaction."""
+    manifest = json.loads(path.joinpath(MANIFEST).read_text())
+    written = {}
+    with engine_.begin() as connection:
+        not_empty = [name for name in manifest['tables']
+                     if connection.scalar(select(func.count()).select_from(TABLES[name]))]
+        if not_empty:
+            raise ValueError(f'Snapshot needs empty tables, not empty: {", ".join(not_empty)}')
+
+        for name, files in manifest['tables'].items():
+            table = TABLES[name]
+            for part in files:
+                with np.load(path.joinpath(part['file'])) as data:
+                    columns = {column: data[column] for column in data.files}
+                written[name] = written.get(name, 0) + load_rows(connection, table, rows(columns), batch_size)
+
+            sync_sequence(connection, table)
+            logging.info(f'\t\t\tLoaded {written[name]} row(s) of {name}.')
+
+    return written
+
+
+def seed_from_snapshot(profile: SeedProfile, batch_size: int = BATCH_SIZE) -> bool:
+    """Load the cached snapshot of profile; generate and cache it first if there is none yet."""
+    path = snapshot_path(profile)
+    if profile.rng_seed is None:
+        logging.warning('\t\t\tNo RNG seed - the snapshot cannot be reused, it is generated anew.')
+        path = write_snapshot(profile)
+
+    elif not path.joinpath(MANIFEST).exists():
+        write_snapshot(profile)
+
+    else:
+        logging.info(f'\t\t\tSnapshot found: {path}')
+
+    try:
+        load_snapshot(path, batch_size=batch_size)
+
+    except Exception as error:
+        logging.error(f'\t\t\tWrong load of snapshot {path}, error:\n{error}')
+        return False
+
+    return True
@@ -0,0 +1,80 @@
+from datetime import date
+
+from sqlalchemy import (
+    delete,
+    event,
+    func,
+    select,
+    )
+
+from database.bulk import (
+    copy_rows,
+    copy_value,
+    insert_batches,
+    load_rows,
+    )
+from database.models import (
+    Group,
+    Teacher,
+    )
+
+
+def groups(engine_) -> int:
+    with engine_.connect() as connection:
+        return connection.scalar(select(func.count()).select_from(Group))
+
+
+def test_conflicts_are_skipped(engine_):
+    with engine_.begin() as connection:
+        written = load_rows(connection, Group.__table__, [{'group_name': 'Group-1'}, {'group_name': 'Group-2'},
+                                                          {'group_name': 'Group-1'}], ignore_conflicts=True)
+
+    assert written == 2
+    assert groups(engine_) == 2
+
+
+def test_rollback_undoes_a_load_that_ignores_conflicts(engine_):
+    with engine_.connect() as connection:
+        transaction = connection.begin()
+        load_rows(connection, Group.__table__, [{'group_name': 'Group-1'}, {'group_name': 'Group-2'}],
+                  ignore_conflicts=True)
+        transaction.rollback()
+
+    assert groups(engine_) == 0
+
+
+def test_one_insert_statement_per_batch(engine_):
+    statements = []
+    event.listen(engine_, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    with engine_.begin() as connection:
+        written = insert_batches(connection, Group.__table__,
+                                 ({'group_name': f'Group-{number}'} for number in range(10)), batch_size=4)
+
+    assert written == 10
+    assert len([statement for statement in statements if statement.startswith('INSERT')]) == 3
+    assert groups(engine_) == 10
+
+
+def test_copy_values_are_escaped():
+    assert copy_value(None) == r'\N'
+    assert copy_value(date(2022, 9, 1)) == '2022-09-01'
+    assert copy_value('a\tb\\c\nd') == 'a\\tb\\\\c\\nd'
+
+
+def test_copy_writes_the_rows_and_skips_conflicts(postgresql_engine):
+    names = ['Copy\tA', 'Copy\\B', 'Copy\nC', 'Copy D']
+    with postgresql_engine.begin() as connection:
+        connection.execute(delete(Teacher).where(Teacher.name.like('Copy%')))
+
+    try:
+        with postgresql_engine.begin() as connection:
+            assert copy_rows(connection, Teacher.__table__, [{'name': name} for name in names[:2]], 1) == 2
+            assert copy_rows(connection, Teacher.__table__, [{'name': name} for name in names], 3,
+                             ignore_conflicts=True) == 2
+
+        with postgresql_engine.connect() as connection:
+            assert sorted(connection.scalars(select(Teacher.name).where(Teacher.name.like('Copy%')))) == sorted(names)
+
+    finally:
+        with postgresql_engine.begin() as connection:
+            connection.execute(delete(Teacher).where(Teacher.name.like('Copy%')))
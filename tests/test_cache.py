@@ -0,0 +1,79 @@
+from datetime import date
+
+from sqlalchemy import (
+    create_engine,
+    insert,
+    select,
+    )
+
+from database.models import (
+    Assessment,
+    Student,
+    Subject,
+    )
+from database.versions import install_versions
+from my_select import run_report
+from reports.cache import ReportCache
+
+
+def new_assessment(connection) -> dict:
+    return {'value_': 1, 'date_of': date(2022, 9, 1), 'student_id': connection.scalar(select(Student.id)),
+            'subject_id': connection.scalar(select(Subject.id))}
+
+
+def cache_of(dataset) -> ReportCache:
+    install_versions(dataset.engine)
+    return ReportCache(engine_=dataset.engine)
+
+
+def test_a_repeated_lookup_is_served_from_the_cache(dataset):
+    cache = cache_of(dataset)
+    rows = cache.run('select_4', dataset.session)
+
+    assert cache.run('select_4', dataset.session) == rows
+    assert cache.stats()['hits'] == 1
+
+
+def test_a_commit_of_this_process_invalidates(dataset):
+    cache = cache_of(dataset)
+    cache.run('select_4', dataset.session)
+    dataset.session.add(Assessment(**new_assessment(dataset.session)))
+    dataset.session.commit()
+
+    assert cache.run('select_4', dataset.session) == run_report('select_4', dataset.session)
+    assert cache.stats()['misses'] == 2
+
+
+def test_a_commit_of_another_connection_invalidates(dataset):
+    cache = cache_of(dataset)
+    cache.run('select_1', dataset.session)
+    other = create_engine(dataset.url_to_db)  # as another process would write: no session events here
+    with other.begin() as connection:
+        connection.execute(insert(Assessment), [new_assessment(connection)] * 50)
+
+    other.dispose()
+    dataset.session.commit()  # a new transaction sees the commit
+
+    assert cache.run('select_1', dataset.session) == run_report('select_1', dataset.session)
+    assert cache.stats()['misses'] == 2
+
+
+def test_a_rolled_back_write_keeps_the_entries(dataset):
+    cache = cache_of(dataset)
+    cache.run('select_4', dataset.session)
+    dataset.session.add(Assessment(**new_assessment(dataset.session)))
+    dataset.session.flush()
+    dataset.session.rollback()
+
+    cache.run('select_4', dataset.session)
+    assert cache.stats()['hits'] == 1
+
+
+def test_a_write_to_a_table_the_report_does_not_read_keeps_its_entry(dataset):
+    cache = cache_of(dataset)
+    cache.run('select_6', dataset.session, group_id=1)
+    dataset.session.add(Assessment(**new_assessment(dataset.session)))
+    dataset.session.commit()
+
+    cache.run('select_6', dataset.session, group_id=1)
+    assert cache.stats()['hits'] == 1
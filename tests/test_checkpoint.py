@@ -0,0 +1,87 @@
+from dataclasses import replace
+
+import pytest
+from sqlalchemy import (
+    insert,
+    select,
+    )
+from sqlalchemy.exc import OperationalError
+
+from database.bulk import load_rows
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    )
+from seeds import checkpoint
+from seeds.checkpoint import (
+    done_batches,
+    metadata,
+    run_batch,
+    seed_resumable,
+    )
+from seeds.profiles import PROFILES
+
+
+PROFILE = replace(PROFILES['tiny'], rng_seed=1)
+BATCH_SIZE = 4  # 3 batches of students, 2 students per batch of assessments
+
+
+def contents(engine_) -> list:
+    with engine_.connect() as connection:
+        return [
+            connection.execute(select(Student.name, Group.group_name).join(Group).order_by(Student.name)).all(),
+            connection.execute(select(Subject.subject).order_by(Subject.id)).all(),
+            connection.execute(
+                select(Student.name, Subject.subject, Assessment.value_, Assessment.date_of)
+                .join(Student).join(Subject)
+                .order_by(Student.name, Subject.subject, Assessment.date_of, Assessment.value_)
+                ).all(),
+            ]
+
+
+@pytest.mark.parametrize('table', ['students', 'assessments'])
+def test_a_resumed_run_writes_the_dataset_of_an_uninterrupted_one(sqlite_database, monkeypatch, table):
+    uninterrupted, resumed = sqlite_database('uninterrupted.db'), sqlite_database('resumed.db')
+    monkeypatch.setattr(checkpoint, 'url_to_db', uninterrupted.url.render_as_string(False))
+    assert seed_resumable(PROFILE, BATCH_SIZE)
+
+    written = []
+
+    def interrupted_load_rows(connection, table_, *args, **kwargs):
+        if table_.name == table and written.count(table) == 1:  # the second batch of table fails
+            raise RuntimeError('interrupted')
+
+        written.append(table_.name)
+        return load_rows(connection, table_, *args, **kwargs)
+
+    monkeypatch.setattr(checkpoint, 'url_to_db', resumed.url.render_as_string(False))
+    monkeypatch.setattr(checkpoint, 'load_rows', interrupted_load_rows)
+    with pytest.raises(RuntimeError):
+        seed_resumable(PROFILE, BATCH_SIZE)
+
+    monkeypatch.setattr(checkpoint, 'load_rows', load_rows)
+    assert seed_resumable(PROFILE, BATCH_SIZE)
+
+    assert contents(resumed) == contents(uninterrupted)
+    assert len(contents(resumed)[0]) == PROFILE.students
+
+
+def test_a_batch_is_retried_after_a_dropped_connection(engine_, monkeypatch):
+    monkeypatch.setattr(checkpoint, 'RETRY_DELAY', 0)
+    metadata.create_all(engine_)
+    attempts = []
+
+    def write(connection):
+        attempts.append(len(attempts) + 1)
+        connection.execute(insert(Group).values(group_name=f'Group-{attempts[-1]}'))
+        if len(attempts) == 1:
+            raise OperationalError('INSERT', {}, Exception('server closed the connection'))
+
+        return None, 1
+
+    assert run_batch(engine_, 'run', 'groups_', 0, write) == 1
+    assert done_batches(engine_, 'run', 'groups_') == {0: (None, 1)}
+    with engine_.connect() as connection:
+        assert connection.scalars(select(Group.group_name)).all() == ['Group-2']
@@ -0,0 +1,55 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import (
+    insert,
+    select,
+    )
+
+from database.models import (
+    Assessment,
+    Student,
+    Subject,
+    )
+from my_select import run_report
+from reports.columnar import ColumnarEngine
+
+
+ORDERED = ('select_1', 'select_2', 'select_14', 'select_15')  # the others have no (or a partial) ORDER BY
+
+
+def normalized(rows, ordered: bool = True) -> list[tuple]:
+    rows = [tuple(round(float(value), 6) if isinstance(value, (Decimal, float)) else value for value in row)
+            for row in rows]
+
+    return rows if ordered else sorted(rows, key=repr)
+
+
+@pytest.mark.parametrize('name', ['select_3', 'select_4', 'select_5', 'select_6', 'select_7', 'select_8',
+                                  'select_9', 'select_10', 'select_11', 'select_12', 'select_13'])
+def test_the_columnar_reports_return_the_rows_of_the_baseline(dataset, baseline, report_parameters, name):
+    columnar = ColumnarEngine(dataset.engine)
+    for params in report_parameters(name):
+        assert normalized(columnar.run(name, **params), ordered=False) \
+            == normalized(baseline(name, **params), ordered=False), params
+
+
+@pytest.mark.parametrize('name', ORDERED)
+def test_the_columnar_reports_return_the_rows_of_my_select(dataset, report_parameters, name):
+    columnar = ColumnarEngine(dataset.engine)
+    for params in report_parameters(name):
+        assert normalized(columnar.run(name, **params)) == normalized(run_report(name, dataset.session, **params))
+
+
+def test_reload_appends_the_new_assessments(dataset, baseline):
+    columnar = ColumnarEngine(dataset.engine)
+    columnar.run('select_4')
+    with dataset.engine.begin() as connection:
+        student_id, subject_id = connection.scalar(select(Student.id)), connection.scalar(select(Subject.id))
+        connection.execute(insert(Assessment), [
+            {'value_': 5, 'date_of': date(2022, 9, 1), 'student_id': student_id, 'subject_id': subject_id}
+            ])
+
+    assert columnar.reload() == 1
+    assert normalized(columnar.run('select_4')) == normalized(baseline('select_4'))
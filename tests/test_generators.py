@@ -0,0 +1,19 @@
+from seeds.generators import (
+    FakeDataGenerator,
+    NAME_LENGTH,
+    )
+from seeds.profiles import PROFILES
+
+
+def test_unique_names_of_the_largest_profile():
+    size = max(profile.students for profile in PROFILES.values())
+    names = FakeDataGenerator(2022, rng_seed=1).unique_names(size).tolist()
+
+    assert len(names) == size
+    assert len(set(names)) == size
+    assert max(map(len, names)) <= NAME_LENGTH
+
+
+def test_unique_names_are_reproducible():
+    assert (FakeDataGenerator(2022, rng_seed=1).unique_names(1_000)
+            == FakeDataGenerator(2022, rng_seed=1).unique_names(1_000)).all()
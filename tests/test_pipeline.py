@@ -0,0 +1,51 @@
+from dataclasses import replace
+from functools import partial
+import multiprocessing
+import subprocess
+import sys
+
+import numpy as np
+from sqlalchemy import (
+    func,
+    select,
+    )
+
+from database.models import (
+    Assessment,
+    Student,
+    )
+from seeds.batches import (
+    assessment_batch,
+    run_pipeline,
+    student_batch,
+    )
+from seeds.profiles import PROFILES
+
+
+def test_producer_module_does_not_connect_on_import():
+    imported = subprocess.run(
+        [sys.executable, '-c', 'import sys, seeds.batches; print("database.connect_to_db_postgresql" in sys.modules)'],
+        capture_output=True, text=True, check=True,
+        )
+
+    assert imported.stdout.strip() == 'False'
+
+
+def test_pipeline_with_spawned_producers(sqlite_database):
+    engine_ = sqlite_database('seed.db', parents=True)
+    profile, batch_size = replace(PROFILES['tiny'], rng_seed=1), 4  # 3 batches of students for 2 producers
+    spawn = multiprocessing.get_context('spawn')
+    students = run_pipeline(
+        Student.__table__, partial(student_batch, profile, np.array([1]), batch_size),
+        -(-profile.students // batch_size), engine_, producers=2, batch_size=batch_size, ignore_conflicts=True,
+        context=spawn,
+        )
+    student_ids = np.arange(1, students + 1)
+    assessments = run_pipeline(
+        Assessment.__table__, partial(assessment_batch, profile, student_ids, np.array([1]), 2),
+        -(-students // 2), engine_, producers=2, batch_size=batch_size, context=spawn,
+        )
+
+    with engine_.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(Student)) == students == profile.students
+        assert connection.scalar(select(func.count()).select_from(Assessment)) == assessments > 0
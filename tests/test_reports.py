@@ -0,0 +1,119 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    Subject,
+    Teacher,
+    )
+from my_select import (
+    run_bulk_report,
+    run_report,
+    )
+
+
+MISSING_ID = 999  # an id of no row
+
+
+def normalized(rows, ordered: bool = True) -> list[tuple]:
+    """Rows as tuples, numbers as floats (Decimal of the summary tables, float of AVG); sorted if not ordered."""
+    rows = [tuple(round(float(value), 6) if isinstance(value, (Decimal, float)) else value for value in row)
+            for row in rows]
+
+    return rows if ordered else sorted(rows, key=repr)
+
+
+def ids(session_, model) -> list[int]:
+    return session_.scalars(select(model.id).order_by(model.id)).all()
+
+
+@pytest.mark.parametrize('name', ['select_3', 'select_4', 'select_5', 'select_6', 'select_7', 'select_8',
+                                  'select_9', 'select_10', 'select_11', 'select_12', 'select_13'])
+def test_the_reports_return_the_rows_of_the_baseline(dataset, baseline, report_parameters, name):
+    for params in report_parameters(name):
+        assert normalized(run_report(name, dataset.session, **params), ordered=False) \
+            == normalized(baseline(name, **params), ordered=False), params
+
+
+def test_the_best_students_have_the_averages_of_the_baseline(dataset, baseline):
+    rates = {row.id: row.Success_rate for row in baseline('select_1', limited=False)}
+    best = run_report('select_1', dataset.session)
+
+    assert [float(row.Success_rate) for row in best] == [float(row.Success_rate) for row in baseline('select_1')]
+    assert all(float(row.Success_rate) == float(rates[row.id]) for row in best)
+
+
+def test_the_best_student_of_a_subject_has_the_average_of_the_baseline(dataset, baseline):
+    for subject_id in ids(dataset.session, Subject):
+        rates = {row.ID: row.Success_rate for row in baseline('select_2', False, subject_id=subject_id)}
+        best, = run_report('select_2', dataset.session, subject_id=subject_id)
+        expected, = baseline('select_2', subject_id=subject_id)
+
+        assert float(best.Success_rate) == float(expected.Success_rate) == float(rates[best.ID])
+        assert best.subject == expected.subject
+
+
+def test_equal_averages_give_the_lowest_student_id(dataset):
+    session_ = dataset.session
+    subject_id = ids(session_, Subject)[0]
+    tied = [Student(name=name, group_id=ids(session_, Group)[0]) for name in ('Tie-A', 'Tie-B')]
+    session_.add_all(tied)
+    session_.flush()
+    session_.add_all([Assessment(value_=6, date_of=date(2022, 9, 1), subject_id=subject_id, student_id=student.id)
+                      for student in reversed(tied)])  # above every grade of the dataset (1-5)
+    session_.flush()
+    first = min(student.id for student in tied)
+
+    assert [row.id for row in run_report('select_1', session_)[:2]] == sorted(student.id for student in tied)
+    assert run_report('select_2', session_, subject_id=subject_id)[0].ID == first
+    assert run_bulk_report('select_2', session_=session_)[subject_id].ID == first
+
+
+def test_the_window_reports_return_the_last_lesson_of_the_baseline(dataset, baseline):
+    all_pairs = []
+    for group_id in ids(dataset.session, Group):
+        for subject_id in ids(dataset.session, Subject):
+            expected = normalized(baseline('select_12', group_id=group_id, subject_id=subject_id), ordered=False)
+            for name in ('select_12', 'select_13', 'select_14'):
+                rows = run_report(name, dataset.session, group_id=group_id, subject_id=subject_id)
+                assert normalized(rows, ordered=False) == expected, (name, group_id, subject_id)
+
+            all_pairs += expected
+
+    assert normalized(run_report('select_15', dataset.session), ordered=False) == sorted(all_pairs, key=repr)
+
+
+def test_the_bulk_reports_return_the_rows_of_the_per_id_reports(dataset, baseline):
+    session_ = dataset.session
+    subjects = run_bulk_report('select_2', session_=session_)
+    for subject_id in ids(session_, Subject):
+        best, = run_report('select_2', session_, subject_id=subject_id)
+        assert tuple(subjects[subject_id][1:]) == tuple(best)
+
+    courses = run_bulk_report('select_5', session_=session_)
+    averages = run_bulk_report('select_8', session_=session_)
+    pairs = run_bulk_report('select_11', session_=session_)
+    for teacher_id in ids(session_, Teacher):  # all keys: only the ones with rows
+        teacher_courses, average = courses.get(teacher_id, []), averages.get(teacher_id)
+        assert teacher_courses == run_report('select_5', session_, teacher_id=teacher_id)
+        assert normalized(teacher_courses, ordered=False) \
+            == normalized(baseline('select_5', teacher_id=teacher_id), ordered=False)
+        assert normalized([average[1:]] if average else []) \
+            == normalized(baseline('select_8', teacher_id=teacher_id))
+        for student_id in ids(session_, Student):
+            row = pairs.get((teacher_id, student_id))
+            assert normalized([row[2:]] if row else []) \
+                == normalized(baseline('select_11', teacher_id=teacher_id, student_id=student_id))
+
+
+def test_a_bulk_report_for_ids(dataset):
+    teacher_id = ids(dataset.session, Teacher)[0]
+    courses = run_bulk_report('select_5', [teacher_id, MISSING_ID], dataset.session)
+
+    assert courses[MISSING_ID] == []
+    assert courses[teacher_id] == run_report('select_5', dataset.session, teacher_id=teacher_id)
@@ -0,0 +1,71 @@
+from dataclasses import replace
+
+from sqlalchemy import (
+    func,
+    select,
+    )
+
+from database.models import (
+    Assessment,
+    Base,
+    Group,
+    Student,
+    Subject,
+    Teacher,
+    )
+import seed
+from seeds.profiles import PROFILES
+from seeds.scheduler import (
+    dependencies,
+    run_scheduled,
+    seed_scheduled,
+    )
+
+
+MODELS = (Group, Student, Teacher, Subject, Assessment)
+
+
+def test_dependencies_follow_the_foreign_keys():
+    assert dependencies(model.__tablename__ for model in MODELS) == {
+        'groups_': set(),
+        'students': {'groups_'},
+        'teachers': set(),
+        'subjects': {'teachers'},
+        'assessments': {'students', 'subjects'},
+        }
+
+
+def test_the_children_of_a_failed_table_are_skipped(engine_):
+    def fail(connection):
+        raise RuntimeError('no groups')
+
+    loads = {model.__tablename__: (lambda connection: 0) for model in MODELS}
+    loads['groups_'] = fail
+    stages = {stage.table: stage for stage in run_scheduled(loads, engine_, metadata=Base.metadata)}
+
+    assert stages['groups_'].error == 'no groups'
+    assert stages['students'].error.startswith('skipped')
+    assert stages['assessments'].error.startswith('skipped')
+    assert stages['teachers'].error is None
+    assert stages['subjects'].error is None
+
+
+def test_a_scheduled_seed_writes_the_serial_dataset(default_database, engine_):
+    profile = replace(PROFILES['tiny'], rng_seed=1)
+    assert seed_scheduled(profile, threads=2)
+    with engine_.begin() as connection:
+        for write in (seed.write_groups, seed.write_students, seed.write_teachers, seed.write_subjects,
+                      seed.write_assessments):
+            write(connection, profile)
+
+    datasets = []
+    for database_engine in (default_database.engine, engine_):
+        with database_engine.connect() as connection:
+            datasets.append([
+                connection.execute(select(Student.name, Group.group_name).join(Group).order_by(Student.id)).all(),
+                connection.execute(select(Subject.subject, Teacher.name).join(Teacher).order_by(Subject.id)).all(),
+                connection.scalar(select(func.count()).select_from(Assessment)),
+                ])
+
+    assert datasets[0] == datasets[1]
+    assert len(datasets[0][0]) == profile.students
@@ -0,0 +1,71 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+import multiprocessing
+import subprocess
+import sys
+
+import numpy as np
+from sqlalchemy import (
+    func,
+    select,
+    )
+
+from database.models import (
+    Assessment,
+    Student,
+    )
+from seeds.dataset import (
+    fake_data_generator,
+    STREAMS,
+    )
+from seeds.profiles import PROFILES
+from seeds.shard import seed_shard
+
+
+def test_worker_module_does_not_connect_on_import():
+    imported = subprocess.run(
+        [sys.executable, '-c', 'import sys, seeds.shard; print("database.connect_to_db_postgresql" in sys.modules)'],
+        capture_output=True, text=True, check=True,
+        )
+
+    assert imported.stdout.strip() == 'False'
+
+
+def test_seed_shard_in_a_spawned_worker(sqlite_database):
+    engine_ = sqlite_database('seed.db', parents=True)
+    url = engine_.url.render_as_string(False)
+    profile = PROFILES['tiny']
+    names = fake_data_generator(profile, STREAMS['students']).unique_names(profile.students)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        students, assessments = executor.submit(
+            seed_shard, url, np.arange(1, profile.students + 1), names, 0, np.array([1]), np.array([1]), profile
+            ).result()
+
+    with engine_.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(Student)) == students == profile.students
+        assert connection.scalar(select(func.count()).select_from(Assessment)) == assessments > 0
+
+
+def test_the_dataset_does_not_depend_on_the_shards_or_the_ids(sqlite_database):
+    profile, batch_size = replace(PROFILES['tiny'], rng_seed=1), 4
+    names = fake_data_generator(profile, STREAMS['students']).unique_names(profile.students)
+    datasets = []
+    for path, ids, parts in (('one.db', np.arange(1, 11), [range(0, 3)]),
+                             ('two.db', np.arange(101, 111), [range(0, 1), range(1, 3)])):
+        engine_ = sqlite_database(path, parents=True)
+        url = engine_.url.render_as_string(False)
+        for part in parts:
+            shard = slice(part.start * batch_size, part.stop * batch_size)
+            seed_shard(url, ids[shard], names[shard], part.start, np.array([1]), np.array([1]), profile, batch_size)
+
+        with engine_.connect() as connection:
+            datasets.append((
+                connection.execute(select(Student.name, Student.group_id).order_by(Student.id)).all(),
+                connection.execute(
+                    select(Student.name, Assessment.value_, Assessment.date_of).join(Student)
+                    .order_by(Student.id, Assessment.date_of, Assessment.value_)
+                    ).all(),
+                ))
+
+    assert datasets[0] == datasets[1]
+    assert len(datasets[0][0]) == profile.students
@@ -0,0 +1,86 @@
+from datetime import date
+
+from sqlalchemy import (
+    select,
+    update,
+    )
+
+from database.models import (
+    Assessment,
+    Group,
+    Student,
+    StudentScore,
+    Subject,
+    Teacher,
+    TeacherScore,
+    )
+from database.summaries import SOURCES
+import seed
+
+
+def summaries(connection) -> dict:
+    """The rows of every summary table (the averages rounded: SQLite keeps them as floats)."""
+    return {
+        model: sorted((*row[:-1], round(float(row[-1]), 9)) for row in connection.execute(select(model.__table__)))
+        for model in SOURCES
+        }
+
+
+def recomputed(connection) -> dict:
+    return {
+        model: sorted((*row[:-1], round(float(row[-1]), 9)) for row in connection.execute(statement))
+        for model, statement in SOURCES.items()
+        }
+
+
+def test_orm_writes_keep_the_summaries_current(dataset):
+    session_ = dataset.session
+    assessment = session_.scalars(select(Assessment).order_by(Assessment.id)).first()
+    student = session_.get(Student, assessment.student_id)
+    subject = session_.get(Subject, assessment.subject_id)
+    groups = session_.scalars(select(Group.id)).all()
+    teachers = session_.scalars(select(Teacher.id)).all()
+
+    session_.add(Assessment(value_=1, date_of=date(2022, 9, 1), student_id=student.id, subject_id=subject.id))
+    assessment.value_ = 5 if assessment.value_ != 5 else 4
+    student.group_id = next(group for group in groups if group != student.group_id)
+    subject.teacher_id = next(teacher for teacher in teachers if teacher != subject.teacher_id)
+    session_.flush()
+    session_.delete(session_.scalars(select(Assessment).order_by(Assessment.id.desc())).first())
+    session_.delete(session_.scalars(select(Student).where(Student.id != student.id)).first())
+    session_.commit()
+
+    with dataset.engine.connect() as connection:
+        assert summaries(connection) == recomputed(connection)
+
+
+def test_a_bulk_write_rebuilds_only_the_summaries_of_its_table(dataset):
+    with dataset.engine.begin() as connection:  # a wrong row no rebuild of student_scores would leave
+        connection.execute(update(StudentScore).where(StudentScore.student_id == 1).values(total=-1))
+        connection.execute(update(TeacherScore).values(total=-1))
+
+    dataset.session.execute(update(Teacher).values(name=Teacher.name + '.'))
+    dataset.session.commit()
+
+    with dataset.engine.connect() as connection:
+        current, expected = summaries(connection), recomputed(connection)
+        assert current[TeacherScore] == expected[TeacherScore]
+        assert connection.scalar(select(StudentScore.total).where(StudentScore.student_id == 1)) == -1
+
+
+def test_a_bulk_write_to_the_assessments_rebuilds_their_summaries(dataset):
+    dataset.session.execute(update(Assessment).where(Assessment.id % 3 == 0).values(value_=1))
+    dataset.session.commit()
+
+    with dataset.engine.connect() as connection:
+        assert summaries(connection) == recomputed(connection)
+
+
+def test_a_failed_seed_does_not_rebuild_the_summaries(monkeypatch):
+    def rebuild_summaries(connection):
+        raise AssertionError('rebuilt after a failed seed')
+
+    monkeypatch.setattr(seed, 'seed_tables', lambda *args: False)
+    monkeypatch.setattr(seed, 'rebuild_summaries', rebuild_summaries)
+
+    assert seed.run() is False
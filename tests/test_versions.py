@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import (
+    delete,
+    insert,
+    )
+
+from database.models import Group
+from database.versions import (
+    install_versions,
+    TableVersions,
+    )
+
+
+@pytest.fixture
+def engine_(engine_):
+    install_versions(engine_)
+    return engine_
+
+
+def test_a_committed_write_changes_only_the_version_of_its_table(engine_):
+    versions = TableVersions(engine_)
+    before = versions.read()
+    with engine_.begin() as connection:
+        connection.execute(insert(Group).values(group_name='Group-1'))
+
+    after = versions.read()
+
+    assert after['groups_'] > before['groups_']
+    assert {table: version for table, version in after.items() if table != 'groups_'} == \
+        {table: version for table, version in before.items() if table != 'groups_'}
+
+
+@pytest.fixture
+def postgresql_engine(postgresql_engine):
+    install_versions(postgresql_engine)
+    names = ('Test-A', 'Test-B')
+    with postgresql_engine.begin() as connection:
+        connection.execute(delete(Group).where(Group.group_name.in_(names)))
+
+    yield postgresql_engine
+    with postgresql_engine.begin() as connection:
+        connection.execute(delete(Group).where(Group.group_name.in_(names)))
+
+
+def test_concurrent_writers_do_not_wait_for_the_versions(postgresql_engine):
+    with postgresql_engine.connect() as first, postgresql_engine.connect() as second:
+        first.execute(insert(Group).values(group_name='Test-A'))  # not committed yet
+        second.exec_driver_sql("SET lock_timeout = '2s'")  # a wait for the first one fails the test
+        second.execute(insert(Group).values(group_name='Test-B'))
+        second.commit()
+        first.commit()
+
+
+def test_connections_see_each_others_commits_on_the_next_lookup(postgresql_engine):
+    readers = TableVersions(postgresql_engine), TableVersions(postgresql_engine)
+    try:
+        for name in ('Test-A', 'Test-B'):  # a write of one connection, both readers see it
+            before = [reader.read()['groups_'] for reader in readers]
+            with postgresql_engine.connect() as connection:
+                connection.execute(insert(Group).values(group_name=name))
+                assert [reader.read()['groups_'] for reader in readers] == before  # not committed: no change
+                connection.commit()
+
+            assert all(reader.read()['groups_'] > version for reader, version in zip(readers, before))
+
+    finally:
+        for reader in readers:
+            reader.close()
+
+
+def test_a_rolled_back_write_changes_no_version(postgresql_engine):
+    versions = TableVersions(postgresql_engine)
+    before = versions.read()
+    with postgresql_engine.connect() as connection:
+        connection.execute(insert(Group).values(group_name='Test-A'))
+        connection.rollback()
+
+    assert versions.read() == before
+    versions.close()
@@ -0,0 +1,96 @@
+from datetime import date
+import threading
+
+import pytest
+from sqlalchemy import (
+    create_engine,
+    delete,
+    insert,
+    select,
+    )
+
+from database.models import (
+    Assessment,
+    Student,
+    Subject,
+    ViewRefresh,
+    )
+from my_select import run_report
+from reports.views import (
+    install_views,
+    run_view_report,
+    staleness,
+    view_sql,
+    ViewRefresher,
+    VIEW_REPORTS,
+    VIEWS,
+    )
+
+
+def rounded(rows) -> list[tuple]:
+    return [tuple(round(float(value), 6) if not isinstance(value, (int, str)) else value for value in row)
+            for row in rows]
+
+
+def add_assessments(engine_, count: int) -> None:
+    with engine_.begin() as connection:
+        student_id, subject_id = connection.scalar(select(Student.id)), connection.scalar(select(Subject.id))
+        connection.execute(insert(Assessment), [
+            {'value_': 5, 'date_of': date(2022, 9, 1), 'student_id': student_id, 'subject_id': subject_id}
+            ] * count)
+
+
+@pytest.mark.parametrize('name', sorted(VIEW_REPORTS))
+def test_the_views_return_the_rows_of_the_reports(dataset, name):
+    install_views(dataset.engine)
+
+    assert rounded(run_view_report(name, dataset.session)) == rounded(run_report(name, dataset.session))
+
+
+def test_writes_make_the_views_due_and_a_refresh_catches_up(dataset):
+    install_views(dataset.engine)
+    refresher = ViewRefresher(interval=3600, write_threshold=3, engine_=dataset.engine)
+    assert refresher.due() == []
+
+    add_assessments(dataset.engine, 3)
+    assert all(state['writes_since'] == 3 for state in staleness(dataset.engine).values())
+    assert sorted(refresher.due()) == sorted(VIEWS)
+    assert rounded(run_view_report('select_4', dataset.session)) != rounded(run_report('select_4', dataset.session))
+
+    refresher.refresh(refresher.due())
+    assert refresher.due() == []
+    assert rounded(run_view_report('select_4', dataset.session)) == rounded(run_report('select_4', dataset.session))
+
+
+def test_install_does_not_lock_the_readers_of_populated_views_out(postgresql_engine):
+    with postgresql_engine.begin() as connection:  # populated, as the migration creates them
+        for view in VIEWS.values():
+            connection.exec_driver_sql(f'DROP MATERIALIZED VIEW IF EXISTS {view.name}')
+            connection.exec_driver_sql(f'CREATE MATERIALIZED VIEW {view.name} AS {view_sql(view, connection)}')
+
+    ViewRefresh.__table__.create(postgresql_engine, checkfirst=True)
+    with postgresql_engine.begin() as connection:
+        connection.execute(delete(ViewRefresh))
+
+    # a refresh without CONCURRENTLY waits for the readers: it fails after the lock timeout
+    engine_ = create_engine(postgresql_engine.url, connect_args={'options': '-c lock_timeout=2s'})
+    try:
+        with postgresql_engine.connect() as reader:
+            for view in VIEWS.values():
+                reader.exec_driver_sql(f'SELECT count(*) FROM {view.name}')
+
+            installed = threading.Thread(target=install_views, args=(engine_,))
+            installed.start()
+            installed.join(10)
+            assert not installed.is_alive()
+
+        assert set(staleness(engine_)) == set(VIEWS)
+        assert all(state['refreshed_at'] is not None for state in staleness(engine_).values())
+
+    finally:
+        engine_.dispose()
+        with postgresql_engine.begin() as connection:
+            for view in VIEWS.values():
+                connection.exec_driver_sql(f'DROP MATERIALIZED VIEW IF EXISTS {view.name}')
+
+            connection.execute(delete(ViewRefresh))